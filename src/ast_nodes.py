@@ -16,6 +16,9 @@ class Procedure(Node):
         self.args = head[1]  # Lista krotek (typ, nazwa)
         self.declarations = declarations
         self.commands = commands
+        # Parametry związane na stałe przez specjalizację: nazwa -> Variable (zmienna
+        # Main) albo Number (stała)
+        self.bindings = {}
 
 
 class Main(Node):
@@ -49,6 +52,8 @@ class Assign(Node):
     def __init__(self, identifier, expression):
         self.identifier = identifier
         self.expression = expression
+        # Wskaźniki przesuwane razem ze zmienną indukcyjną (induction.py)
+        self.bumps = ()
 
 
 class ArrayAssign(Node):
@@ -56,6 +61,8 @@ class ArrayAssign(Node):
         self.name = name
         self.index = index
         self.expression = expression
+        # Zmienna-wskaźnik z adresem elementu utrzymywana przez pętlę (induction.py)
+        self.pointer = None
 
 
 class If(Node):
@@ -69,12 +76,16 @@ class While(Node):
     def __init__(self, condition, commands):
         self.condition = condition
         self.commands = commands
+        # Wskaźniki elementów utrzymywane przez pętlę: nazwa -> (tablica, zmienna indukcyjna)
+        self.pointers = {}
 
 
 class Repeat(Node):
     def __init__(self, commands, condition):
         self.commands = commands
         self.condition = condition
+        # Wskaźniki elementów utrzymywane przez pętlę: nazwa -> (tablica, zmienna indukcyjna)
+        self.pointers = {}
 
 
 class For(Node):
@@ -84,12 +95,16 @@ class For(Node):
         self.end_expr = end_expr
         self.commands = commands
         self.downto = downto
+        # Wskaźniki elementów utrzymywane przez pętlę: nazwa -> (tablica, zmienna indukcyjna)
+        self.pointers = {}
 
 
 class ProcCall(Node):
     def __init__(self, name, args):
         self.name = name
         self.args = args  # Lista wartości/zmiennych przekazywanych
+        # Znane wartości argumentów tylko czytanych przez procedurę: indeks -> liczba
+        self.constants = {}
 
 
 class Read(Node):
@@ -122,3 +137,5 @@ class ArrayRef(Node):
     def __init__(self, name, index):
         self.name = name
         self.index = index
+        # Zmienna-wskaźnik z adresem elementu utrzymywana przez pętlę (induction.py)
+        self.pointer = None
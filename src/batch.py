@@ -0,0 +1,72 @@
+import contextlib
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+# Instancje leksera i parsera procesu roboczego - tworzone raz, przy starcie procesu
+_lexer = None
+_parser = None
+
+
+def output_name(input_file):
+    # plik.imp -> plik.mr obok pliku wejściowego
+    return os.path.splitext(input_file)[0] + '.mr'
+
+
+def read_manifest(path):
+    """Pary (wejście, wyjście) z pliku z listą: jedna kompilacja w linii,
+    'wejście [wyjście]'; puste linie i komentarze (#) są pomijane."""
+    pairs = []
+    with open(path, 'r') as f:
+        for line in f:
+            fields = line.split('#', 1)[0].split()
+            if not fields:
+                continue
+            output = fields[1] if len(fields) > 1 else output_name(fields[0])
+            pairs.append((fields[0], output))
+    return pairs
+
+
+def warm_up():
+    # Inicjalizator procesu roboczego: import kompilatora i tablic parsera raz na proces
+    global _lexer, _parser
+    from stream_lexer import StreamLexer
+    from parser import KompilatorParser
+    _lexer = StreamLexer()
+    _parser = KompilatorParser()
+
+
+def compile_job(job):
+    """Kompiluje jeden plik w procesie roboczym. Zwraca (sukces, komunikaty) -
+    wyjście każdego pliku jest zbierane osobno, żeby raporty się nie przeplatały."""
+    from main import compile_file
+    input_file, output_file, cache_dir = job
+    messages = io.StringIO()
+    with contextlib.redirect_stdout(messages):
+        try:
+            ok = compile_file(input_file, output_file, _lexer, _parser, cache_dir=cache_dir)
+        except Exception as e:
+            # Błąd jednego pliku nie może przerwać całej partii
+            print(f"Błąd kompilacji: {e}")
+            ok = False
+    return ok, messages.getvalue()
+
+
+def compile_batch(pairs, workers=None, cache_dir=None):
+    """Kompiluje pary (wejście, wyjście) na puli procesów (workers=None - tyle,
+    ile procesorów). Raport każdego pliku jest wypisywany w kolejności listy.
+    Zwraca True, gdy wszystkie kompilacje się udały."""
+    jobs = [(input_file, output_file, cache_dir) for input_file, output_file in pairs]
+    workers = workers or os.cpu_count() or 1
+    # Małe pliki kompilują się szybciej niż przesyłanie zadań - wysyłamy je paczkami
+    chunksize = max(1, len(jobs) // (workers * 4))
+    failed = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=warm_up) as pool:
+        results = pool.map(compile_job, jobs, chunksize=chunksize)
+        for (input_file, *_), (ok, messages) in zip(jobs, results):
+            print(f"[{'OK' if ok else 'BŁĄD'}] {input_file}")
+            for line in messages.splitlines():
+                print(f"    {line}")
+            failed += not ok
+    print(f"Skompilowano {len(pairs) - failed} z {len(pairs)} plików")
+    return failed == 0
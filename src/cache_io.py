@@ -0,0 +1,19 @@
+import marshal
+import os
+
+
+def dump(value, path):
+    """Zapisuje wartość (format marshal) pod path przez plik tymczasowy i
+    os.replace - równoległe kompilacje nie zobaczą połowy pliku. Brak miejsca
+    lub prawa zapisu nie jest błędem: pamięć podręczna jest tylko skrótem."""
+    temp = f"{path}.{os.getpid()}"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(temp, 'wb') as f:
+            marshal.dump(value, f)
+        os.replace(temp, path)
+    except OSError:
+        try:
+            os.remove(temp)
+        except OSError:
+            pass
@@ -1,21 +1,165 @@
+from concurrent.futures import ProcessPoolExecutor
 from ast_nodes import *
 from symbol_table import SymbolTable
+from regalloc import RegisterAllocator, REGISTERS, RETURN_ADDRESS, trip_counter
+from instructions import Instruction, Label, cost
+from peephole import PeepholeOptimizer
+from linker import CodeUnit, MAIN_UNIT, link
+from inliner import calls_in, names_in
+from induction import step_of
+
+# Większe wartości nie są śledzone (rejestry maszyny to long long)
+MAX_TRACKED = 2 ** 62
+
+# Kroki syntezy liczb w r_a (instrukcje są niezmienne - mogą być współdzielone)
+RST_A = Instruction("RST", "a")
+INC_A = Instruction("INC", "a")
+DEC_A = Instruction("DEC", "a")
+SHL_A = Instruction("SHL", "a")
+
+
+def plan_number(start, value):
+    """Plan najkrótszej sekwencji INC/DEC/SHL na r_a prowadzącej od start do value.
+    Liczby nieparzyste powstają z sąsiada w dół (INC) albo w górę (DEC), więc
+    np. 2^k-1 to k przesunięć i jeden DEC. Zwraca (koszt, plan dla synthesize)."""
+    memo = {}
+
+    def reach(v):
+        # memo[v] = (koszt, poprzednik, instrukcja) dojścia do v
+        if v in memo:
+            return memo[v][0]
+        best = (abs(v - start), None, None)   # Same INC/DEC od wartości start
+        if v >= 2 and v != start:
+            if v % 2 == 0:
+                option = (reach(v // 2) + 1, v // 2, SHL_A)
+            else:
+                option = min((reach(v - 1) + 1, v - 1, INC_A),
+                             (reach(v + 1) + 1, v + 1, DEC_A))
+            if option[0] < best[0]:
+                best = option
+        memo[v] = best
+        return best[0]
+
+    return reach(value), memo
+
+
+def multiplier_digits(constant):
+    """Cyfry mnożnika od najstarszej dla łańcucha SHL + ADD/SUB: binarne albo
+    NAF (cyfry -1/0/1, mniej niezerowych), zależnie od tego, co tańsze.
+    Odejmowanie się nie nasyca - każdy prefiks NAF jest dodatni."""
+    binary = [int(bit) for bit in bin(constant)[2:]]
+    naf = []
+    n = constant
+    while n:
+        digit = 2 - n % 4 if n % 2 else 0
+        naf.append(digit)
+        n = (n - digit) // 2
+    naf.reverse()
+
+    def chain_cost(digits):
+        return (len(digits) - 1) + 5 * (sum(1 for d in digits if d) - 1)
+    return min(binary, naf, key=chain_cost), min(chain_cost(binary), chain_cost(naf))
+
+
+def contains_division(node):
+    # Czy w poddrzewie występuje '/' lub '%'
+    if isinstance(node, list):
+        return any(contains_division(item) for item in node)
+    if isinstance(node, BinOp) and node.op in ('/', '%'):
+        return True
+    if isinstance(node, Node):
+        return any(contains_division(value) for value in vars(node).values())
+    return False
+
+
+def synthesize(start, value, memo):
+    steps = []
+    v = value
+    while memo[v][1] is not None:
+        _, previous, instr = memo[v]
+        steps.append(instr)
+        v = previous
+    step = INC_A if v >= start else DEC_A
+    steps.extend([step] * abs(v - start))
+    steps.reverse()
+    return steps
+
+
+def generate_procedure(generator_class, main_scope, frames_base, callees, node):
+    """Generuje jednostkę kodu procedury w świeżym generatorze - także w procesie
+    roboczym. callees to interfejsy (CodeUnit bez kodu) wołanych procedur."""
+    generator = generator_class()
+    generator.main_scope = main_scope
+    generator.frames_base = frames_base
+    for unit in callees:
+        generator.record(unit)
+    return generator.generate_unit(node)
 
 
 class CodeGenerator:
-    def __init__(self):
+    def __init__(self, workers=1, cache=None):
+        self.workers = workers          # Procesy generujące procedury (1 - bez puli)
+        self.cache = cache              # Pamięć jednostek kodu (unit_cache.py) albo None
         self.code = []
         self.symbols = SymbolTable()
         self.symbols.memory_offset = 0
         self.k = 0
         self.labels_map = {}
         self.k_counter = 0
-        self.procedures_map = {}
         self.procedures_args = {}
+        self.procedures_clobbers = {}   # Rejestry niszczone przez procedurę (przechodnio)
+        self.frame_ends = {}            # Pierwsza komórka nad ramką procedury
+        self.homes = {}                 # Przydział rejestrów w bieżącym zakresie
+        self.known = {}                 # Rejestr -> znana w tym miejscu kodu stała
+        self.division = None            # Operandy dzielenia, którego wyniki są w r_b/r_c
+        self.div_register = None        # Czwarty rejestr roboczy dzielenia
+        self.div_saved = False          # Czy div_register trzeba zachować w pamięci
 
-    def emit(self, instruction):
+    def emit(self, op, arg=None):
+        self.append(Instruction(op, arg))
+
+    def append(self, instruction):
         self.code.append(instruction)
         self.k += 1
+        self.track(instruction)
+
+    def track(self, instruction):
+        # Symulacja zawartości rejestrów w kodzie liniowym (na potrzeby gen_number)
+        op = instruction.op
+        reg = instruction.arg
+        known = self.known
+        if op == 'RST':
+            known[reg] = 0
+        elif op in ('INC', 'DEC', 'SHL', 'SHR'):
+            if reg in known:
+                value = known[reg]
+                value = {'INC': value + 1, 'DEC': max(value - 1, 0),
+                         'SHL': value * 2, 'SHR': value // 2}[op]
+                known[reg] = value
+        elif op in ('ADD', 'SUB'):
+            if 'a' in known and reg in known:
+                if op == 'ADD':
+                    known['a'] = known['a'] + known[reg]
+                else:
+                    known['a'] = max(known['a'] - known[reg], 0)
+            else:
+                known.pop('a', None)
+        elif op == 'SWP':
+            value_a = known.pop('a', None)
+            value_r = known.pop(reg, None)
+            if value_a is not None:
+                known[reg] = value_a
+            if value_r is not None:
+                known['a'] = value_r
+        elif op in ('LOAD', 'RLOAD', 'READ'):
+            known.pop('a', None)
+        elif op == 'CALL':
+            # Procedura może zniszczyć dowolny rejestr
+            known.clear()
+        if self.division is not None and self.breaks_division(op, reg):
+            self.division = None
+        for name in [r for r, value in known.items() if value >= MAX_TRACKED]:
+            del known[name]
 
     def get_addr(self, name):
         symbol = self.symbols.get(name)
@@ -23,50 +167,118 @@ class CodeGenerator:
 
     def new_label(self):
         self.k_counter += 1
-        return f"__L{self.k_counter}__"
+        return Label(self.k_counter)
 
     def mark_label(self, label):
         self.labels_map[label] = self.k
+        # Do etykiety można doskoczyć z innego miejsca - zawartość rejestrów nieznana
+        self.known = {}
+        self.division = None
 
-    def resolve_labels(self):
-        resolved_code = []
-        for line in self.code:
-            parts = line.split()
-            if len(parts) > 1 and parts[1].startswith("__L"):
-                label = parts[1]
-                if label in self.labels_map:
-                    target = self.labels_map[label]
-                    resolved_code.append(f"{parts[0]} {target}")
-                else:
-                    raise Exception(
-                        f"Błąd wewnętrzny: Nieznana etykieta {label}")
+    def gen_number(self, value):
+        # r_a = value; start od bieżącej zawartości r_a, od zera albo od kopii
+        # rejestru o znanej wartości - wybierany jest najtańszy wariant
+        starts = []
+        if 'a' in self.known:
+            starts.append(([], self.known['a']))
+        starts.append(([RST_A], 0))
+        for reg, known in self.known.items():
+            if reg != 'a':
+                starts.append(([RST_A, Instruction("ADD", reg)], known))
+
+        best = None
+        for prefix, start in starts:
+            steps_cost, memo = plan_number(start, value)
+            total = cost(prefix) + steps_cost
+            if best is None or total < best[0]:
+                best = (total, prefix, start, memo)
+        _, prefix, start, memo = best
+        for instr in prefix + synthesize(start, value, memo):
+            self.append(instr)
+
+    def assign_registers(self, commands, procedure=False):
+        """Przydziela rejestry e-h zmiennym bieżącego zakresu (patrz regalloc.py)."""
+        scope = self.symbols.scopes[-1]
+        variables = [name for name, sym in scope.items()
+                     if not sym.is_array and not sym.is_param and not sym.is_alias]
+        params = [name for name, sym in scope.items() if sym.is_param]
+        allocator = RegisterAllocator(self.procedures_clobbers)
+        self.homes = allocator.allocate(
+            commands, variables, params, procedure=procedure)
+        for name, sym in scope.items():
+            sym.register = self.homes.get(name)
+
+        clobbers = set(self.homes.values())
+        for _, callee in allocator.calls:
+            clobbers |= self.procedures_clobbers.get(callee, set())
+
+        # Dzielenie potrzebuje czwartego rejestru: wolnego (wtedy niszczy go
+        # procedura) albo zajętego i zachowywanego w pamięci na czas dzielenia
+        spare = [r for r in REGISTERS if r not in self.homes.values()]
+        self.div_register = spare[0] if spare else REGISTERS[-1]
+        self.div_saved = not spare
+        if spare and contains_division(commands):
+            clobbers.add(self.div_register)
+        return clobbers
+
+    def load_pointer(self, symbol):
+        # r_a = wskaźnik przechowywany w parametrze
+        if symbol.register:
+            self.emit("RST", "a")
+            self.emit("ADD", symbol.register)
+        else:
+            self.emit("LOAD", symbol.address)
+
+    def load_symbol(self, symbol):
+        # r_a = wartość zmiennej (niszczy tylko r_a)
+        if symbol.is_param:
+            # Parametr trzyma ADRES rzeczywistej zmiennej -> Dereferencja
+            if symbol.register:
+                self.emit("RLOAD", symbol.register)
             else:
-                resolved_code.append(line)
-        self.code = resolved_code
+                self.emit("LOAD", symbol.address)    # Załaduj wskaźnik
+                self.emit("RLOAD", "a")
+        elif symbol.register:
+            self.emit("RST", "a")
+            self.emit("ADD", symbol.register)
+        else:
+            self.emit("LOAD", symbol.address)
 
-    def gen_number(self, value):
-        self.emit("RST a")
-        if value == 0:
-            return
-        binary = bin(value)[2:]
-        self.emit("INC a")
-        for bit in binary[1:]:
-            self.emit("SHL a")
-            if bit == '1':
-                self.emit("INC a")
+    def store_symbol(self, symbol):
+        # zmienna = r_a (zawartość r_a po zapisie jest nieokreślona)
+        if symbol.is_param:
+            if symbol.register:
+                self.emit("RSTORE", symbol.register)
+                return
+            # Zapisz wartość w temp, załaduj adres, zapisz pośrednio
+            temp = self.symbols.allocate_temp()
+            self.emit("STORE", temp)         # Zapisz wynik
+
+            self.emit("LOAD", symbol.address)    # r_a = Wskaźnik
+            self.emit("SWP", "b")            # r_b = Wskaźnik
+
+            self.emit("LOAD", temp)          # r_a = Wynik
+            self.emit("RSTORE", "b")         # *Wskaźnik = Wynik
+            self.symbols.free_temp(temp)
+        elif symbol.register:
+            self.emit("SWP", symbol.register)
+            symbol.is_initialized = True
+        else:
+            self.emit("STORE", symbol.address)
+            symbol.is_initialized = True
+
+    def register_of(self, node):
+        # Rejestr trzymający wartość węzła (tylko zmienne nie będące parametrami)
+        if isinstance(node, Variable):
+            symbol = self.symbols.get(node.name)
+            if symbol.register and not symbol.is_param:
+                return symbol.register
+        return None
 
     # --- POPRAWKA: Obsługa odczytu (Zwykła zmienna vs Parametr-Referencja) ---
     def load_value_to_reg(self, node, reg='a'):
         if isinstance(node, Variable):
-            symbol = self.symbols.get(node.name)
-            if symbol.is_param:
-                # Parametr trzyma ADRES rzeczywistej zmiennej -> Dereferencja
-                self.emit(f"LOAD {symbol.address}")  # Załaduj wskaźnik
-                # Pobierz wartość spod wskaźnika
-                self.emit("RLOAD a")
-            else:
-                # Zwykła zmienna lokalna/globalna
-                self.emit(f"LOAD {symbol.address}")
+            self.load_symbol(self.symbols.get(node.name))
 
         elif isinstance(node, Number):
             self.gen_number(node.value)
@@ -74,33 +286,42 @@ class CodeGenerator:
             self.generate(node)
 
         if reg != 'a':
-            self.emit(f"SWP {reg}")
+            self.emit("SWP", reg)
 
-    def gen_array_addr(self, name, index_node):
-        symbol = self.symbols.get(name)
-        if isinstance(index_node, Number):
-            self.gen_number(index_node.value)
-            self.emit("SWP b")
-        elif isinstance(index_node, Variable):
-            # Tu używamy load_value_to_reg, żeby obsłużyć ewentualny indeks będący parametrem
-            self.load_value_to_reg(index_node, 'a')
-            self.emit("SWP b")
-        else:
-            self.generate(index_node)
-            self.emit("SWP b")
+    def direct_address(self, node):
+        # Adres elementu znany w czasie kompilacji (stały indeks, tablica nie-parametr)
+        symbol = self.symbols.get(node.name)
+        if isinstance(node.index, Number) and not symbol.is_param:
+            return symbol.offset + node.index.value
+        return None
 
-        if symbol.is_param and symbol.is_array:
-            self.emit(f"LOAD {symbol.address}")
-            self.emit("ADD b")
-            self.emit("SWP b")
+    def gen_array_addr(self, name, index_node, reg='b'):
+        # reg = adres elementu name[index_node] = przesunięcie bazy + indeks.
+        # Niszczy r_a i r_b, nie dotyka r_c.
+        symbol = self.symbols.get(name)
+        index_reg = self.register_of(index_node)
+        if symbol.is_param:
+            # Parametr trzyma przesunięcie bazy (address - array_start) tablicy wywołującego
+            if index_reg:
+                self.load_pointer(symbol)
+            else:
+                self.load_value_to_reg(index_node, 'b')
+                self.load_pointer(symbol)
+                index_reg = 'b'
+            self.emit("ADD", index_reg)
+        elif isinstance(index_node, Number):
+            self.gen_number(symbol.offset + index_node.value)
+        elif index_reg:
+            self.gen_number(symbol.offset)
+            self.emit("ADD", index_reg)
         else:
-            self.gen_number(symbol.array_start)
-            self.emit("SWP b")
-            self.emit("SUB b")
-            self.emit("SWP b")
-            self.gen_number(symbol.address)
-            self.emit("ADD b")
-            self.emit("SWP b")
+            self.load_value_to_reg(index_node, 'a')
+            if symbol.offset:
+                self.emit("SWP", "b")
+                self.gen_number(symbol.offset)
+                self.emit("ADD", "b")
+        if reg != 'a':
+            self.emit("SWP", reg)
 
     def generate(self, node):
         method_name = f'visit_{type(node).__name__}'
@@ -109,51 +330,175 @@ class CodeGenerator:
     def generic_visit(self, node):
         raise Exception(f"Nieznany węzeł AST: {type(node).__name__}")
 
-    def visit_Program(self, node):
-        main_label = self.new_label()
-        self.emit(f"JUMP {main_label}")
-        for proc in node.procedures:
-            self.visit_Procedure(proc)
-        self.mark_label(main_label)
-        self.visit_Main(node.main)
-        self.emit("HALT")
-        self.resolve_labels()
-
-    def visit_Main(self, node):
-        self.symbols.enter_scope()
-        for decl in node.declarations:
+    def declare(self, declarations):
+        for decl in declarations:
             if isinstance(decl, str):
                 self.symbols.declare_variable(decl)
             elif isinstance(decl, ArrayDecl):
                 self.symbols.declare_array(decl.name, decl.start, decl.end)
+
+    def visit_Program(self, node):
+        # Zmienne Main dostają adresy przed procedurami: specjalizowane kopie
+        # procedur (specializer.py) odwołują się do nich bezpośrednio
+        self.symbols.enter_scope()
+        self.declare(node.main.declarations)
+        self.main_scope = self.symbols.scopes.pop()
+        self.frames_base = self.symbols.memory_offset
+
+        # Każdy zakres to osobna jednostka kodu; linker.py składa je w program
+        units = self.generate_procedures(node.procedures)
+        for unit in units:
+            self.record(unit)
+        context = (self.main_scope, self.frames_base, [unit.interface() for unit in units])
+        key = self.cache and self.cache.key(type(self), node.main, context)
+        main = key and self.cache.load(key)
+        if not main:
+            main = self.generate_unit(node.main)
+            if key:
+                self.cache.store(key, main)
+        units.append(main)
+        self.code = link(units)
+
+    def generate_unit(self, node):
+        """Kod procedury albo Main jako jednostka do konsolidacji: po optymalizacji
+        przez okienko, z etykietami lokalnymi i CALL wskazującym nazwę procedury."""
+        self.code = []
+        self.k = 0
+        self.labels_map = {}
+        self.known = {}
+        self.division = None
+        self.generate(node)
+        code, labels = PeepholeOptimizer().optimize(self.code, self.labels_map)
+        if isinstance(node, Main):
+            return CodeUnit(MAIN_UNIT, code, labels)
+        return CodeUnit(node.name, code, labels, self.procedures_args[node.name],
+                        self.procedures_clobbers[node.name], self.frame_ends[node.name])
+
+    def record(self, unit):
+        # Fakty o wygenerowanej procedurze potrzebne jej wywołującym
+        self.procedures_args[unit.name] = unit.args
+        self.procedures_clobbers[unit.name] = unit.clobbers
+        self.frame_ends[unit.name] = unit.frame_end
+
+    def generate_procedures(self, procedures):
+        """Kod procedury zależy tylko od faktów o procedurach, które woła (a woła
+        tylko wcześniejsze), więc procedury powstają falami: w każdej fali te,
+        których wołane są już gotowe. Przy workers > 1 fala z kilkoma
+        procedurami idzie na pulę procesów. Zwraca jednostki w kolejności programu."""
+        earlier = {}
+        seen = set()
+        for proc in procedures:
+            earlier[proc.name] = {call.name for call in calls_in(proc.commands)} & seen
+            seen.add(proc.name)
+
+        units = {}
+        pending = list(procedures)
+        pool = None
+        try:
+            while pending:
+                wave = [proc for proc in pending if earlier[proc.name] <= set(units)]
+                pending = [proc for proc in pending if proc not in wave]
+                tasks, keys = [], []
+                for proc in wave:
+                    callees = [units[name].interface() for name in sorted(earlier[proc.name])]
+                    key = self.cache and self.cache.key(
+                        type(self), proc, self.procedure_context(proc, callees))
+                    unit = key and self.cache.load(key)
+                    if unit:
+                        units[proc.name] = unit
+                        continue
+                    tasks.append((type(self), self.main_scope, self.frames_base, callees, proc))
+                    keys.append(key)
+
+                if self.workers > 1 and len(tasks) > 1:
+                    if pool is None:
+                        pool = ProcessPoolExecutor(max_workers=self.workers)
+                    futures = [pool.submit(generate_procedure, *task) for task in tasks]
+                    results = [future.result() for future in futures]
+                else:
+                    results = [generate_procedure(*task) for task in tasks]
+                for unit, key in zip(results, keys):
+                    units[unit.name] = unit
+                    if key:
+                        self.cache.store(key, unit)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        return [units[proc.name] for proc in procedures]
+
+    def procedure_context(self, node, callees):
+        # Fakty o układzie pamięci, od których zależy kod procedury (klucz pamięci
+        # jednostek): interfejsy wołanych, początek ramek, zmienne Main z wiązań
+        bound = {value.name: self.main_scope[value.name] for value in node.bindings.values()
+                 if isinstance(value, Variable) and value.name in self.main_scope}
+        return (bound, self.frames_base, callees)
+
+    def visit_Main(self, node):
+        # Main jest aktywny przez cały czas - jego komórki leżą nad wszystkimi ramkami
+        self.symbols.memory_offset = max(self.frame_ends.values(), default=self.frames_base)
+        self.symbols.enter_scope(self.main_scope)
+        self.assign_registers(node.commands)
         for cmd in node.commands:
             self.generate(cmd)
         self.symbols.exit_scope()
+        self.emit("HALT")
 
     def visit_Procedure(self, node):
-        start_label = self.new_label()
-        self.procedures_map[node.name] = start_label
-        self.mark_label(start_label)
+        # Bez rekursji aktywne są naraz tylko procedury z jednego łańcucha wywołań.
+        # Ramka leży nad ramkami wołanych procedur, więc procedury, które nie mogą
+        # być aktywne jednocześnie, dzielą komórki pamięci
+        self.symbols.memory_offset = max(
+            (self.frame_ends[call.name] for call in calls_in(node.commands)
+             if call.name in self.frame_ends), default=self.frames_base)
         self.symbols.enter_scope()
 
         args_symbols = []
         for arg_type, arg_name in node.args:
+            bound = node.bindings.get(arg_name)
+            if isinstance(bound, Variable):
+                # Parametr związany ze zmienną Main - dostęp bezpośredni, bez wskaźnika
+                self.symbols.declare_alias(arg_name, self.main_scope[bound.name])
+                args_symbols.append(None)
+                continue
+            if isinstance(bound, Number):
+                # Stała została wstawiona w ciało procedury - nic nie przekazujemy
+                args_symbols.append(None)
+                continue
             is_array = (arg_type == 'T')
             # Parametry skalarne (I, O) też są teraz "adresami" (referencjami)
             sym = self.symbols.declare_param(arg_name, is_array=is_array)
             args_symbols.append(sym)
         self.procedures_args[node.name] = args_symbols
 
-        for decl in node.declarations:
-            if isinstance(decl, str):
-                self.symbols.declare_variable(decl)
-            elif isinstance(decl, ArrayDecl):
-                self.symbols.declare_array(decl.name, decl.start, decl.end)
+        self.declare(node.declarations)
+
+        self.procedures_clobbers[node.name] = self.assign_registers(
+            node.commands, procedure=True)
+
+        # CALL zostawia adres powrotu w r_a - trzeba go zachować
+        ret_register = self.homes.get(RETURN_ADDRESS)
+        if ret_register:
+            self.emit("SWP", ret_register)
+        else:
+            ret_addr = self.symbols.memory_offset
+            self.symbols.memory_offset += 1
+            self.emit("STORE", ret_addr)
+        for sym in filter(None, args_symbols):
+            if sym.register:
+                self.emit("LOAD", sym.address)
+                self.emit("SWP", sym.register)
 
         for cmd in node.commands:
             self.generate(cmd)
         self.symbols.exit_scope()
+
+        if ret_register:
+            self.emit("RST", "a")
+            self.emit("ADD", ret_register)
+        else:
+            self.emit("LOAD", ret_addr)
         self.emit("RTRN")
+        self.frame_ends[node.name] = self.symbols.memory_offset
 
     # --- POPRAWKA: Przekazywanie adresów zamiast wartości ---
     def visit_ProcCall(self, node):
@@ -162,123 +507,206 @@ class CodeGenerator:
         param_symbols = self.procedures_args[node.name]
 
         for param_sym, arg_val in zip(param_symbols, node.args):
+            if param_sym is None:
+                continue                    # Parametr związany na stałe
             # Jeśli parametr jest tablicą:
             if param_sym.is_array:
                 orig_sym = self.symbols.get(arg_val.name)
-                self.gen_number(orig_sym.address)
-                self.emit("SWP b")
-                self.gen_number(orig_sym.array_start)
-                self.emit("SWP b")
-                self.emit("SUB b")
-                self.emit(f"STORE {param_sym.address}")
+                if orig_sym.is_param:
+                    # Przekazujemy dalej otrzymany wskaźnik
+                    self.load_pointer(orig_sym)
+                else:
+                    # declare_array gwarantuje address >= array_start
+                    self.gen_number(orig_sym.offset)
+                self.emit("STORE", param_sym.address)
 
             # Jeśli parametr jest zmienną skalarną (I/O):
             else:
                 if isinstance(arg_val, Variable):
                     # Przekazujemy ADRES zmiennej, a nie jej wartość
                     orig_sym = self.symbols.get(arg_val.name)
-                    self.gen_number(orig_sym.address)
-                    self.emit(f"STORE {param_sym.address}")
+                    if orig_sym.is_param:
+                        self.load_pointer(orig_sym)
+                    else:
+                        self.gen_number(orig_sym.address)
+                    self.emit("STORE", param_sym.address)
                 elif isinstance(arg_val, Number):
-                    # Dla stałej musimy utworzyć tymczasową zmienną w pamięci i przekazać jej adres
+                    # Dla stałej musimy utworzyć zmienną w pamięci i przekazać jej adres.
+                    # To nie jest temp - procedura może ją czytać i nadpisywać
                     val_addr = self.symbols.memory_offset
                     self.symbols.memory_offset += 1
                     self.gen_number(arg_val.value)
                     # Zapisz wartość pod tymczasowym adresem
-                    self.emit(f"STORE {val_addr}")
+                    self.emit("STORE", val_addr)
 
                     self.gen_number(val_addr)      # Załaduj ten adres
                     # Przekaż adres do parametru
-                    self.emit(f"STORE {param_sym.address}")
+                    self.emit("STORE", param_sym.address)
                 else:
                     raise Exception(
                         "Argument wywołania musi być zmienną lub liczbą")
 
-        target_label = self.procedures_map[node.name]
-        self.emit(f"CALL {target_label}")
+        # Adres procedury wstawi linker.py
+        self.emit("CALL", node.name)
 
-    def visit_For(self, node):
+    def iterator_symbol(self, name):
         try:
-            iter_symbol = self.symbols.get(node.iterator)
+            return self.symbols.get(name)
         except:
-            iter_symbol = self.symbols.declare_variable(node.iterator)
+            iter_symbol = self.symbols.declare_variable(name)
             iter_symbol.is_iterator = True
-        iter_addr = iter_symbol.address
+            iter_symbol.register = self.homes.get(name)
+            return iter_symbol
 
-        self.generate(node.start_expr)
-        self.emit(f"STORE {iter_addr}")
-        self.generate(node.end_expr)
+    def visit_For(self, node):
+        counter = self.homes.get(trip_counter(node.iterator))
+        counter_addr = None if counter else self.symbols.allocate_temp()
+        # Iterator nieużywany w ciele nie jest w ogóle utrzymywany
+        used = node.iterator in names_in(node.commands)
+        iter_symbol = self.iterator_symbol(node.iterator) if used else None
 
-        # Alokacja limitu
-        limit_addr = self.symbols.memory_offset
-        self.symbols.memory_offset += 1
-        self.emit(f"STORE {limit_addr}")
+        # Liczba obrotów liczona raz: ostatni + 1 - pierwszy. Odejmowanie nasyca
+        # się na zerze, więc pusta pętla ma 0 obrotów (także DOWNTO do 0)
+        first, last = node.start_expr, node.end_expr
+        if node.downto:
+            first, last = last, first
+        start_reg = None
+        if isinstance(first, Number) and isinstance(last, Number):
+            self.gen_number(max(last.value + 1 - first.value, 0))
+        else:
+            first_reg = self.register_of(first)
+            if first_reg is None:
+                self.generate(first)
+                self.emit("SWP", "c")
+                first_reg = 'c'
+            self.generate(last)
+            if node.downto and used:
+                # Początek (last) jest potrzebny jeszcze dla iteratora
+                last_reg = self.register_of(last)
+                if last_reg is None:
+                    self.emit("SWP", "b")
+                    last_reg = 'b'
+                    self.emit("RST", "a")
+                    self.emit("ADD", "b")
+                start_reg = last_reg
+            else:
+                start_reg = first_reg
+            self.emit("INC", "a")
+            self.emit("SUB", first_reg)
+
+        if counter:
+            self.emit("SWP", counter)
+        else:
+            self.emit("STORE", counter_addr)
+
+        if used:
+            if start_reg:
+                self.emit("RST", "a")
+                self.emit("ADD", start_reg)
+            else:
+                self.generate(node.start_expr)
+            self.store_symbol(iter_symbol)
+        self.init_pointers(node)
 
         start_label = self.new_label()
         end_label = self.new_label()
         self.mark_label(start_label)
 
-        self.emit(f"LOAD {iter_addr}")
-        self.emit("SWP c")
-        self.emit(f"LOAD {limit_addr}")
-        self.emit("SWP b")
-        self.emit("SWP c")
-
-        if node.downto:
-            self.emit("SWP b")
-            self.emit("SUB b")
-            self.emit(f"JPOS {end_label}")
+        if counter:
+            self.emit("RST", "a")
+            self.emit("ADD", counter)
+            self.emit("JZERO", end_label)
+            self.emit("DEC", counter)
         else:
-            self.emit("SUB b")
-            self.emit(f"JPOS {end_label}")
+            self.emit("LOAD", counter_addr)
+            self.emit("JZERO", end_label)
+            self.emit("DEC", "a")
+            self.emit("STORE", counter_addr)
 
         for cmd in node.commands:
             self.generate(cmd)
 
-        self.emit(f"LOAD {iter_addr}")
-        if node.downto:
-            self.emit("DEC a")
-        else:
-            self.emit("INC a")
-        self.emit(f"STORE {iter_addr}")
-        self.emit(f"JUMP {start_label}")
+        if used:
+            step = "DEC" if node.downto else "INC"
+            if iter_symbol.register:
+                self.emit(step, iter_symbol.register)
+            else:
+                self.emit("LOAD", iter_symbol.address)
+                self.emit(step, "a")
+                self.emit("STORE", iter_symbol.address)
+            for name, (_, var) in node.pointers.items():
+                if var == node.iterator and name in self.homes:
+                    self.emit(step, self.homes[name])
+        self.emit("JUMP", start_label)
         self.mark_label(end_label)
-        # Nie zwalniamy pamięci (fix kolizji)
+        if counter_addr is not None:
+            self.symbols.free_temp(counter_addr)
 
     # --- POPRAWKA: Zapis do zmiennej (obsługa zapisu przez wskaźnik) ---
     def visit_Assign(self, node):
         # 1. Oblicz wartość wyrażenia -> r_a
         self.generate(node.expression)
+        self.store_symbol(self.symbols.get(node.identifier))
+        if node.bumps:
+            self.bump_pointers(node.bumps, step_of(node))
 
-        symbol = self.symbols.get(node.identifier)
-        if symbol.is_param:
-            # Zapisz wartość w temp, załaduj adres, zapisz pośrednio
-            temp = self.symbols.memory_offset
-            self.symbols.memory_offset += 1
-            self.emit(f"STORE {temp}")       # Zapisz wynik
+    # --- Wskaźniki elementów tablic (induction.py) ---
 
-            self.emit(f"LOAD {symbol.address}")  # r_a = Wskaźnik
-            self.emit("SWP b")               # r_b = Wskaźnik
+    def pointer_register(self, node):
+        # Rejestr wskaźnika elementu; None, gdy wskaźnik nie dostał rejestru
+        return self.homes.get(node.pointer) if node.pointer else None
 
-            self.emit(f"LOAD {temp}")        # r_a = Wynik
-            self.emit("RSTORE b")            # *Wskaźnik = Wynik
-        else:
-            # Zwykły zapis
-            self.emit(f"STORE {symbol.address}")
-            symbol.is_initialized = True
+    def init_pointers(self, loop):
+        # Przed pętlą: wskaźnik = adres elementu tablica[zmienna indukcyjna]
+        for name, (array, var) in loop.pointers.items():
+            register = self.homes.get(name)
+            if register:
+                self.gen_array_addr(array, Variable(var), 'a')
+                self.emit("SWP", register)
+
+    def bump_pointers(self, names, step):
+        # Po v := v + step wskaźniki elementów tab[v] przesuwają się o step
+        registers = [self.homes[name] for name in names if name in self.homes]
+        for register in registers:
+            if isinstance(step, Number) and step.value <= 8:
+                for _ in range(step.value):
+                    self.emit("INC", register)
+                continue
+            step_reg = self.register_of(step)
+            if step_reg:
+                self.emit("RST", "a")
+                self.emit("ADD", step_reg)
+            else:
+                self.generate(step)
+            self.emit("ADD", register)
+            self.emit("SWP", register)
 
     def visit_ArrayAssign(self, node):
         self.generate(node.expression)
-        temp_addr = self.symbols.memory_offset
-        self.symbols.memory_offset += 1
-        self.emit(f"STORE {temp_addr}")
+        pointer = self.pointer_register(node)
+        if pointer:
+            self.emit("RSTORE", pointer)
+            return
+        address = self.direct_address(node)
+        if address is not None:
+            self.emit("STORE", address)
+            return
+        self.emit("SWP", "c")               # Wartość czeka w r_c na wyliczenie adresu
         self.gen_array_addr(node.name, node.index)
-        self.emit(f"LOAD {temp_addr}")
-        self.emit("RSTORE b")
+        self.emit("SWP", "c")
+        self.emit("RSTORE", "b")
 
     def visit_ArrayRef(self, node):
-        self.gen_array_addr(node.name, node.index)
-        self.emit("RLOAD b")
+        pointer = self.pointer_register(node)
+        if pointer:
+            self.emit("RLOAD", pointer)
+            return
+        address = self.direct_address(node)
+        if address is not None:
+            self.emit("LOAD", address)
+            return
+        self.gen_array_addr(node.name, node.index, 'a')
+        self.emit("RLOAD", "a")
 
     def visit_Write(self, node):
         self.load_value_to_reg(node.value, 'a')
@@ -289,39 +717,23 @@ class CodeGenerator:
         self.emit("READ")
         symbol = self.symbols.get(node.identifier)
 
-        if symbol.is_param:
-            # READ wczytuje do r_a (kosztowne) lub nie?
-            # Instrukcja READ: "Wczytuje wartość do rejestru p_0 (akumulatora)?"
-            # Nie, specyfikacja maszyny mówi: "READ - wczytaj wartość do rejestru a (lub akumulatora)"?
-            # Załóżmy standardowo że READ zostawia wartość w r_a (chociaż w VM kosztuje dużo)
-            # Jeśli READ od razu zapisuje do pamięci... W VM 'READ' czyta do r_a (akumulatora).
-            # Chwila, w Twoim poprzednim kodzie: self.emit("READ"); self.emit("STORE addr").
-            # To sugeruje, że READ zostawia wartość w r_a.
-
-            temp = self.symbols.memory_offset
-            self.symbols.memory_offset += 1
-            self.emit(f"STORE {temp}")          # Zapisz wczytaną wartość
-
-            self.emit(f"LOAD {symbol.address}")  # Załaduj wskaźnik
-            self.emit("SWP b")
-
-            self.emit(f"LOAD {temp}")           # Przywróć wartość
-            self.emit("RSTORE b")               # Zapisz pod wskaźnik
-        else:
-            self.emit(f"STORE {symbol.address}")
-            symbol.is_initialized = True
+        # READ zostawia wczytaną wartość w r_a
+        self.store_symbol(symbol)
 
     def visit_While(self, node):
-        start_label = self.new_label()
-        end_label = self.new_label()
-        self.mark_label(start_label)
-        self.gen_condition_jump(node.condition, end_label, jump_if_true=False)
+        # Pętla obrócona: test na dole, skok powrotny tylko gdy warunek zachodzi
+        body_label = self.new_label()
+        test_label = self.new_label()
+        self.init_pointers(node)
+        self.emit("JUMP", test_label)
+        self.mark_label(body_label)
         for cmd in node.commands:
             self.generate(cmd)
-        self.emit(f"JUMP {start_label}")
-        self.mark_label(end_label)
+        self.mark_label(test_label)
+        self.gen_condition_jump(node.condition, body_label, jump_if_true=True)
 
     def visit_Repeat(self, node):
+        self.init_pointers(node)
         start_label = self.new_label()
         self.mark_label(start_label)
         for cmd in node.commands:
@@ -330,244 +742,364 @@ class CodeGenerator:
             node.condition, start_label, jump_if_true=False)
 
     def visit_If(self, node):
-        else_label = self.new_label()
         end_label = self.new_label()
+        if not node.commands_then:
+            self.gen_condition_jump(node.condition, end_label, jump_if_true=True)
+            for cmd in node.commands_else or []:
+                self.generate(cmd)
+            self.mark_label(end_label)
+            return
+
+        else_label = self.new_label() if node.commands_else else end_label
         self.gen_condition_jump(node.condition, else_label, jump_if_true=False)
         for cmd in node.commands_then:
             self.generate(cmd)
-        self.emit(f"JUMP {end_label}")
-        self.mark_label(else_label)
         if node.commands_else:
+            self.emit("JUMP", end_label)
+            self.mark_label(else_label)
             for cmd in node.commands_else:
                 self.generate(cmd)
         self.mark_label(end_label)
 
+    def operand_register(self, node, scratch):
+        # Rejestr z wartością węzła: dom zmiennej albo scratch (wyliczenie
+        # wartości/tablicy nie dotyka r_c, a r_b zapełniamy jako ostatni)
+        register = self.register_of(node)
+        if register is None:
+            self.generate(node)
+            self.emit("SWP", scratch)
+            register = scratch
+        return register
+
     def gen_condition_jump(self, condition, target_label, jump_if_true=False):
-        self.load_value_to_reg(condition.right, 'a')
-        is_simple = isinstance(condition.left, (Number, Variable))
-        if is_simple:
-            self.emit("SWP b")
-            self.load_value_to_reg(condition.left, 'a')
-        else:
-            temp = self.symbols.memory_offset
-            self.symbols.memory_offset += 1
-            self.emit(f"STORE {temp}")
-            self.generate(condition.left)
-            self.emit("SWP c")
-            self.emit(f"LOAD {temp}")
-            self.emit("SWP b")
-            self.emit("SWP c")
-            # Nie zwalniamy pamięci
-
-        op = condition.op
-        def sub_ab(): self.emit("SUB b")
-        def sub_ba(): self.emit("SWP b"); self.emit("SUB b")
-
-        if op == '>':
-            sub_ab()
-            self.emit(
-                f"JPOS {target_label}" if jump_if_true else f"JZERO {target_label}")
-        elif op == '<':
-            sub_ba()
-            self.emit(
-                f"JPOS {target_label}" if jump_if_true else f"JZERO {target_label}")
-        elif op == '>=':
-            sub_ba()
-            self.emit(
-                f"JZERO {target_label}" if jump_if_true else f"JPOS {target_label}")
-        elif op == '<=':
-            sub_ab()
-            self.emit(
-                f"JZERO {target_label}" if jump_if_true else f"JPOS {target_label}")
-        elif op == '=':
-            if jump_if_true:
-                fail = self.new_label()
-                sub_ab()
-                self.emit(f"JPOS {fail}")
-                sub_ba()
-                self.emit(f"JPOS {fail}")
-                self.emit(f"JUMP {target_label}")
-                self.mark_label(fail)
+        op, left, right = condition.op, condition.left, condition.right
+        # x < y to y > x, x >= y to y <= x - zostają '>', '<=', '=', '!='
+        if op in ('<', '>='):
+            op, left, right = {'<': '>', '>=': '<='}[op], right, left
+
+        def is_zero(node):
+            return isinstance(node, Number) and node.value == 0
+
+        def jump(when_positive):
+            # r_a > 0 <=> warunek ma wartość when_positive
+            if when_positive == jump_if_true:
+                self.emit("JPOS", target_label)
             else:
-                sub_ab()
-                self.emit(f"JPOS {target_label}")
-                sub_ba()
-                self.emit(f"JPOS {target_label}")
-        elif op == '!=':
-            if jump_if_true:
-                sub_ab()
-                self.emit(f"JPOS {target_label}")
-                sub_ba()
-                self.emit(f"JPOS {target_label}")
+                self.emit("JZERO", target_label)
+
+        if op in ('>', '<='):
+            if is_zero(left):
+                # 0 > y nigdy, 0 <= y zawsze
+                if (op == '<=') == jump_if_true:
+                    self.emit("JUMP", target_label)
+                return
+            # x > y <=> x - y > 0 (odejmowanie nasyca się na zerze)
+            if is_zero(right):
+                self.generate(left)
             else:
-                fail = self.new_label()
-                sub_ab()
-                self.emit(f"JPOS {fail}")
-                sub_ba()
-                self.emit(f"JPOS {fail}")
-                self.emit(f"JUMP {target_label}")
-                self.mark_label(fail)
+                right_reg = self.operand_register(right, 'c')
+                self.generate(left)
+                self.emit("SUB", right_reg)
+            jump(op == '>')
+            return
+
+        if is_zero(left):
+            left, right = right, left
+        if is_zero(right):
+            # Porównanie z zerem to jeden skok
+            self.generate(left)
+            jump(op == '!=')
+            return
+
+        # x != y <=> x - y > 0 lub y - x > 0
+        right_reg = self.operand_register(right, 'c')
+        left_reg = self.operand_register(left, 'b')
+
+        def diff(x, y):
+            # r_a = max(x - y, 0)
+            self.emit("RST", "a")
+            self.emit("ADD", x)
+            self.emit("SUB", y)
+
+        if jump_if_true == (op == '!='):
+            diff(left_reg, right_reg)
+            self.emit("JPOS", target_label)
+            diff(right_reg, left_reg)
+            self.emit("JPOS", target_label)
+        else:
+            fail = self.new_label()
+            diff(left_reg, right_reg)
+            self.emit("JPOS", fail)
+            diff(right_reg, left_reg)
+            self.emit("JPOS", fail)
+            self.emit("JUMP", target_label)
+            self.mark_label(fail)
 
     def visit_BinOp(self, node):
-        if node.op == '*' and isinstance(node.right, Number) and node.right.value == 2:
-            self.generate(node.left)
-            self.emit("SHL a")
+        if node.op in ('*', '/', '%') and self.gen_constant_operand(node):
             return
-        if node.op == '*' and isinstance(node.left, Number) and node.left.value == 2:
+
+        if node.op in ('+', '-'):
+            instr = "ADD" if node.op == '+' else "SUB"
+            left, right = node.left, node.right
+            if node.op == '+' and self.register_of(left) and not self.register_of(right):
+                left, right = right, left
+            rhs_reg = self.register_of(right)
+            if not rhs_reg:
+                # Wyliczenie lewej strony (wartość/tablica) nie dotyka r_c
+                self.generate(right)
+                self.emit("SWP", "c")
+                rhs_reg = 'c'
+            self.generate(left)
+            self.emit(instr, rhs_reg)
+            return
+
+        if node.op == '*':
             self.generate(node.right)
-            self.emit("SHL a")
+            self.emit("SWP", "c")
+            self.generate(node.left)     # Wartość/tablica nie dotyka r_c
+            self.emit("SWP", "b")
+            self.gen_mul()
             return
-        if node.op == '/' and isinstance(node.right, Number) and node.right.value == 2:
-            self.generate(node.left)
-            self.emit("SHR a")
+
+        if node.op in ('/', '%'):
+            operands = self.division_operands(node)
+            if operands is None or self.division != operands:
+                self.generate(node.right)
+                self.emit("SWP", "c")
+                self.generate(node.left)
+                self.emit("SWP", "b")
+                nonzero = isinstance(node.right, Number) and node.right.value > 0
+                self.gen_div_mod(nonzero=nonzero)
+                self.division = operands
+            # Iloraz i reszta zostają w r_c i r_b - drugi wynik nic nie kosztuje
+            self.emit("RST", "a")
+            self.emit("ADD", "b" if node.op == '%' else "c")
             return
-        if node.op == '%' and isinstance(node.right, Number) and node.right.value == 2:
-            self.generate(node.left)
-            self.emit("SWP b")
-            self.emit("SWP b")
-            self.emit("SHR a")
-            self.emit("SHL a")
-            self.emit("SWP b")
-            self.emit("SUB b")
+
+        raise Exception(f"Nieznany operator: {node.op}")
+
+    # --- Redukcja mocy dla stałych operandów ---
+
+    def gen_constant_operand(self, node):
+        # Mnożenie/dzielenie przez stałą bez ogólnych pętli; False, gdy się nie opłaca
+        left, right = node.left, node.right
+        if node.op == '*' and isinstance(left, Number) and not isinstance(right, Number):
+            left, right = right, left
+        if not isinstance(right, Number):
+            return False
+        constant = right.value
+        power = constant.bit_length() - 1 if constant & (constant - 1) == 0 else None
+
+        if constant == 0:
+            # x * 0 = x / 0 = x % 0 = 0
+            self.emit("RST", "a")
+            return True
+        if node.op == '*':
+            return self.gen_mul_constant(left, constant)
+        if power is not None:
+            self.generate(left)
+            if node.op == '/':
+                for _ in range(power):
+                    self.emit("SHR", "a")
+            else:
+                self.gen_mask(power)
+            return True
+        operands = self.division_operands(node)
+        cached = operands is not None and operands == self.division
+        if node.op == '/' and constant % 2 == 0 and not cached:
+            # x / (2^k * m) = (x >> k) / m - mniej obrotów pętli dzielenia
+            shift = (constant & -constant).bit_length() - 1
+            self.gen_number(constant >> shift)
+            self.emit("SWP", "c")
+            self.generate(left)
+            for _ in range(shift):
+                self.emit("SHR", "a")
+            self.emit("SWP", "b")
+            self.gen_div_mod(nonzero=True)
+            self.emit("RST", "a")
+            self.emit("ADD", "c")
+            return True
+        return False
+
+    def gen_mul_constant(self, operand, constant):
+        if constant == 1:
+            self.generate(operand)
+            return True
+        digits, chain_cost = multiplier_digits(constant)
+        # Pętla gen_mul: ~25 na przygotowanie i ~30 na każdy bit mniejszego czynnika
+        if chain_cost > 25 + 30 * constant.bit_length():
+            return False
+
+        register = self.register_of(operand)
+        if all(d == 0 for d in digits[1:]):
+            # Potęga dwójki - same przesunięcia
+            self.generate(operand)
+        elif register:
+            self.emit("RST", "a")
+            self.emit("ADD", register)
+        else:
+            self.generate(operand)
+            register = 'c'
+            self.emit("SWP", "c")
+            self.emit("RST", "a")
+            self.emit("ADD", "c")
+        for digit in digits[1:]:
+            self.emit("SHL", "a")
+            if digit == 1:
+                self.emit("ADD", register)
+            elif digit == -1:
+                self.emit("SUB", register)
+        return True
+
+    def gen_mask(self, power):
+        # r_a = r_a % 2^power = r_a - ((r_a >> power) << power)
+        if power == 0:
+            self.emit("RST", "a")
             return
+        self.emit("SWP", "b")
+        self.emit("RST", "a")
+        self.emit("ADD", "b")
+        for _ in range(power):
+            self.emit("SHR", "a")
+        for _ in range(power):
+            self.emit("SHL", "a")
+        self.emit("SWP", "b")
+        self.emit("SUB", "b")
 
-        self.generate(node.right)
-        rhs_addr = self.symbols.memory_offset
-        self.symbols.memory_offset += 1
-        self.emit(f"STORE {rhs_addr}")
-        self.generate(node.left)
-        if node.op == '+':
-            self.emit(f"ADD {rhs_addr}")
-        elif node.op == '-':
-            self.emit(f"SUB {rhs_addr}")
-        elif node.op in ['*', '/', '%']:
-            lhs_addr = self.symbols.memory_offset
-            self.symbols.memory_offset += 1
-            self.emit(f"STORE {lhs_addr}")
-            if node.op == '*':
-                self.gen_mul_optimized(lhs_addr, rhs_addr)
-            elif node.op == '/':
-                self.gen_div_mod(lhs_addr, rhs_addr, False)
-            elif node.op == '%':
-                self.gen_div_mod(lhs_addr, rhs_addr, True)
+    def division_operands(self, node):
+        # Klucz operandów, których wartość da się śledzić (stałe i zmienne lokalne)
+        # wraz z miejscami, których zapis unieważnia wynik; None gdy się nie da
+        key, addresses, registers = [], set(), {'b', 'c'}
+        for operand in (node.left, node.right):
+            if isinstance(operand, Number):
+                key.append(operand.value)
+            elif isinstance(operand, Variable):
+                symbol = self.symbols.get(operand.name)
+                if symbol.is_param or symbol.is_array or symbol.is_alias:
+                    return None
+                key.append(operand.name)
+                addresses.add(symbol.address)
+                if symbol.register:
+                    registers.add(symbol.register)
+            else:
+                return None
+        return (tuple(key), frozenset(addresses), frozenset(registers))
+
+    def breaks_division(self, op, reg):
+        # Czy instrukcja niszczy wyniki dzielenia albo zmienia jego operandy
+        _, addresses, registers = self.division
+        if op in ('RST', 'INC', 'DEC', 'SHL', 'SHR', 'SWP'):
+            return reg in registers
+        if op == 'STORE':
+            return reg in addresses
+        return op == 'CALL'
 
     def visit_Number(self, node): self.gen_number(node.value)
 
     def visit_Variable(self, node): self.load_value_to_reg(
         node, 'a')  # Używamy load_value_to_reg!
 
-    def gen_mul_optimized(self, val_a_addr, val_b_addr):
-        res_addr = self.symbols.memory_offset
-        self.symbols.memory_offset += 1
-        self.emit("RST a")
-        self.emit(f"STORE {res_addr}")
-        self.emit(f"LOAD {val_a_addr}")
-        self.emit("SWP c")
-        self.emit(f"LOAD {val_b_addr}")
-        self.emit("SWP b")
+    def gen_mul(self):
+        # r_a = r_b * r_c bez pamięci: wynik w r_d, pętla po bitach mnożnika r_b.
+        # Czynniki są najpierw zamieniane tak, by r_b był mniejszy - pętla
+        # wykonuje się tyle razy, ile bitów ma mniejszy z nich. Niszczy r_b-r_d.
+        ordered = self.new_label()
         loop_start = self.new_label()
         loop_end = self.new_label()
-        self.mark_label(loop_start)
-        self.emit("RST a")
-        self.emit("ADD b")
-        self.emit(f"JZERO {loop_end}")
-        self.emit("RST a")
-        self.emit("ADD b")
-        self.emit("SHR a")
-        self.emit("SHL a")
-        self.emit("SWP d")
-        self.emit("RST a")
-        self.emit("ADD b")
-        self.emit("SUB d")
         skip = self.new_label()
-        self.emit(f"JZERO {skip}")
-        self.emit(f"LOAD {res_addr}")
-        self.emit("ADD c")
-        self.emit(f"STORE {res_addr}")
+        self.emit("RST", "a")
+        self.emit("ADD", "b")
+        self.emit("SUB", "c")
+        self.emit("JZERO", ordered)
+        self.emit("SWP", "b")            # r_b <-> r_c przez r_a
+        self.emit("SWP", "c")
+        self.emit("SWP", "b")
+        self.mark_label(ordered)
+        self.emit("RST", "d")
+        self.mark_label(loop_start)
+        self.emit("RST", "a")
+        self.emit("ADD", "b")
+        self.emit("JZERO", loop_end)
+        self.emit("SHR", "b")            # r_a = najmłodszy bit r_b, r_b = r_b bez niego
+        self.emit("SHL", "b")
+        self.emit("SUB", "b")
+        self.emit("JZERO", skip)
+        self.emit("SWP", "d")            # r_d += r_c
+        self.emit("ADD", "c")
+        self.emit("SWP", "d")
         self.mark_label(skip)
-        self.emit("RST a")
-        self.emit("ADD c")
-        self.emit("SHL a")
-        self.emit("SWP c")
-        self.emit("RST a")
-        self.emit("ADD b")
-        self.emit("SHR a")
-        self.emit("SWP b")
-        self.emit(f"JUMP {loop_start}")
+        self.emit("SHR", "b")
+        self.emit("SHL", "c")
+        self.emit("JUMP", loop_start)
         self.mark_label(loop_end)
-        self.emit(f"LOAD {res_addr}")
-
-    def gen_div_mod(self, addr_a, addr_b, want_mod=False):
-        end = self.new_label()
-        self.emit(f"LOAD {addr_b}")
-        self.emit(f"JZERO {end}")
-        rem = self.symbols.memory_offset
-        self.symbols.memory_offset += 1
-        quot = self.symbols.memory_offset
-        self.symbols.memory_offset += 1
-        div = self.symbols.memory_offset
-        self.symbols.memory_offset += 1
-        mult = self.symbols.memory_offset
-        self.symbols.memory_offset += 1
-        self.emit(f"LOAD {addr_a}")
-        self.emit(f"STORE {rem}")
-        self.emit("RST a")
-        self.emit(f"STORE {quot}")
-        self.emit(f"LOAD {addr_b}")
-        self.emit(f"STORE {div}")
-        self.emit("RST a")
-        self.emit("INC a")
-        self.emit(f"STORE {mult}")
-        l_scale = self.new_label()
-        l_scale_end = self.new_label()
-        self.mark_label(l_scale)
-        self.emit(f"LOAD {rem}")
-        self.emit("SWP b")
-        self.emit(f"LOAD {div}")
-        self.emit("SUB b")
-        self.emit(f"JPOS {l_scale_end}")
-        self.emit(f"LOAD {div}")
-        self.emit("SHL a")
-        self.emit(f"STORE {div}")
-        self.emit(f"LOAD {mult}")
-        self.emit("SHL a")
-        self.emit(f"STORE {mult}")
-        self.emit(f"JUMP {l_scale}")
-        self.mark_label(l_scale_end)
-        l_sub = self.new_label()
-        l_sub_end = self.new_label()
-        self.mark_label(l_sub)
-        self.emit(f"LOAD {mult}")
-        self.emit(f"JZERO {l_sub_end}")
-        self.emit(f"LOAD {rem}")
-        self.emit("SWP b")
-        self.emit(f"LOAD {div}")
-        self.emit("SUB b")
+        self.emit("SWP", "d")
+
+    def gen_div_mod(self, nonzero=False):
+        # Dzielenie pisemne w rejestrach: r_b = dzielna, r_c = dzielnik.
+        # Wynik: r_c = iloraz, r_b = reszta (x / 0 = x % 0 = 0). Dzielnik jest
+        # przesuwany w r_c, potęga dwójki w r_d, iloraz rośnie w div_register.
+        # nonzero: dzielnik jest stałą różną od zera - test zera zbędny.
+        quot = self.div_register
+        finish = self.new_label()
+        if not nonzero:
+            start = self.new_label()
+            self.emit("RST", "a")
+            self.emit("ADD", "c")
+            self.emit("JPOS", start)
+            self.emit("RST", "b")        # r_c = 0 już jest
+            self.emit("JUMP", finish)
+            self.mark_label(start)
+
+        if self.div_saved:
+            saved = self.symbols.allocate_temp()
+            self.emit("SWP", quot)
+            self.emit("STORE", saved)
+        self.emit("RST", quot)
+        self.emit("RST", "d")
+        self.emit("INC", "d")
+
+        # Skalowanie: dzielnik i potęga dwójki rosną, dopóki dzielnik <= reszta
+        scale = self.new_label()
+        scaled = self.new_label()
+        self.mark_label(scale)
+        self.emit("RST", "a")
+        self.emit("ADD", "c")
+        self.emit("SUB", "b")
+        self.emit("JPOS", scaled)
+        self.emit("SHL", "c")
+        self.emit("SHL", "d")
+        self.emit("JUMP", scale)
+        self.mark_label(scaled)
+
+        # Odejmowanie: od największej potęgi w dół
+        subtract = self.new_label()
         skip = self.new_label()
-        self.emit(f"JPOS {skip}")
-        self.emit(f"LOAD {rem}")
-        self.emit("SWP b")
-        self.emit(f"LOAD {div}")
-        self.emit("SWP c")
-        self.emit("SWP b")
-        self.emit("SUB c")
-        self.emit(f"STORE {rem}")
-        self.emit(f"LOAD {quot}")
-        self.emit("SWP b")
-        self.emit(f"LOAD {mult}")
-        self.emit("ADD b")
-        self.emit(f"STORE {quot}")
+        done = self.new_label()
+        self.mark_label(subtract)
+        self.emit("RST", "a")
+        self.emit("ADD", "d")
+        self.emit("JZERO", done)
+        self.emit("RST", "a")
+        self.emit("ADD", "c")
+        self.emit("SUB", "b")
+        self.emit("JPOS", skip)
+        self.emit("SWP", "b")            # reszta -= dzielnik
+        self.emit("SUB", "c")
+        self.emit("SWP", "b")
+        self.emit("SWP", quot)           # iloraz += potęga
+        self.emit("ADD", "d")
+        self.emit("SWP", quot)
         self.mark_label(skip)
-        self.emit(f"LOAD {div}")
-        self.emit("SHR a")
-        self.emit(f"STORE {div}")
-        self.emit(f"LOAD {mult}")
-        self.emit("SHR a")
-        self.emit(f"STORE {mult}")
-        self.emit(f"JUMP {l_sub}")
-        self.mark_label(l_sub_end)
-        if want_mod:
-            self.emit(f"LOAD {rem}")
-        else:
-            self.emit(f"LOAD {quot}")
-        self.mark_label(end)
+        self.emit("SHR", "c")
+        self.emit("SHR", "d")
+        self.emit("JUMP", subtract)
+        self.mark_label(done)
+
+        self.emit("SWP", quot)
+        self.emit("SWP", "c")
+        if self.div_saved:
+            self.emit("LOAD", saved)
+            self.emit("SWP", quot)
+            self.symbols.free_temp(saved)
+        self.mark_label(finish)
@@ -0,0 +1,223 @@
+from ast_nodes import *
+
+# Wartości większe nie mieszczą się bezpiecznie w rejestrze maszyny (long long)
+MAX_CONSTANT = 2 ** 62
+
+
+def evaluate(left, op, right):
+    # Semantyka maszyny: odejmowanie nasyca się na zerze, dzielenie przez 0 daje 0
+    if op == '+':
+        return left + right
+    if op == '-':
+        return max(left - right, 0)
+    if op == '*':
+        return left * right
+    if op == '/':
+        return left // right if right else 0
+    if op == '%':
+        return left % right if right else 0
+    raise Exception(f"Nieznany operator: {op}")
+
+
+def compare(left, op, right):
+    return {
+        '=': left == right,
+        '!=': left != right,
+        '<': left < right,
+        '>': left > right,
+        '<=': left <= right,
+        '>=': left >= right,
+    }[op]
+
+
+def assigned_names(commands):
+    """Zmienne skalarne, które mogą zostać nadpisane przez komendy
+    (przypisanie, READ, przekazanie do procedury, iterator FOR)."""
+    names = set()
+    for cmd in commands or []:
+        if isinstance(cmd, (Assign, Read)):
+            names.add(cmd.identifier)
+        elif isinstance(cmd, ProcCall):
+            names.update(arg.name for arg in cmd.args)
+        elif isinstance(cmd, If):
+            names |= assigned_names(cmd.commands_then)
+            names |= assigned_names(cmd.commands_else)
+        elif isinstance(cmd, (While, Repeat)):
+            names |= assigned_names(cmd.commands)
+        elif isinstance(cmd, For):
+            names.add(cmd.iterator)
+            names |= assigned_names(cmd.commands)
+    return names
+
+
+class ConstantFolder:
+    """Zwijanie stałych i propagacja znanych wartości zmiennych skalarnych.
+    Śledzone są tylko lokalne zmienne skalarne zakresu - parametry procedur są
+    referencjami i mogą być aliasami, więc ich wartości nie są znane."""
+
+    def fold(self, program):
+        # Parametry skalarne, których procedura nigdy nie zmienia (indeksy)
+        self.read_only = {}
+        for proc in program.procedures:
+            written = assigned_names(proc.commands)
+            self.read_only[proc.name] = {
+                i for i, (arg_type, name) in enumerate(proc.args)
+                if arg_type != 'T' and name not in written}
+
+        for proc in program.procedures:
+            proc.commands = self.fold_scope(proc.declarations, proc.commands)
+        program.main.commands = self.fold_scope(
+            program.main.declarations, program.main.commands)
+        return program
+
+    def fold_scope(self, declarations, commands):
+        self.tracked = {decl for decl in declarations if isinstance(decl, str)}
+        commands, _ = self.fold_commands(commands, {})
+        return commands
+
+    def fold_commands(self, commands, env):
+        # env: nazwa zmiennej -> znana wartość; zwraca nowe komendy i env na wyjściu
+        result = []
+        for cmd in commands or []:
+            method = getattr(self, f"fold_{type(cmd).__name__}", None)
+            if method is None:
+                raise Exception(f"Nieznany węzeł AST: {type(cmd).__name__}")
+            folded, env = method(cmd, env)
+            result.extend(folded)
+        return result, env
+
+    # --- Wyrażenia ---
+
+    def value(self, node, env):
+        if isinstance(node, Variable) and node.name in env:
+            return Number(env[node.name])
+        if isinstance(node, ArrayRef):
+            node.index = self.value(node.index, env)
+        return node
+
+    def expression(self, node, env):
+        if not isinstance(node, BinOp):
+            return self.value(node, env)
+        left = node.left = self.value(node.left, env)
+        right = node.right = self.value(node.right, env)
+        op = node.op
+
+        if isinstance(left, Number) and isinstance(right, Number):
+            result = evaluate(left.value, op, right.value)
+            if result < MAX_CONSTANT:
+                return Number(result)
+            return node
+
+        # Tożsamości algebraiczne (wyrażenia nie mają efektów ubocznych)
+        if isinstance(right, Number):
+            if right.value == 0 and op in ('+', '-'):
+                return left
+            if right.value == 0 and op in ('*', '/', '%'):
+                return Number(0)
+            if right.value == 1 and op in ('*', '/'):
+                return left
+            if right.value == 1 and op == '%':
+                return Number(0)
+        if isinstance(left, Number):
+            if left.value == 0 and op == '+':
+                return right
+            if left.value == 0 and op in ('-', '*', '/', '%'):
+                return Number(0)
+            if left.value == 1 and op == '*':
+                return right
+        if (op in ('-', '%') and isinstance(left, Variable)
+                and isinstance(right, Variable) and left.name == right.name):
+            return Number(0)
+        return node
+
+    def condition(self, node, env):
+        # Zwraca True/False dla warunku o znanej wartości, w przeciwnym razie None
+        node.left = self.value(node.left, env)
+        node.right = self.value(node.right, env)
+        if isinstance(node.left, Number) and isinstance(node.right, Number):
+            return compare(node.left.value, node.op, node.right.value)
+        if (isinstance(node.left, Variable) and isinstance(node.right, Variable)
+                and node.left.name == node.right.name):
+            # Zmienna porównana sama ze sobą - wynik jak dla dowolnej równej pary
+            return compare(0, node.op, 0)
+        return None
+
+    # --- Komendy ---
+
+    def fold_Assign(self, node, env):
+        node.expression = self.expression(node.expression, env)
+        env = dict(env)
+        env.pop(node.identifier, None)
+        if isinstance(node.expression, Number) and node.identifier in self.tracked:
+            env[node.identifier] = node.expression.value
+        return [node], env
+
+    def fold_ArrayAssign(self, node, env):
+        node.index = self.value(node.index, env)
+        node.expression = self.expression(node.expression, env)
+        return [node], env
+
+    def fold_Read(self, node, env):
+        env = dict(env)
+        env.pop(node.identifier, None)
+        return [node], env
+
+    def fold_Write(self, node, env):
+        node.value = self.value(node.value, env)
+        return [node], env
+
+    def fold_ProcCall(self, node, env):
+        # Argumenty są przekazywane przez referencję - procedura może zmienić te,
+        # które trafiają do parametrów przez nią zapisywanych
+        read_only = self.read_only.get(node.name, set())
+        written = {arg.name for i, arg in enumerate(node.args) if i not in read_only}
+        # Wartość argumentu tylko czytanego przydaje się specjalizacji (specializer.py)
+        node.constants = {i: env[arg.name] for i, arg in enumerate(node.args)
+                          if i in read_only and arg.name in env and arg.name not in written}
+        env = {name: v for name, v in env.items() if name not in written}
+        return [node], env
+
+    def fold_If(self, node, env):
+        known = self.condition(node.condition, env)
+        if known is True:
+            return self.fold_commands(node.commands_then, env)
+        if known is False:
+            return self.fold_commands(node.commands_else, env)
+
+        node.commands_then, env_then = self.fold_commands(node.commands_then, env)
+        node.commands_else, env_else = self.fold_commands(node.commands_else, env)
+        merged = {name: v for name, v in env_then.items() if env_else.get(name) == v}
+        return [node], merged
+
+    def loop_env(self, commands, env, extra=()):
+        # Przed każdym obrotem pętli znane są tylko wartości, których ciało nie zmienia
+        killed = assigned_names(commands) | set(extra)
+        return {name: v for name, v in env.items() if name not in killed}
+
+    def fold_While(self, node, env):
+        loop_env = self.loop_env(node.commands, env)
+        if self.condition(node.condition, loop_env) is False:
+            # Pętla nie wykona ani jednego obrotu
+            return [], env
+        node.commands, _ = self.fold_commands(node.commands, loop_env)
+        return [node], loop_env
+
+    def fold_Repeat(self, node, env):
+        loop_env = self.loop_env(node.commands, env)
+        node.commands, _ = self.fold_commands(node.commands, loop_env)
+        if self.condition(node.condition, loop_env) is True:
+            # Ciało wykona się dokładnie raz - staje się kodem liniowym
+            return self.fold_commands(node.commands, env)
+        return [node], loop_env
+
+    def fold_For(self, node, env):
+        node.start_expr = self.value(node.start_expr, env)
+        node.end_expr = self.value(node.end_expr, env)
+        start, end = node.start_expr, node.end_expr
+        if isinstance(start, Number) and isinstance(end, Number):
+            empty = start.value < end.value if node.downto else start.value > end.value
+            if empty:
+                return [], env
+        loop_env = self.loop_env(node.commands, env, extra=[node.iterator])
+        node.commands, _ = self.fold_commands(node.commands, loop_env)
+        return [node], loop_env
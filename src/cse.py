@@ -0,0 +1,162 @@
+from ast_nodes import *
+from constfold import assigned_names
+from licm import key_of, expensive, written_arrays
+
+
+def operands(node):
+    # Zmienne skalarne i tablice, od których zależy wartość wyrażenia
+    if isinstance(node, Variable):
+        return {node.name}, set()
+    if isinstance(node, ArrayRef):
+        scalars, _ = operands(node.index)
+        return scalars, {node.name}
+    if isinstance(node, BinOp):
+        left, right = operands(node.left), operands(node.right)
+        return left[0] | right[0], left[1] | right[1]
+    return set(), set()
+
+
+class Available:
+    """Wyrażenie wyliczone wcześniej w tym samym obszarze kodu."""
+
+    def __init__(self, order, node, holder, attr, statement, commands):
+        self.order = order      # Wyrażenia wewnętrzne dostają mniejsze numery
+        self.node = node
+        self.scalars, self.arrays = operands(node)
+        # Pierwsze wystąpienie: holder.attr == node, w komendzie statement z listy commands
+        self.holder = holder
+        self.attr = attr
+        self.statement = statement
+        self.commands = commands
+        self.temp = None
+
+
+class CommonSubexpressions:
+    """Lokalna numeracja wartości na drzewie: drogie wyrażenie (jak w licm.py),
+    które pojawia się ponownie, zanim zmieni się któryś z jego operandów, jest
+    liczone raz do świeżej zmiennej przed pierwszym wystąpieniem. Wyrażenia
+    dostępne przed IF są dostępne w obu gałęziach (dominują je), a przed pętlą -
+    w jej ciele, jeśli pętla nie zmienia ich operandów. Zapis parametru
+    unieważnia wyrażenia ze wszystkimi parametrami (mogą być aliasami)."""
+
+    def optimize(self, program):
+        for proc in program.procedures:
+            params = {name for _, name in proc.args}
+            self.optimize_scope(proc.commands, proc.declarations,
+                                params, params - set(proc.bindings))
+        self.optimize_scope(program.main.commands, program.main.declarations, set(), set())
+        return program
+
+    def optimize_scope(self, commands, declarations, params, pointers):
+        self.params = params
+        self.pointers = pointers
+        self.shared = []
+        self.entries = 0
+        # Nazwy numerowane w obrębie zakresu, jak w licm.py
+        self.count = 0
+        self.visit_commands(commands, {})
+
+        # Wyliczenie przed pierwszym wystąpieniem; zmienne wyrażeń wewnętrznych
+        # muszą być gotowe przed zewnętrznymi
+        for entry in sorted(self.shared, key=lambda entry: entry.order):
+            declarations.append(entry.temp)
+            setattr(entry.holder, entry.attr, Variable(entry.temp))
+            index = entry.commands.index(entry.statement)
+            entry.commands.insert(index, Assign(entry.temp, entry.node))
+
+    # --- Unieważnianie ---
+
+    def kill(self, available, scalars, arrays):
+        if (scalars | arrays) & self.params:
+            scalars = scalars | self.params
+            arrays = arrays | self.params
+        for key in [key for key, entry in available.items()
+                    if entry.scalars & scalars or entry.arrays & arrays]:
+            del available[key]
+
+    def kill_loop(self, available, loop):
+        scalars = assigned_names(loop.commands)
+        if isinstance(loop, For):
+            scalars.add(loop.iterator)
+        self.kill(available, scalars, written_arrays(loop.commands))
+
+    # --- Wyrażenia ---
+
+    def visit_slot(self, holder, attr, statement, commands, available):
+        if self.reuse(holder, attr, available):
+            return
+        node = getattr(holder, attr)
+        if not expensive(node, self.pointers):
+            return
+        key = key_of(node)
+        if isinstance(node, BinOp):
+            self.visit_slot(node, 'left', statement, commands, available)
+            self.visit_slot(node, 'right', statement, commands, available)
+        self.entries += 1
+        available[key] = Available(self.entries, node, holder, attr, statement, commands)
+
+    def reuse(self, holder, attr, available):
+        # Zastępuje holder.attr zmienną z wartością wyliczoną wcześniej
+        node = getattr(holder, attr)
+        if not expensive(node, self.pointers):
+            return False
+        entry = available.get(key_of(node))
+        if entry is None:
+            return False
+        if entry.temp is None:
+            self.count += 1
+            # '@' nie wystąpi w identyfikatorze - nazwa nie koliduje
+            entry.temp = f"cse@{self.count}"
+            self.shared.append(entry)
+        setattr(holder, attr, Variable(entry.temp))
+        return True
+
+    def visit_condition(self, condition, statement, commands, available):
+        self.visit_slot(condition, 'left', statement, commands, available)
+        self.visit_slot(condition, 'right', statement, commands, available)
+
+    # --- Komendy ---
+
+    def visit_commands(self, commands, available):
+        for cmd in list(commands or []):
+            if isinstance(cmd, Assign):
+                # Krok zmiennej indukcyjnej (induction.py) zostaje w postaci
+                # v := v + k - generator kodu odczytuje z niego krok wskaźników
+                if not cmd.bumps:
+                    self.visit_slot(cmd, 'expression', cmd, commands, available)
+                self.kill(available, {cmd.identifier}, set())
+            elif isinstance(cmd, ArrayAssign):
+                self.visit_slot(cmd, 'expression', cmd, commands, available)
+                self.kill(available, set(), {cmd.name})
+            elif isinstance(cmd, Read):
+                self.kill(available, {cmd.identifier}, set())
+            elif isinstance(cmd, Write):
+                self.visit_slot(cmd, 'value', cmd, commands, available)
+            elif isinstance(cmd, ProcCall):
+                names = {arg.name for arg in cmd.args}
+                self.kill(available, names, names)
+            elif isinstance(cmd, If):
+                self.visit_condition(cmd.condition, cmd, commands, available)
+                after_then = dict(available)
+                self.visit_commands(cmd.commands_then, after_then)
+                after_else = dict(available)
+                self.visit_commands(cmd.commands_else, after_else)
+                # Dalej dostępne tylko wyrażenia nienaruszone w żadnej gałęzi
+                for key in list(available):
+                    if key not in after_then or key not in after_else:
+                        del available[key]
+            elif isinstance(cmd, (While, Repeat, For)):
+                if isinstance(cmd, For):
+                    self.visit_slot(cmd, 'start_expr', cmd, commands, available)
+                    self.visit_slot(cmd, 'end_expr', cmd, commands, available)
+                self.kill_loop(available, cmd)
+                inside = dict(available)
+                # Warunek pętli jest liczony w każdym obrocie - przed nim nie da
+                # się wstawić zmiennej, więc tylko korzysta z wartości dostępnych
+                if isinstance(cmd, While):
+                    self.reuse(cmd.condition, 'left', inside)
+                    self.reuse(cmd.condition, 'right', inside)
+                self.visit_commands(cmd.commands, inside)
+                if isinstance(cmd, Repeat):
+                    self.reuse(cmd.condition, 'left', inside)
+                    self.reuse(cmd.condition, 'right', inside)
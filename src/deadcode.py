@@ -0,0 +1,141 @@
+from ast_nodes import *
+from inliner import calls_in, names_in, iterators_in
+
+
+def declared_names(declarations):
+    return {decl if isinstance(decl, str) else decl.name for decl in declarations}
+
+
+class DeadCodeElimination:
+    """Usuwa kod bez wpływu na wynik programu:
+    - przypisania do zmiennych lokalnych, których wartość nie jest później
+      czytana (martwe zapisy, liczone analizą żywotności wstecz po drzewie),
+    - IF z pustymi gałęziami i pętle FOR z pustym ciałem,
+    - procedury nieosiągalne z Main w grafie wywołań.
+    Wyrażenia nie mają efektów ubocznych (dzielenie przez 0 daje 0), więc
+    przypisanie można usunąć razem z wyrażeniem. Parametry są referencjami
+    i zapis do nich widzi wywołujący - nie są usuwane. Pętle WHILE i REPEAT
+    zostają nawet puste, bo mogą się nie kończyć."""
+
+    def __init__(self):
+        self.removed = 0
+
+    def optimize(self, program):
+        # Najpierw graf wywołań i kontrola nazw - na kodzie przed usunięciem
+        program.procedures = self.reachable(program)
+        for proc in program.procedures:
+            proc.commands = self.optimize_scope(proc.commands, proc.declarations)
+        program.main.commands = self.optimize_scope(
+            program.main.commands, program.main.declarations)
+        return program
+
+    def optimize_scope(self, commands, declarations):
+        self.tracked = {decl for decl in declarations if isinstance(decl, str)}
+        self.remove = True
+        commands, _ = self.prune(commands, set())
+        return commands
+
+    # --- Graf wywołań ---
+
+    def reachable(self, program):
+        procedures = {proc.name: proc for proc in program.procedures}
+        used = set()
+        pending = [call.name for call in calls_in(program.main.commands)]
+        while pending:
+            name = pending.pop()
+            if name in used or name not in procedures:
+                continue    # Nieznaną procedurę zgłosi check
+            used.add(name)
+            pending.extend(call.name for call in calls_in(procedures[name].commands))
+
+        # Usuwany kod nie trafi do generatora kodu - jego błędy zgłaszamy tutaj
+        kept = []
+        known = set()
+        for proc in program.procedures:
+            params = {name for _, name in proc.args}
+            self.check(proc.commands, params | declared_names(proc.declarations), known)
+            if proc.name in used:
+                kept.append(proc)
+            known.add(proc.name)
+        self.check(program.main.commands, declared_names(program.main.declarations), known)
+        return kept
+
+    def check(self, commands, visible, known):
+        visible = visible | set(iterators_in(commands))
+        for name in sorted(names_in(commands) - visible):
+            raise Exception(f"Błąd: Niezadeklarowana zmienna '{name}'")
+        for call in calls_in(commands):
+            if call.name not in known:
+                raise Exception(f"Błąd: Nieznana procedura '{call.name}'")
+
+    # --- Żywotność ---
+
+    def prune(self, commands, live):
+        # Przejście wstecz; zwraca komendy (bez martwych, gdy self.remove) i żywe na wejściu
+        result = []
+        for cmd in reversed(commands or []):
+            kept, live = getattr(self, f"prune_{type(cmd).__name__}")(cmd, live)
+            if kept:
+                result.append(cmd)
+            else:
+                self.removed += 1
+        result.reverse()
+        return result, live
+
+    def prune_Assign(self, node, live):
+        if node.identifier in self.tracked and node.identifier not in live:
+            return not self.remove, live
+        return True, (live - {node.identifier}) | names_in(node.expression)
+
+    def prune_ArrayAssign(self, node, live):
+        return True, live | names_in(node.index) | names_in(node.expression)
+
+    def prune_Read(self, node, live):
+        # READ zostaje - pobiera wartość z wejścia, nawet jeśli nikt jej nie czyta
+        return True, live - {node.identifier}
+
+    def prune_Write(self, node, live):
+        return True, live | names_in(node.value)
+
+    def prune_ProcCall(self, node, live):
+        # Procedura może czytać każdy argument (referencje), a zapisu nie mamy pewności
+        return True, live | {arg.name for arg in node.args}
+
+    def prune_If(self, node, live):
+        node.commands_then, live_then = self.prune(node.commands_then, live)
+        node.commands_else, live_else = self.prune(node.commands_else, live)
+        if not node.commands_then and not node.commands_else:
+            return not self.remove, live
+        return True, live_then | live_else | names_in(node.condition)
+
+    def loop_live(self, node, live, extra):
+        # Punkt stały: na początku obrotu żywe jest to, co żywe po pętli,
+        # w warunku i na wejściu ciała wykonanego jeszcze raz. Przy liczeniu
+        # nic nie jest usuwane - ciało przycina dopiero wywołujący
+        head = live | extra
+        saved, self.remove = self.remove, False
+        while True:
+            _, body = self.prune(node.commands, head)
+            if body <= head:
+                break
+            head |= body
+        self.remove = saved
+        return head
+
+    def prune_While(self, node, live):
+        head = self.loop_live(node, live, names_in(node.condition))
+        node.commands, _ = self.prune(node.commands, head)
+        return True, head
+
+    def prune_Repeat(self, node, live):
+        head = self.loop_live(node, live, names_in(node.condition))
+        node.commands, entry = self.prune(node.commands, head)
+        return True, entry
+
+    def prune_For(self, node, live):
+        head = self.loop_live(node, live, set())
+        node.commands, _ = self.prune(node.commands, head)
+        bounds = names_in(node.start_expr) | names_in(node.end_expr)
+        if not node.commands:
+            return not self.remove, live | bounds
+        return True, head | bounds
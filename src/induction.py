@@ -0,0 +1,141 @@
+from ast_nodes import *
+from inliner import iterators_in
+
+
+def writes(commands):
+    """Miejsca zapisu zmiennych skalarnych: pary (nazwa, komenda)."""
+    for cmd in commands or []:
+        if isinstance(cmd, (Assign, Read)):
+            yield cmd.identifier, cmd
+        elif isinstance(cmd, ProcCall):
+            for arg in cmd.args:
+                yield arg.name, cmd
+        elif isinstance(cmd, If):
+            yield from writes(cmd.commands_then)
+            yield from writes(cmd.commands_else)
+        elif isinstance(cmd, (While, Repeat)):
+            yield from writes(cmd.commands)
+        elif isinstance(cmd, For):
+            yield cmd.iterator, cmd
+            yield from writes(cmd.commands)
+
+
+def step_of(assign):
+    # Krok przypisania v := v + k (albo k + v), k różne od v; inaczej None
+    expr = assign.expression
+    if not isinstance(expr, BinOp) or expr.op != '+':
+        return None
+    for own, step in ((expr.left, expr.right), (expr.right, expr.left)):
+        if isinstance(own, Variable) and own.name == assign.identifier \
+                and isinstance(step, (Number, Variable)) \
+                and not (isinstance(step, Variable) and step.name == own.name):
+            return step
+    return None
+
+
+class LoopFrame:
+    def __init__(self, loop, candidates):
+        self.loop = loop
+        self.candidates = candidates   # Zmienne indukcyjne pętli
+        self.pointers = {}             # (tablica, zmienna) -> nazwa wskaźnika
+        self.bumps = []                # Przypisania v := v + k wewnątrz pętli
+
+
+class InductionVariables:
+    """Wyszukuje w pętlach zmienne indukcyjne - zmienne lokalne zmieniane
+    w pętli wyłącznie przez v := v + k (albo będące iteratorem FOR) - i dla
+    odczytów/zapisów tab[v] wprowadza wskaźnik z adresem elementu. Wskaźnik
+    jest liczony raz przed pętlą i przesuwany razem z v (INC albo ADD), więc
+    dostęp do elementu to samo RLOAD/RSTORE. Przebieg tylko oznacza drzewo;
+    generator kodu korzysta ze wskaźników, które dostały rejestr."""
+
+    def __init__(self):
+        self.count = 0
+
+    def optimize(self, program):
+        for proc in program.procedures:
+            # Parametry są referencjami - ich zapis może przyjść z innej nazwy
+            scalars = {decl for decl in proc.declarations if isinstance(decl, str)}
+            self.optimize_scope(proc.commands, scalars)
+        scalars = {decl for decl in program.main.declarations if isinstance(decl, str)}
+        self.optimize_scope(program.main.commands, scalars)
+        return program
+
+    def optimize_scope(self, commands, scalars):
+        self.scalars = scalars | set(iterators_in(commands))
+        self.stack = []
+        self.visit_commands(commands)
+
+    # --- Pętle ---
+
+    def loop(self, node):
+        sites = {}
+        for name, cmd in writes(node.commands):
+            sites.setdefault(name, []).append(cmd)
+        candidates = set()
+        for name in self.scalars:
+            if all(isinstance(cmd, Assign) and step_of(cmd) for cmd in sites.get(name, [])):
+                candidates.add(name)
+        if isinstance(node, For):
+            candidates.add(node.iterator)
+
+        frame = LoopFrame(node, candidates)
+        self.stack.append(frame)
+        if isinstance(node, (While, Repeat)):
+            self.visit_value(node.condition.left)
+            self.visit_value(node.condition.right)
+        self.visit_commands(node.commands)
+        self.stack.pop()
+
+        node.pointers = {name: key for key, name in frame.pointers.items()}
+        for assign in frame.bumps:
+            assign.bumps += tuple(name for (_, var), name in frame.pointers.items()
+                                  if var == assign.identifier)
+
+    def pointer(self, name, index):
+        # Wskaźnik najgłębszej pętli, w której indeks jest zmienną indukcyjną
+        if not self.stack or not isinstance(index, Variable):
+            return None
+        frame = self.stack[-1]
+        if index.name not in frame.candidates:
+            return None
+        key = (name, index.name)
+        if key not in frame.pointers:
+            self.count += 1
+            # '#' nie wystąpi w identyfikatorze - nazwa nie koliduje
+            frame.pointers[key] = f"{name}[{index.name}]#{self.count}"
+        return frame.pointers[key]
+
+    # --- Komendy i wartości ---
+
+    def visit_value(self, node):
+        if isinstance(node, ArrayRef):
+            node.pointer = self.pointer(node.name, node.index)
+        elif isinstance(node, BinOp):
+            self.visit_value(node.left)
+            self.visit_value(node.right)
+
+    def visit_commands(self, commands):
+        for cmd in commands or []:
+            if isinstance(cmd, Assign):
+                self.visit_value(cmd.expression)
+                if step_of(cmd):
+                    for frame in self.stack:
+                        if cmd.identifier in frame.candidates:
+                            frame.bumps.append(cmd)
+            elif isinstance(cmd, ArrayAssign):
+                cmd.pointer = self.pointer(cmd.name, cmd.index)
+                self.visit_value(cmd.expression)
+            elif isinstance(cmd, Write):
+                self.visit_value(cmd.value)
+            elif isinstance(cmd, If):
+                self.visit_value(cmd.condition.left)
+                self.visit_value(cmd.condition.right)
+                self.visit_commands(cmd.commands_then)
+                self.visit_commands(cmd.commands_else)
+            elif isinstance(cmd, For):
+                self.visit_value(cmd.start_expr)
+                self.visit_value(cmd.end_expr)
+                self.loop(cmd)
+            elif isinstance(cmd, (While, Repeat)):
+                self.loop(cmd)
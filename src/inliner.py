@@ -0,0 +1,161 @@
+import copy
+from ast_nodes import *
+
+# Procedury co najwyżej tej wielkości (w komendach) są wstawiane zawsze
+INLINE_SIZE = 12
+
+# Ile komend kodu może przybyć przez wstawienie jednej procedury we wszystkie miejsca
+INLINE_GROWTH = 60
+
+
+def command_count(commands):
+    count = 0
+    for cmd in commands or []:
+        count += 1
+        if isinstance(cmd, If):
+            count += command_count(cmd.commands_then) + command_count(cmd.commands_else)
+        elif isinstance(cmd, (While, Repeat, For)):
+            count += command_count(cmd.commands)
+    return count
+
+
+def calls_in(commands):
+    # Wszystkie wywołania w komendach (także zagnieżdżone)
+    for cmd in commands or []:
+        if isinstance(cmd, ProcCall):
+            yield cmd
+        elif isinstance(cmd, If):
+            yield from calls_in(cmd.commands_then)
+            yield from calls_in(cmd.commands_else)
+        elif isinstance(cmd, (While, Repeat, For)):
+            yield from calls_in(cmd.commands)
+
+
+def rename(node, mapping):
+    """Podmienia nazwy zmiennych w poddrzewie (w miejscu) według mapping."""
+    if isinstance(node, list):
+        for item in node:
+            rename(item, mapping)
+        return
+    if isinstance(node, (Variable, ArrayRef, ArrayAssign)):
+        node.name = mapping.get(node.name, node.name)
+    elif isinstance(node, (Assign, Read)):
+        node.identifier = mapping.get(node.identifier, node.identifier)
+    elif isinstance(node, For):
+        node.iterator = mapping.get(node.iterator, node.iterator)
+    for value in vars(node).values():
+        if isinstance(value, (Node, list)):
+            rename(value, mapping)
+
+
+def names_in(node):
+    # Nazwy zmiennych i tablic użyte w poddrzewie
+    if isinstance(node, list):
+        return set().union(*(names_in(item) for item in node)) if node else set()
+    names = set()
+    if isinstance(node, (Variable, ArrayRef, ArrayAssign)):
+        names.add(node.name)
+    elif isinstance(node, (Assign, Read)):
+        names.add(node.identifier)
+    elif isinstance(node, For):
+        names.add(node.iterator)
+    for value in vars(node).values():
+        if isinstance(value, (Node, list)):
+            names |= names_in(value)
+    return names
+
+
+def iterators_in(commands):
+    names = []
+    for cmd in commands or []:
+        if isinstance(cmd, For):
+            names.append(cmd.iterator)
+            names += iterators_in(cmd.commands)
+        elif isinstance(cmd, If):
+            names += iterators_in(cmd.commands_then) + iterators_in(cmd.commands_else)
+        elif isinstance(cmd, (While, Repeat)):
+            names += iterators_in(cmd.commands)
+    return names
+
+
+class Inliner:
+    """Wstawia ciała procedur w miejsca wywołań. Parametry (przekazywane przez
+    referencję) stają się po prostu zmiennymi wywołującego, a zmienne lokalne
+    i iteratory procedury dostają świeże nazwy w zakresie wywołującego.
+    Procedura, której wszystkie wywołania zostały wstawione, znika z programu."""
+
+    def __init__(self, size=INLINE_SIZE, growth=INLINE_GROWTH):
+        self.size = size
+        self.growth = growth
+
+    def inline(self, program):
+        call_counts = {}
+        for scope in program.procedures + [program.main]:
+            for call in calls_in(scope.commands):
+                call_counts[call.name] = call_counts.get(call.name, 0) + 1
+
+        # Procedura woła tylko wcześniejsze, więc jej ciało jest już po wstawieniach
+        self.procedures = {}
+        self.chosen = set()
+        kept = []
+        for proc in program.procedures:
+            self.copies = {}
+            proc.commands = self.inline_commands(proc.commands, proc.declarations)
+            self.procedures[proc.name] = proc
+            size = command_count(proc.commands)
+            calls = call_counts.get(proc.name, 0)
+            if calls and (size <= self.size or size * (calls - 1) <= self.growth):
+                self.chosen.add(proc.name)
+            else:
+                kept.append(proc)
+        self.copies = {}
+        program.main.commands = self.inline_commands(
+            program.main.commands, program.main.declarations)
+        program.procedures = kept
+        return program
+
+    def inline_commands(self, commands, declarations):
+        result = []
+        for cmd in commands or []:
+            if isinstance(cmd, ProcCall) and cmd.name in self.chosen:
+                result.extend(self.expand(cmd, declarations))
+                continue
+            if isinstance(cmd, If):
+                cmd.commands_then = self.inline_commands(cmd.commands_then, declarations)
+                cmd.commands_else = self.inline_commands(cmd.commands_else, declarations)
+            elif isinstance(cmd, (While, Repeat, For)):
+                cmd.commands = self.inline_commands(cmd.commands, declarations)
+            result.append(cmd)
+        return result
+
+    def expand(self, call, declarations):
+        proc = self.procedures[call.name]
+        if len(call.args) != len(proc.args):
+            raise Exception(f"Błąd: Zła liczba argumentów wywołania '{call.name}'")
+        # Kopie numerowane osobno dla każdej wstawianej procedury w zakresie
+        # wywołującego - wstawienie w jednej procedurze nie zmienia nazw
+        # w pozostałych (ani ich kluczy w unit_cache.py)
+        copy_number = self.copies[proc.name] = self.copies.get(proc.name, 0) + 1
+        suffix = f"@{proc.name}@{copy_number}"
+
+        # '@' nie wystąpi w identyfikatorze - świeże nazwy nie kolidują
+        mapping = {}
+        for (_, param), arg in zip(proc.args, call.args):
+            mapping[param] = arg.name
+        for decl in proc.declarations:
+            name = decl if isinstance(decl, str) else decl.name
+            fresh = name + suffix
+            mapping[name] = fresh
+            if isinstance(decl, str):
+                declarations.append(fresh)
+            else:
+                declarations.append(ArrayDecl(fresh, decl.start, decl.end))
+        for name in iterators_in(proc.commands):
+            mapping[name] = name + suffix
+        # Nazwa spoza procedury trafiłaby po wstawieniu na zmienną wywołującego
+        for name in names_in(proc.commands) - set(mapping):
+            raise Exception(f"Błąd: Niezadeklarowana zmienna '{name}'")
+
+        body = copy.deepcopy(proc.commands)
+        rename(body, mapping)
+        return body
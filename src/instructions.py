@@ -0,0 +1,56 @@
+# Instrukcje maszyny wirtualnej (vm/mw.cc)
+
+# Koszt wykonania instrukcji
+COSTS = {
+    'READ': 100, 'WRITE': 100,
+    'LOAD': 50, 'STORE': 50, 'RLOAD': 50, 'RSTORE': 50,
+    'ADD': 5, 'SUB': 5, 'SWP': 5,
+    'RST': 1, 'INC': 1, 'DEC': 1, 'SHL': 1, 'SHR': 1,
+    'JUMP': 1, 'JPOS': 1, 'JZERO': 1, 'CALL': 1, 'RTRN': 1,
+    'HALT': 0,
+}
+
+JUMPS = ('JUMP', 'JPOS', 'JZERO')
+
+# Po tych instrukcjach sterowanie nie przechodzi do następnej
+TERMINATORS = ('JUMP', 'RTRN', 'HALT')
+
+
+class Label:
+    """Symboliczny cel skoku - numer instrukcji jest znany dopiero po
+    rozmieszczeniu kodu. Porównywany przez tożsamość."""
+    __slots__ = ('number',)
+
+    def __init__(self, number):
+        self.number = number
+
+    def __repr__(self):
+        return f"__L{self.number}__"
+
+
+class Instruction:
+    """Instrukcja maszyny: kod operacji i operand (rejestr, adres, Label
+    albo numer instrukcji po rozwiązaniu etykiet; None dla bezargumentowych)."""
+    __slots__ = ('op', 'arg')
+
+    def __init__(self, op, arg=None):
+        self.op = op
+        self.arg = arg
+
+    def __eq__(self, other):
+        return isinstance(other, Instruction) and self.op == other.op and self.arg == other.arg
+
+    def __hash__(self):
+        return hash((self.op, self.arg))
+
+    def __repr__(self):
+        return self.op if self.arg is None else f"{self.op} {self.arg}"
+
+
+def cost(instructions):
+    return sum(COSTS[instr.op] for instr in instructions)
+
+
+def serialize(code):
+    """Tekst programu w formacie .mr - jedyne miejsce zamiany na napisy."""
+    return ''.join(f"{instr!r}\n" for instr in code)
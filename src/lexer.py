@@ -1,5 +1,18 @@
 from sly import Lexer
 
+# Mapa słów kluczowych - klucze muszą być dokładnie takie jak w kodzie źródłowym.
+# Stała modułu: tabela nie jest budowana od nowa dla każdego identyfikatora
+KEYWORDS = {
+    'PROCEDURE': 'PROCEDURE', 'PROGRAM': 'PROGRAM', 'IS': 'IS', 'IN': 'IN', 'END': 'END',
+    'IF': 'IF', 'THEN': 'THEN', 'ELSE': 'ELSE', 'ENDIF': 'ENDIF',
+    'WHILE': 'WHILE', 'DO': 'DO', 'ENDWHILE': 'ENDWHILE',
+    'REPEAT': 'REPEAT', 'UNTIL': 'UNTIL',
+    'FOR': 'FOR', 'FROM': 'FROM', 'TO': 'TO', 'DOWNTO': 'DOWNTO', 'ENDFOR': 'ENDFOR',
+    'READ': 'READ', 'WRITE': 'WRITE',
+    # Typy zmiennych (Duże litery)
+    'T': 'T', 'I': 'I', 'O': 'O'
+}
+
 
 class KompilatorLexer(Lexer):
     tokens = {
@@ -61,21 +74,9 @@ class KompilatorLexer(Lexer):
     # Regex łapie słowa zaczynające się od litery (dużej lub małej)
     @_(r'[a-zA-Z_][a-zA-Z0-9_]*')
     def PIDENTIFIER(self, t):
-        # Mapa słów kluczowych - klucze muszą być dokładnie takie jak w kodzie źródłowym
-        reserved = {
-            'PROCEDURE': 'PROCEDURE', 'PROGRAM': 'PROGRAM', 'IS': 'IS', 'IN': 'IN', 'END': 'END',
-            'IF': 'IF', 'THEN': 'THEN', 'ELSE': 'ELSE', 'ENDIF': 'ENDIF',
-            'WHILE': 'WHILE', 'DO': 'DO', 'ENDWHILE': 'ENDWHILE',
-            'REPEAT': 'REPEAT', 'UNTIL': 'UNTIL',
-            'FOR': 'FOR', 'FROM': 'FROM', 'TO': 'TO', 'DOWNTO': 'DOWNTO', 'ENDFOR': 'ENDFOR',
-            'READ': 'READ', 'WRITE': 'WRITE',
-            # Typy zmiennych (Duże litery)
-            'T': 'T', 'I': 'I', 'O': 'O'
-        }
-
         # Sprawdzamy dokładnie to, co przyszło (bez upper())
         # Dzięki temu 'i' (zmienna) != 'I' (typ)
-        token_type = reserved.get(t.value)
+        token_type = KEYWORDS.get(t.value)
         if token_type:
             t.type = token_type
 
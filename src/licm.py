@@ -0,0 +1,197 @@
+import copy
+from ast_nodes import *
+from constfold import assigned_names, compare
+
+# Zaprzeczenie warunku: WHILE c staje się REPEAT ... UNTIL nie-c
+NEGATION = {'=': '!=', '!=': '=', '<': '>=', '>=': '<', '>': '<=', '<=': '>'}
+
+
+def key_of(node):
+    # Klucz strukturalny wyrażenia - te same wyrażenia dzielą jedną zmienną
+    if isinstance(node, Number):
+        return ('num', node.value)
+    if isinstance(node, Variable):
+        return ('var', node.name)
+    if isinstance(node, ArrayRef):
+        return ('arr', node.name, key_of(node.index))
+    return (node.op, key_of(node.left), key_of(node.right))
+
+
+def expensive(node, pointers):
+    """Czy wyliczenie kosztuje więcej niż odczyt zmiennej z pamięci (LOAD).
+    pointers to parametry-wskaźniki bieżącej procedury."""
+    if isinstance(node, Variable):
+        return node.name in pointers
+    if isinstance(node, ArrayRef):
+        if node.pointer:
+            return False    # Element pod wskaźnikiem pętli (induction.py) to jedno RLOAD
+        return not isinstance(node.index, Number) or node.name in pointers
+    if isinstance(node, BinOp):
+        if expensive(node.left, pointers) or expensive(node.right, pointers):
+            return True
+        if node.op in ('/', '%'):
+            return True
+        if node.op == '*':
+            # Mnożenie przez stałą to kilka przesunięć i dodawań
+            return not (isinstance(node.left, Number) or isinstance(node.right, Number))
+    return False
+
+
+def written_arrays(commands):
+    """Tablice, które komendy mogą zmienić (zapis elementu, przekazanie do procedury)."""
+    names = set()
+    for cmd in commands or []:
+        if isinstance(cmd, ArrayAssign):
+            names.add(cmd.name)
+        elif isinstance(cmd, ProcCall):
+            names.update(arg.name for arg in cmd.args)
+        elif isinstance(cmd, If):
+            names |= written_arrays(cmd.commands_then)
+            names |= written_arrays(cmd.commands_else)
+        elif isinstance(cmd, (While, Repeat, For)):
+            names |= written_arrays(cmd.commands)
+    return names
+
+
+class LoopInvariantMotion:
+    """Wynosi przed pętlę drogie wyrażenia, których wartość nie zmienia się
+    w trakcie pętli: odczyty tablic z indeksem nieznanym w czasie kompilacji,
+    odczyty przez wskaźnik, dzielenie i mnożenie zmiennych. Wartość trafia do
+    świeżej zmiennej (zwykle w rejestrze), wyliczanej raz przed pętlą.
+    Wynoszone są tylko wyrażenia liczone w każdym obrocie (nie z gałęzi IF
+    ani z ciał pętli wewnętrznych, które mogą się nie wykonać), a kod
+    wyniesiony z ciała WHILE i FOR jest strzeżony warunkiem wejścia do pętli -
+    pętla wykonana zero razy nie płaci za dzielenie ani mnożenie.
+    Parametry procedury są referencjami i mogą wskazywać te same komórki,
+    więc zapis któregokolwiek z nich unieważnia wszystkie."""
+
+    def optimize(self, program):
+        for proc in program.procedures:
+            params = {name for _, name in proc.args}
+            # Parametr związany ze zmienną Main (specializer.py) nie jest wskaźnikiem
+            self.pointers = params - set(proc.bindings)
+            proc.commands = self.optimize_scope(proc.commands, proc.declarations, params)
+        self.pointers = set()
+        program.main.commands = self.optimize_scope(
+            program.main.commands, program.main.declarations, set())
+        return program
+
+    def optimize_scope(self, commands, declarations, params):
+        self.declarations = declarations
+        self.params = params
+        # Numeracja w obrębie zakresu - zmiana jednej procedury nie zmienia
+        # nazw w pozostałych (ani ich kluczy w unit_cache.py)
+        self.hoisted = 0
+        return self.process(commands)
+
+    def process(self, commands):
+        result = []
+        for cmd in commands or []:
+            if isinstance(cmd, If):
+                cmd.commands_then = self.process(cmd.commands_then)
+                cmd.commands_else = self.process(cmd.commands_else)
+            elif isinstance(cmd, (While, Repeat, For)):
+                # Najpierw pętla zewnętrzna - wyniesione z niej wyrażenia
+                # nie są już liczone w pętlach wewnętrznych
+                before, inside = self.hoist(cmd)
+                cmd.commands = self.process(cmd.commands)
+                result.extend(before)
+                result.extend(self.guard(cmd, inside))
+                continue
+            result.append(cmd)
+        return result
+
+    def guard(self, loop, preheader):
+        """Pętla poprzedzona kodem wyniesionym z jej ciała, pod warunkiem wejścia.
+        WHILE c staje się IF c THEN ...; REPEAT ... UNTIL nie-c - tak jak pętla
+        obrócona, bez ponownego testu na wejściu."""
+        if not preheader:
+            return [loop]
+        if isinstance(loop, While):
+            entry = copy.deepcopy(loop.condition)
+            loop.condition.op = NEGATION[loop.condition.op]
+            return [If(entry, preheader + [Repeat(loop.commands, loop.condition)])]
+        entry = Condition(copy.deepcopy(loop.start_expr), '>=' if loop.downto else '<=',
+                          copy.deepcopy(loop.end_expr))
+        if isinstance(entry.left, Number) and isinstance(entry.right, Number) \
+                and compare(entry.left.value, entry.op, entry.right.value):
+            return preheader + [loop]
+        return [If(entry, preheader + [loop])]
+
+    # --- Niezmienniki ---
+
+    def hoist(self, loop):
+        scalars = assigned_names(loop.commands)
+        arrays = written_arrays(loop.commands)
+        if isinstance(loop, For):
+            scalars.add(loop.iterator)
+        if (scalars | arrays) & self.params:
+            scalars |= self.params
+            arrays |= self.params
+        self.variant = (scalars, arrays)
+
+        # Wyrażenia warunku WHILE/REPEAT są liczone co najmniej raz - idą przed
+        # pętlę bez strażnika; ciało REPEAT też wykonuje się zawsze
+        self.preheader = []
+        self.temps = {}
+        if isinstance(loop, (While, Repeat)):
+            self.visit_condition(loop.condition)
+        if isinstance(loop, Repeat):
+            self.visit_commands(loop.commands)
+            return self.preheader, []
+        before = self.preheader
+        self.preheader = []
+        self.visit_commands(loop.commands)
+        return before, self.preheader
+
+    def invariant(self, node):
+        scalars, arrays = self.variant
+        if isinstance(node, Number):
+            return True
+        if isinstance(node, Variable):
+            return node.name not in scalars
+        if isinstance(node, ArrayRef):
+            return node.name not in arrays and self.invariant(node.index)
+        return self.invariant(node.left) and self.invariant(node.right)
+
+    def replace(self, node):
+        # Zwraca węzeł do użycia w pętli: zmienną z wyniesioną wartością albo node
+        if isinstance(node, Number):
+            return node
+        if self.invariant(node) and expensive(node, self.pointers):
+            key = key_of(node)
+            if key not in self.temps:
+                self.hoisted += 1
+                # '@' nie wystąpi w identyfikatorze - nazwa nie koliduje
+                name = f"inv@{self.hoisted}"
+                self.declarations.append(name)
+                self.preheader.append(Assign(name, node))
+                self.temps[key] = name
+            return Variable(self.temps[key])
+        if isinstance(node, BinOp):
+            node.left = self.replace(node.left)
+            node.right = self.replace(node.right)
+        return node
+
+    def visit_condition(self, condition):
+        condition.left = self.replace(condition.left)
+        condition.right = self.replace(condition.right)
+
+    def visit_commands(self, commands):
+        # Tylko kod wykonywany w każdym obrocie: gałęzie IF i ciała WHILE/FOR
+        # mogą się nie wykonać (ich pętle obsłuży process osobno)
+        for cmd in commands or []:
+            if isinstance(cmd, (Assign, ArrayAssign)):
+                cmd.expression = self.replace(cmd.expression)
+            elif isinstance(cmd, Write):
+                cmd.value = self.replace(cmd.value)
+            elif isinstance(cmd, If):
+                self.visit_condition(cmd.condition)
+            elif isinstance(cmd, While):
+                self.visit_condition(cmd.condition)
+            elif isinstance(cmd, Repeat):
+                self.visit_condition(cmd.condition)
+                self.visit_commands(cmd.commands)
+            elif isinstance(cmd, For):
+                cmd.start_expr = self.replace(cmd.start_expr)
+                cmd.end_expr = self.replace(cmd.end_expr)
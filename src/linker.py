@@ -0,0 +1,48 @@
+from instructions import Instruction, Label
+
+# Nazwa jednostki Main ('#' nie wystąpi w nazwie procedury)
+MAIN_UNIT = '#main'
+
+
+class CodeUnit:
+    """Kod jednego zakresu (procedury albo Main) przed konsolidacją. Skoki
+    wskazują etykiety lokalne (Label -> numer instrukcji w jednostce), CALL -
+    nazwę procedury. Dla procedury jednostka niesie też fakty potrzebne jej
+    wywołującym: symbole parametrów, niszczone rejestry i koniec ramki."""
+
+    def __init__(self, name, code, labels, args=None, clobbers=frozenset(), frame_end=None):
+        self.name = name
+        self.code = code
+        self.labels = labels
+        self.args = args
+        self.clobbers = clobbers
+        self.frame_end = frame_end
+
+    def interface(self):
+        # Sama jednostka bez kodu - tyle potrzebuje generator wywołującego
+        return CodeUnit(self.name, [], {}, self.args, self.clobbers, self.frame_end)
+
+
+def link(units):
+    """Rozmieszcza jednostki jedna za drugą (Main ostatni, a gdy są procedury,
+    na początku programu skok do Main) i zamienia etykiety lokalne oraz nazwy
+    procedur w CALL na bezwzględne numery instrukcji."""
+    bases = {}
+    offset = 1 if len(units) > 1 else 0
+    for unit in units:
+        bases[unit.name] = offset
+        offset += len(unit.code)
+
+    code = [Instruction("JUMP", bases[MAIN_UNIT])] if len(units) > 1 else []
+    for unit in units:
+        base = bases[unit.name]
+        for instr in unit.code:
+            if isinstance(instr.arg, Label):
+                target = unit.labels.get(instr.arg)
+                if target is None:
+                    raise Exception(f"Błąd wewnętrzny: Nieznana etykieta {instr.arg}")
+                instr = Instruction(instr.op, base + target)
+            elif instr.op == 'CALL':
+                instr = Instruction(instr.op, bases[instr.arg])
+            code.append(instr)
+    return code
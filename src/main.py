@@ -1,54 +1,135 @@
 import sys
-from lexer import KompilatorLexer
+from stream_lexer import StreamLexer
 from parser import KompilatorParser
 from codegen import CodeGenerator
+from instructions import serialize
+from constfold import ConstantFolder
+from inliner import Inliner
+from specializer import Specializer
+from licm import LoopInvariantMotion
+from induction import InductionVariables
+from cse import CommonSubexpressions
+from deadcode import DeadCodeElimination
+from unit_cache import UnitCache
 
 
-def main():
-    if len(sys.argv) != 3:
-        print("Użycie: kompilator <plik_wejściowy> <plik_wyjściowy>")
-        return
-
-    input_file = sys.argv[1]
-    output_file = sys.argv[2]
-
-    # Wczytaj plik
+def compile_file(input_file, output_file, lexer=None, parser=None, workers=1, cache_dir=None):
+    """Kompiluje jeden plik; komunikaty idą na stdout. Zwraca True przy sukcesie.
+    workers > 1 - procedury są generowane równolegle na puli procesów;
+    cache_dir - katalog pamięci skompilowanych jednostek (unit_cache.py)."""
+    # 1-2. Lexer i parser (tryb wsadowy przekazuje instancje gotowe w procesie).
+    #      Plik jest mapowany w pamięć, tokeny powstają w miarę parsowania
+    lexer = lexer or StreamLexer()
+    parser = parser or KompilatorParser()
     try:
-        with open(input_file, 'r') as f:
-            text = f.read()
+        tokens = lexer.tokenize_file(input_file)
     except FileNotFoundError:
         print(f"Błąd: Nie znaleziono pliku {input_file}")
-        return
-
-    # 1. Lexer
-    lexer = KompilatorLexer()
-
-    # 2. Parser
-    parser = KompilatorParser()
+        return False
     try:
-        ast = parser.parse(lexer.tokenize(text))
+        ast = parser.parse(tokens)
     except Exception as e:
         print(f"Błąd parsowania: {e}")
-        return
+        return False
 
     if not ast:
         print("Błąd: Parser nie zwrócił drzewa AST (pusty plik lub błąd składni).")
-        return
+        return False
+
+    # 3. Optymalizacje AST: wstawianie procedur, zwijanie i propagacja stałych,
+    #    specjalizacja procedur (ponowne zwijanie w kopiach ze stałymi),
+    #    usuwanie martwego kodu i nieużywanych procedur, wynoszenie niezmienników
+    #    z pętli, zmienne indukcyjne, wspólne podwyrażenia
+    try:
+        ast = Inliner().inline(ast)
+    except Exception as e:
+        print(f"Błąd kompilacji: {e}")
+        return False
+    ast = ConstantFolder().fold(ast)
+    ast = Specializer().specialize(ast)
+    ast = ConstantFolder().fold(ast)
+    try:
+        ast = DeadCodeElimination().optimize(ast)
+    except Exception as e:
+        print(f"Błąd kompilacji: {e}")
+        return False
+    ast = LoopInvariantMotion().optimize(ast)
+    ast = InductionVariables().optimize(ast)
+    ast = CommonSubexpressions().optimize(ast)
 
-    # 3. Code Generation
-    generator = CodeGenerator()
+    # 4. Code Generation
+    cache = UnitCache(cache_dir) if cache_dir else None
+    generator = CodeGenerator(workers, cache)
     try:
         generator.generate(ast)
     except Exception as e:
         print(f"Błąd kompilacji: {e}")
-        return
+        return False
 
     # Zapisz wynik
     with open(output_file, 'w') as f:
-        for line in generator.code:
-            f.write(line + '\n')
+        f.write(serialize(generator.code))
 
     print(f"Kompilacja zakończona sukcesem! Wynik w {output_file}")
+    return True
+
+
+def main():
+    args = sys.argv[1:]
+    # -j N: liczba procesów - plików w trybie wsadowym, procedur przy jednym pliku
+    workers = None
+    if '-j' in args:
+        position = args.index('-j')
+        try:
+            workers = int(args[position + 1])
+        except (IndexError, ValueError):
+            print("Błąd: -j wymaga liczby procesów")
+            sys.exit(2)
+        del args[position:position + 2]
+
+    # --cache KATALOG: przy ponownej kompilacji generowane są tylko zmienione procedury
+    cache_dir = None
+    if '--cache' in args:
+        position = args.index('--cache')
+        if position + 1 >= len(args):
+            print("Błąd: --cache wymaga katalogu")
+            sys.exit(2)
+        cache_dir = args[position + 1]
+        del args[position:position + 2]
+
+    # --batch / --manifest: wiele plików w jednym uruchomieniu (batch.py)
+    if args and args[0] in ('--batch', '--manifest'):
+        sys.exit(batch_main(args, workers, cache_dir))
+
+    if len(args) != 2:
+        print("Użycie: kompilator [-j N] [--cache KATALOG] <plik_wejściowy> <plik_wyjściowy>")
+        print("        kompilator --batch [-j N] [--cache KATALOG] <plik_wejściowy>...")
+        print("        kompilator --manifest <plik_z_listą> [-j N] [--cache KATALOG]")
+        return
+
+    compile_file(args[0], args[1], workers=workers or 1, cache_dir=cache_dir)
+
+
+def batch_main(args, workers, cache_dir):
+    # Zwraca kod wyjścia procesu: 0 gdy wszystkie pliki się skompilowały
+    from batch import read_manifest, compile_batch, output_name
+
+    mode, names = args[0], args[1:]
+    if mode == '--manifest':
+        if len(names) != 1:
+            print("Błąd: --manifest wymaga jednego pliku z listą")
+            return 2
+        try:
+            pairs = read_manifest(names[0])
+        except OSError:
+            print(f"Błąd: Nie znaleziono pliku {names[0]}")
+            return 2
+    else:
+        pairs = [(name, output_name(name)) for name in names]
+    if not pairs:
+        print("Błąd: Brak plików do kompilacji")
+        return 2
+    return 0 if compile_batch(pairs, workers, cache_dir) else 1
 
 
 if __name__ == "__main__":
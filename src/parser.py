@@ -1,9 +1,12 @@
 from sly import Parser
 from lexer import KompilatorLexer
 from ast_nodes import *
+import parser_cache
 
 
-class KompilatorParser(Parser):
+# Tablice LALR bierze z pliku; zmiana gramatyki albo tokenów zmienia klucz
+# i tablice budują się od nowa (parser_cache.py)
+class KompilatorParser(Parser, metaclass=parser_cache.CachedParserMeta):
     tokens = KompilatorLexer.tokens
 
     precedence = (
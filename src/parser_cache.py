@@ -0,0 +1,87 @@
+import marshal
+import os
+import cache_io
+import sly
+import sly.yacc
+
+# Plik z tablicami LALR parsera; __pycache__ i tak jest pomijany przez gita
+CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          '__pycache__', 'parsetab.marshal')
+
+
+class CachedTables:
+    """Tablice LALR wczytane z dysku - tylko to, czego używa Parser.parse,
+    oraz liczby konfliktów, które SLY zgłasza po zbudowaniu tablic."""
+
+    def __init__(self, lr_action, lr_goto, defaulted_states, num_sr=0, num_rr=0):
+        self.lr_action = lr_action
+        self.lr_goto = lr_goto
+        self.defaulted_states = defaulted_states
+        # SLY sprawdza tylko długość list konfliktów; same konflikty nie są zapisywane
+        self.sr_conflicts = [None] * num_sr
+        self.rr_conflicts = [None] * num_rr
+
+
+class CachedParserMeta(sly.yacc.ParserMeta):
+    """Metaklasa parsera z tablicami LALR w pamięci podręcznej na dysku.
+
+    SLY buduje tablice przy tworzeniu klasy, wołając sly.yacc.LRTable(grammar).
+    Na czas tworzenia klasy ta nazwa wskazuje wersję, która najpierw szuka
+    tablic w cache_file. Ostrzeżenia o konfliktach wypisuje dalej SLY, więc
+    pojawiają się również przy tablicach z pliku."""
+
+    cache_file = CACHE_FILE
+
+    def __new__(meta, clsname, bases, attributes):
+        build_table = sly.yacc.LRTable
+        tokens = attributes['tokens']
+
+        def cached_table(grammar):
+            key = signature(grammar, tokens)
+            table = load(key, meta.cache_file)
+            if table is None:
+                table = build_table(grammar)
+                save(key, table, meta.cache_file)
+            return table
+
+        sly.yacc.LRTable = cached_table
+        try:
+            return super().__new__(meta, clsname, bases, attributes)
+        finally:
+            sly.yacc.LRTable = build_table
+
+
+def signature(grammar, tokens):
+    """Klucz tablic: opis gramatyki (produkcje z priorytetami, priorytety
+    terminali) i zbioru tokenów leksera. Numery produkcji w tablicach zależą
+    od kolejności reguł, więc produkcje wchodzą do klucza w kolejności.
+    Klucz jest porównywany w całości - to kilka kB, a skrót kryptograficzny
+    kosztowałby przy starcie więcej (import hashlib) niż samo porównanie."""
+    parts = [sly.__version__, grammar.Start, sorted(tokens),
+             sorted(grammar.Precedence.items()),
+             [(str(p), p.prec) for p in grammar.Productions]]
+    return repr(parts)
+
+
+def load(key, path=CACHE_FILE):
+    # Tablice z pliku albo None, gdy go nie ma, jest uszkodzony lub nieaktualny
+    try:
+        with open(path, 'rb') as f:
+            cached = marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if not isinstance(cached, dict) or cached.get('signature') != key:
+        return None
+    try:
+        return CachedTables(cached['action'], cached['goto'], cached['defaulted'],
+                            cached['sr'], cached['rr'])
+    except KeyError:
+        # Plik z wcześniejszej wersji, bez liczby konfliktów
+        return None
+
+
+def save(key, table, path=CACHE_FILE):
+    cached = {'signature': key, 'action': table.lr_action, 'goto': table.lr_goto,
+              'defaulted': table.defaulted_states, 'sr': len(table.sr_conflicts),
+              'rr': len(table.rr_conflicts)}
+    cache_io.dump(cached, path)
@@ -0,0 +1,163 @@
+from instructions import JUMPS, TERMINATORS, Instruction, cost
+
+# --- Reguły ---
+# Reguła dostaje okno kolejnych instrukcji (bez etykiet wewnątrz okna) oraz zbiór
+# etykiet wskazujących na instrukcję tuż za oknem. Zwraca instrukcje zastępcze
+# albo None, gdy wzorzec nie pasuje.
+
+INVERTED = {'JPOS': 'JZERO', 'JZERO': 'JPOS'}   # r_a >= 0: r_a > 0 <=> r_a != 0
+
+
+def writes_only_acc(instr):
+    # Instrukcja bez efektów ubocznych poza zmianą r_a
+    op = instr.op
+    if op in ('LOAD', 'RLOAD', 'ADD', 'SUB'):
+        return True
+    return op in ('RST', 'INC', 'DEC', 'SHL', 'SHR') and instr.arg == 'a'
+
+
+def overwrites_acc(instr):
+    # Instrukcja nadpisuje r_a, nie czytając go
+    op = instr.op
+    if op in ('LOAD', 'READ'):
+        return True
+    if op == 'RST':
+        return instr.arg == 'a'
+    return op == 'RLOAD' and instr.arg != 'a'
+
+
+def store_load(window, next_labels):
+    # STORE t; LOAD t -> STORE t (r_a nadal trzyma zapisaną wartość)
+    first, second = window
+    if first.op == 'STORE' and second.op == 'LOAD' and second.arg == first.arg:
+        return [first]
+
+
+def load_store(window, next_labels):
+    # LOAD t; STORE t -> LOAD t
+    first, second = window
+    if first.op == 'LOAD' and second.op == 'STORE' and second.arg == first.arg:
+        return [first]
+
+
+def double_swap(window, next_labels):
+    # SWP r; SWP r -> nic
+    first, second = window
+    if first.op == 'SWP' and first == second:
+        return []
+
+
+def copy_swap(window, next_labels):
+    # RST a; ADD r; SWP r -> RST a; ADD r (po kopii r_a i r mają tę samą wartość)
+    rst, add, swp = window
+    if rst.op == 'RST' and rst.arg == 'a' and add.op == 'ADD' and add.arg != 'a' \
+            and swp.op == 'SWP' and swp.arg == add.arg:
+        return [rst, add]
+
+
+def dead_acc_write(window, next_labels):
+    # Wartość r_a nadpisana zanim ktokolwiek ją przeczytał
+    first, second = window
+    if writes_only_acc(first) and overwrites_acc(second):
+        return [second]
+
+
+def inc_dec(window, next_labels):
+    # INC r; DEC r -> nic (DEC po INC nigdy się nie nasyca)
+    first, second = window
+    if first.op == 'INC' and second.op == 'DEC' and second.arg == first.arg:
+        return []
+
+
+def jump_to_next(window, next_labels):
+    # Skok do instrukcji, która i tak wykona się jako następna
+    jump, = window
+    if jump.op in JUMPS and jump.arg in next_labels:
+        return []
+
+
+def branch_over_jump(window, next_labels):
+    # JPOS L1; JUMP L2; L1: -> JZERO L2
+    branch, jump = window
+    if branch.op in INVERTED and jump.op == 'JUMP' and branch.arg in next_labels:
+        return [Instruction(INVERTED[branch.op], jump.arg)]
+
+
+def unreachable(window, next_labels):
+    # Instrukcja bez etykiety za bezwarunkowym skokiem nigdy się nie wykona
+    first, second = window
+    if first.op in TERMINATORS:
+        return [first]
+
+
+# (nazwa, rozmiar okna, reguła) - nowe reguły wystarczy dopisać do tabeli
+RULES = [
+    ('store_load', 2, store_load),
+    ('load_store', 2, load_store),
+    ('double_swap', 2, double_swap),
+    ('copy_swap', 3, copy_swap),
+    ('dead_acc_write', 2, dead_acc_write),
+    ('inc_dec', 2, inc_dec),
+    ('jump_to_next', 1, jump_to_next),
+    ('branch_over_jump', 2, branch_over_jump),
+    ('unreachable', 2, unreachable),
+]
+
+
+class PeepholeOptimizer:
+    """Optymalizacja przez okienko na kodzie z nierozwiązanymi etykietami.
+    Reguły są stosowane aż do punktu stałego; każda zamiana musi być krótsza
+    albo tańsza według kosztów maszyny wirtualnej. Etykiety są trzymane
+    w liście równoległej do kodu, więc zamiana nie przelicza ich pozycji."""
+
+    def __init__(self, rules=RULES):
+        self.rules = rules
+        self.fired = {}   # nazwa reguły -> liczba zastosowań
+
+    def optimize(self, code, labels_map):
+        code = list(code)
+        # marks[i] - etykiety wskazujące na instrukcję i (ostatnia: za końcem kodu)
+        marks = [()] * (len(code) + 1)
+        for label, index in labels_map.items():
+            marks[index] = marks[index] + (label,)
+
+        changed = True
+        while changed:
+            changed = False
+            i = 0
+            while i < len(code):
+                if self.apply(code, marks, i):
+                    changed = True
+                else:
+                    i += 1
+
+        resolved = {}
+        for index, names in enumerate(marks):
+            for label in names:
+                resolved[label] = index
+        return code, resolved
+
+    def apply(self, code, marks, i):
+        for name, size, rule in self.rules:
+            window = code[i:i + size]
+            if len(window) < size:
+                continue
+            # Etykieta wewnątrz okna oznacza wejście z innego miejsca
+            if any(marks[i + 1:i + size]):
+                continue
+            replacement = rule(window, marks[i + size])
+            if replacement is None:
+                continue
+            if replacement == window or cost(replacement) > cost(window) \
+                    or len(replacement) > len(window):
+                raise Exception(f"Błąd wewnętrzny: reguła {name} nie poprawia kodu")
+
+            code[i:i + size] = replacement
+            if replacement:
+                marks[i:i + size] = [marks[i]] + [()] * (len(replacement) - 1)
+            else:
+                # Etykiety okna przechodzą na instrukcję za nim
+                marks[i:i + size + 1] = [marks[i] + marks[i + size]]
+            self.fired[name] = self.fired.get(name, 0) + 1
+            return True
+        return False
@@ -0,0 +1,229 @@
+from ast_nodes import *
+from inliner import names_in
+
+# Rejestry a-d są robocze dla generatora kodu, e-h mogą być "domami" zmiennych
+REGISTERS = ('e', 'f', 'g', 'h')
+
+# Pseudo-zmienna z adresem powrotu procedury ('#' nie wystąpi w identyfikatorze)
+RETURN_ADDRESS = '#ret'
+
+
+def trip_counter(iterator):
+    # Pseudo-zmienna z liczbą pozostałych obrotów pętli FOR
+    return f"{iterator}#trips"
+
+# Szacowana liczba obrotów pętli przy liczeniu wagi (kosztu spillu) wystąpienia
+LOOP_WEIGHT = 10
+
+# Wskaźnik elementu bez rejestru nie idzie do pamięci - generator liczy adres
+# jak bez wskaźnika. Dla tablicy o znanym adresie to ok. 10 cykli zamiast
+# LOAD (50), więc jego wystąpienie waży tyle co ułamek wystąpienia zmiennej
+POINTER_WEIGHT = 0.2
+
+
+class LiveInterval:
+    def __init__(self, name):
+        self.name = name
+        self.start = None
+        self.end = None
+        self.weight = 0
+        self.forbidden = set()   # Rejestry niszczone przez wywołania w trakcie życia
+        self.register = None
+
+    def cover(self, start, end):
+        self.start = start if self.start is None else min(self.start, start)
+        self.end = end if self.end is None else max(self.end, end)
+
+    def __repr__(self):
+        return f"<{self.name}: [{self.start}, {self.end}] w={self.weight} -> {self.register}>"
+
+
+class RegisterAllocator:
+    """Linear-scan po przedziałach życia zmiennych jednego zakresu (Main lub procedura).
+    Pozycje to numery komend w porządku prefiksowym; wystąpienie wewnątrz pętli
+    rozszerza przedział na całą najbardziej zewnętrzną pętlę (wartość przeżywa powrót)."""
+
+    def __init__(self, call_clobbers, registers=REGISTERS):
+        # call_clobbers: nazwa procedury -> zbiór rejestrów, które niszczy (przechodnio)
+        self.call_clobbers = call_clobbers
+        self.registers = registers
+
+    def allocate(self, commands, variables, params=(), procedure=False):
+        self.pos = 0
+        self.occurrences = []
+        self.loops = []
+        self.calls = []
+        self.passed = set()
+        self.iterators = []
+        self.pointers = {}
+        self.walk_commands(commands)
+        exit_pos = self.pos + 1
+
+        # Iteratory pętli FOR są deklarowane dopiero przy generowaniu pętli
+        variables = list(variables) + [name for name in self.iterators
+                                       if name not in variables and name not in params]
+
+        # Zmienne przekazywane do procedur muszą mieć adres w pamięci
+        pinned = self.passed - set(params)
+        intervals = {}
+        for name in variables + list(params):
+            if name not in pinned:
+                intervals[name] = LiveInterval(name)
+
+        for name, pos, depth, loop, share in self.occurrences:
+            interval = intervals.get(name)
+            if interval is None:
+                continue
+            weight = share * LOOP_WEIGHT ** depth
+            if name in self.pointers and self.pointers[name] not in params:
+                weight *= POINTER_WEIGHT
+            interval.weight += weight
+            if loop:
+                interval.cover(loop[0], loop[1])
+            else:
+                interval.cover(pos, pos)
+
+        for name in params:
+            # Wskaźnik ładowany do rejestru przy wejściu - opłaca się tylko przy wielokrotnym użyciu
+            interval = intervals[name]
+            if interval.weight < 2:
+                del intervals[name]
+            else:
+                interval.cover(0, 0)
+
+        if procedure:
+            ret = LiveInterval(RETURN_ADDRESS)
+            ret.cover(0, exit_pos)
+            ret.weight = 1
+            intervals[RETURN_ADDRESS] = ret
+
+        live = [iv for iv in intervals.values() if iv.start is not None]
+        for pos, callee in self.calls:
+            clobbered = self.call_clobbers.get(callee, set())
+            for interval in live:
+                if interval.start < pos < interval.end:
+                    interval.forbidden |= clobbered
+
+        self.linear_scan(live)
+        self.intervals = live
+        return {iv.name: iv.register for iv in live if iv.register}
+
+    def linear_scan(self, intervals):
+        active = []
+        for interval in sorted(intervals, key=lambda iv: (iv.start, -iv.weight)):
+            active = [iv for iv in active if iv.end >= interval.start]
+            taken = {iv.register for iv in active}
+            free = [r for r in self.registers
+                    if r not in taken and r not in interval.forbidden]
+            if free:
+                interval.register = free[0]
+                active.append(interval)
+                continue
+
+            # Brak wolnego rejestru - wyrzuć do pamięci najtańszy przedział
+            candidates = [iv for iv in active
+                          if iv.register not in interval.forbidden]
+            if not candidates:
+                continue
+            victim = min(candidates, key=lambda iv: iv.weight)
+            if victim.weight < interval.weight:
+                interval.register = victim.register
+                victim.register = None
+                active.remove(victim)
+                active.append(interval)
+
+    # --- Zbieranie wystąpień ---
+
+    def use(self, name, share=1):
+        outer = self.loops[0] if self.loops else None
+        self.occurrences.append((name, self.pos, len(self.loops), outer, share))
+
+    def use_value(self, node):
+        if isinstance(node, Variable):
+            self.use(node.name)
+        elif isinstance(node, ArrayRef):
+            if node.pointer:
+                self.use(node.pointer)
+                return
+            self.use(node.name)
+            self.use_value(node.index)
+        elif isinstance(node, (BinOp, Condition)):
+            self.use_value(node.left)
+            self.use_value(node.right)
+
+    def enter_loop(self, node):
+        # Wskaźniki elementów (induction.py) są liczone tuż przed pętlą
+        for name, (array, _) in node.pointers.items():
+            self.pointers[name] = array
+            self.temporary(name)
+            self.use(name)
+        self.loops.append([self.pos, self.pos])
+
+    def temporary(self, name):
+        # Pseudo-zmienna generatora kodu (iterator, licznik, wskaźnik)
+        if name not in self.iterators:
+            self.iterators.append(name)
+
+    def exit_loop(self):
+        # Koniec pętli leży za jej ostatnią komendą - skok powrotny przedłuża
+        # życie zmiennych poza wywołania stojące na końcu ciała
+        loop = self.loops.pop()
+        loop[1] = self.pos + 0.5
+
+    def walk_commands(self, commands):
+        for cmd in commands or []:
+            self.walk(cmd)
+
+    def walk(self, node):
+        self.pos += 1
+        if isinstance(node, Assign):
+            self.use(node.identifier)
+            self.use_value(node.expression)
+            # Przesunięcie wskaźnika to jego koszt, nie zysk - nie dodaje wagi
+            for name in node.bumps:
+                self.use(name, share=0)
+        elif isinstance(node, ArrayAssign):
+            if node.pointer:
+                self.use(node.pointer)
+            else:
+                self.use(node.name)
+                self.use_value(node.index)
+            self.use_value(node.expression)
+        elif isinstance(node, Read):
+            self.use(node.identifier)
+        elif isinstance(node, Write):
+            self.use_value(node.value)
+        elif isinstance(node, ProcCall):
+            self.calls.append((self.pos, node.name))
+            for arg in node.args:
+                self.passed.add(arg.name)
+                self.use(arg.name)
+        elif isinstance(node, If):
+            self.use_value(node.condition)
+            self.walk_commands(node.commands_then)
+            self.walk_commands(node.commands_else)
+        elif isinstance(node, While):
+            self.enter_loop(node)
+            self.use_value(node.condition)
+            self.walk_commands(node.commands)
+            self.exit_loop()
+        elif isinstance(node, Repeat):
+            self.enter_loop(node)
+            self.walk_commands(node.commands)
+            self.use_value(node.condition)
+            self.exit_loop()
+        elif isinstance(node, For):
+            self.use_value(node.start_expr)
+            self.use_value(node.end_expr)
+            counter = trip_counter(node.iterator)
+            self.temporary(node.iterator)
+            self.temporary(counter)
+            self.enter_loop(node)
+            # Licznik jest czytany i zmniejszany w każdym obrocie
+            self.use(counter)
+            self.use(counter)
+            # Iterator nieużywany w ciele nie jest w ogóle utrzymywany
+            if node.iterator in names_in(node.commands):
+                self.use(node.iterator)
+            self.walk_commands(node.commands)
+            self.exit_loop()
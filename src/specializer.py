@@ -0,0 +1,120 @@
+import copy
+from ast_nodes import *
+from inliner import calls_in, command_count
+
+# Najwięcej kopii jednej procedury
+MAX_CLONES = 4
+
+# Ile komend kodu może przybyć przez kopie jednej procedury
+CLONE_GROWTH = 120
+
+
+def substitute(node, constants):
+    """Zastępuje (w miejscu) odczyty zmiennych z constants liczbami."""
+    if isinstance(node, list):
+        for i, item in enumerate(node):
+            if isinstance(item, Variable) and item.name in constants:
+                node[i] = Number(constants[item.name])
+            else:
+                substitute(item, constants)
+        return
+    for attr, value in vars(node).items():
+        if isinstance(value, Variable) and value.name in constants:
+            setattr(node, attr, Number(constants[value.name]))
+        elif isinstance(value, (Node, list)):
+            substitute(value, constants)
+
+
+class Specializer:
+    """Tworzy kopie procedur dla powtarzających się wiązań argumentów.
+    Parametr tylko czytany, dla którego wywołujący zna wartość argumentu
+    (ProcCall.constants z constfold.py), staje się w kopii stałą. Parametr,
+    do którego Main przekazuje swoją zmienną, staje się w kopii drugą nazwą
+    tej zmiennej - dostęp idzie wprost pod jej adres zamiast przez wskaźnik.
+    Procedura bez wywołań niespecjalizowanych znika z programu."""
+
+    def __init__(self, max_clones=MAX_CLONES, growth=CLONE_GROWTH):
+        self.max_clones = max_clones
+        self.growth = growth
+
+    def specialize(self, program):
+        main_names = {decl if isinstance(decl, str) else decl.name
+                      for decl in program.main.declarations}
+        procedures = {proc.name: proc for proc in program.procedures}
+
+        # Wywołania każdej procedury pogrupowane według wiązania argumentów
+        groups = {}
+        for scope in program.procedures + [program.main]:
+            in_main = scope is program.main
+            for call in calls_in(scope.commands):
+                proc = procedures.get(call.name)
+                if proc is None or len(call.args) != len(proc.args):
+                    continue    # Błąd zgłosi generator kodu
+                key = self.binding_key(call, in_main and main_names)
+                if any(key):
+                    groups.setdefault(call.name, {}).setdefault(key, []).append(call)
+
+        result = []
+        for proc in program.procedures:
+            result.append(proc)
+            bindings = groups.get(proc.name, {})
+            # Najczęstsze wiązania w granicach przyrostu kodu
+            ranked = sorted(bindings.items(), key=lambda item: -len(item[1]))
+            size = command_count(proc.commands)
+            calls = sum(len(group) for group in bindings.values())
+            remaining = self.count_calls(program, proc.name) - calls
+
+            chosen = []
+            for key, group in ranked[:self.max_clones]:
+                copies = len(chosen) + 1 + (1 if remaining else 0)
+                if copies > 1 and size * (copies - 1) > self.growth:
+                    break
+                chosen.append((key, group))
+            if not chosen:
+                continue
+
+            unserved = remaining + sum(len(group) for _, group in ranked[len(chosen):])
+            if not unserved:
+                result.pop()
+            for number, (key, group) in enumerate(chosen, 1):
+                clone = self.clone(proc, key, number)
+                for call in group:
+                    call.name = clone.name
+                result.append(clone)
+
+        program.procedures = result
+        return program
+
+    def count_calls(self, program, name):
+        return sum(1 for scope in program.procedures + [program.main]
+                   for call in calls_in(scope.commands) if call.name == name)
+
+    def binding_key(self, call, main_names):
+        # Krotka wiązań kolejnych parametrów: ('const', v), ('var', nazwa) albo None
+        key = []
+        for i, arg in enumerate(call.args):
+            if i in call.constants:
+                key.append(('const', call.constants[i]))
+            elif main_names and isinstance(arg, Variable) and arg.name in main_names:
+                key.append(('var', arg.name))
+            else:
+                key.append(None)
+        return tuple(key)
+
+    def clone(self, proc, key, number):
+        clone = copy.deepcopy(proc)
+        # '@' nie wystąpi w identyfikatorze - nazwa kopii nie koliduje. Numer
+        # liczy kopie tej procedury, więc kopie innych nie zmieniają nazwy
+        clone.name = f"{proc.name}@{number}"
+        constants = {}
+        for (_, param), binding in zip(proc.args, key):
+            if binding is None:
+                continue
+            kind, value = binding
+            if kind == 'const':
+                constants[param] = value
+                clone.bindings[param] = Number(value)
+            else:
+                clone.bindings[param] = Variable(value)
+        substitute(clone.commands, constants)
+        return clone
@@ -0,0 +1,119 @@
+import mmap
+import re
+import sys
+import time
+from sly.lex import Token
+from lexer import KEYWORDS
+
+# Jedno wyrażenie dla całego języka, na bajtach (plik jest mapowany, nie dekodowany).
+# Kolejność alternatyw jak w KompilatorLexer: dłuższe operatory przed prefiksami.
+MASTER = re.compile(rb'''
+      (?P<skip>[ \t]+|\#[^\n]*)
+    | (?P<newline>\n+)
+    | (?P<PIDENTIFIER>[a-zA-Z_][a-zA-Z0-9_]*)
+    | (?P<NUM>[0-9]+)
+    | (?P<ASSIGN>:=) | (?P<NEQ>!=) | (?P<GE>>=) | (?P<LE><=)
+    | (?P<EQ>=) | (?P<LT><) | (?P<GT>>)
+    | (?P<PLUS>\+) | (?P<MINUS>-) | (?P<TIMES>\*) | (?P<DIV>/) | (?P<MOD>%)
+    | (?P<LPAREN>\() | (?P<RPAREN>\)) | (?P<LBRACKET>\[) | (?P<RBRACKET>\])
+    | (?P<COLON>:) | (?P<SEMICOLON>;) | (?P<COMMA>,)
+    | (?P<error>[\x00-\x7f]|[\xc0-\xff][\x80-\xbf]*|[\x80-\xbf])
+''', re.VERBOSE)
+
+# Wartości tokenów operatorów - stałe, bez dekodowania dopasowania
+VALUES = {
+    'ASSIGN': ':=', 'NEQ': '!=', 'GE': '>=', 'LE': '<=', 'EQ': '=', 'LT': '<', 'GT': '>',
+    'PLUS': '+', 'MINUS': '-', 'TIMES': '*', 'DIV': '/', 'MOD': '%',
+    'LPAREN': '(', 'RPAREN': ')', 'LBRACKET': '[', 'RBRACKET': ']',
+    'COLON': ':', 'SEMICOLON': ';', 'COMMA': ',',
+}
+
+
+class StreamToken(Token):
+    """Token zgodny z parserem SLY, z numerem kolumny (od 1) w linii."""
+    __slots__ = ('column',)
+
+
+class StreamLexer:
+    """Lekser dla dużych plików: plik jest mapowany w pamięć (mmap), a tokeny
+    powstają leniwie, w miarę jak parser je pobiera - źródło nie jest
+    wczytywane do jednego napisu. Daje te same tokeny co KompilatorLexer
+    (typy, wartości, numery linii; index i column liczą bajty, co dla
+    źródeł ASCII jest tym samym co znaki) i te same komunikaty o błędach."""
+
+    def tokenize_file(self, path):
+        # Plik jest otwierany od razu - brak pliku zgłasza wywołujący, nie parser
+        f = open(path, 'rb')
+        return self._tokenize_mapped(f)
+
+    def _tokenize_mapped(self, f):
+        with f:
+            try:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                return    # Pustego pliku nie da się zmapować - nie ma tokenów
+            with data:
+                yield from self.tokenize(data)
+
+    def tokenize(self, data):
+        """Tokeny z bajtów (albo napisu, kodowanego w UTF-8), po jednym na żądanie."""
+        if isinstance(data, str):
+            data = data.encode()
+        lineno = 1
+        line_start = 0
+        for match in MASTER.finditer(data):
+            kind = match.lastgroup
+            if kind == 'skip':
+                continue
+            start = match.start()
+            if kind == 'newline':
+                lineno += match.end() - start
+                line_start = match.end()
+                continue
+            if kind == 'error':
+                char = match.group().decode('utf-8', 'replace')[0]
+                print(f"Błąd leksykalny: Nieznany znak '{char}' w linii {lineno}")
+                continue
+
+            tok = StreamToken()
+            if kind == 'PIDENTIFIER':
+                value = match.group().decode()
+                tok.type = KEYWORDS.get(value, kind)
+            elif kind == 'NUM':
+                value = int(match.group())
+                tok.type = kind
+            else:
+                value = VALUES[kind]
+                tok.type = kind
+            tok.value = value
+            tok.lineno = lineno
+            tok.index = start
+            tok.end = match.end()
+            tok.column = start - line_start + 1
+            yield tok
+
+
+def benchmark(path):
+    """Porównanie z leksem SLY na jednym pliku: czas i zgodność tokenów."""
+    from lexer import KompilatorLexer
+    with open(path, 'r') as f:
+        text = f.read()
+
+    started = time.perf_counter()
+    expected = [(t.type, t.value, t.lineno) for t in KompilatorLexer().tokenize(text)]
+    sly_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    tokens = [(t.type, t.value, t.lineno) for t in StreamLexer().tokenize_file(path)]
+    stream_time = time.perf_counter() - started
+
+    print(f"Tokenów: {len(tokens)}")
+    print(f"SLY:       {sly_time:.3f} s")
+    print(f"Strumień:  {stream_time:.3f} s ({sly_time / max(stream_time, 1e-9):.1f}x)")
+    print("Tokeny zgodne" if tokens == expected else "Tokeny RÓŻNE")
+    return tokens == expected
+
+
+if __name__ == "__main__":
+    # python3 src/stream_lexer.py plik.imp...
+    sys.exit(0 if all([benchmark(path) for path in sys.argv[1:]]) else 1)
@@ -7,12 +7,17 @@ class Symbol:
         self.array_end = array_end
         self.is_iterator = is_iterator
         self.is_param = is_param     # Czy zmienna jest parametrem procedury
+        # Tablica: adres elementu i to offset + i (address - array_start)
+        self.offset = address - array_start if is_array and not is_param else None
         self.is_initialized = False
+        self.register = None         # Rejestr (e-h) przydzielony przez regalloc
+        self.is_alias = False        # Druga nazwa cudzej zmiennej (nie trafia do rejestru)
 
     def __repr__(self):
         type_s = "Param" if self.is_param else (
             "Array" if self.is_array else "Var")
-        return f"<{self.name}: {type_s} @ {self.address}>"
+        where = f" in {self.register}" if self.register else ""
+        return f"<{self.name}: {type_s} @ {self.address}{where}>"
 
 
 class SymbolTable:
@@ -21,12 +26,29 @@ class SymbolTable:
         # scope[0] to zmienne globalne (Main), scope[1+] to zmienne lokalne procedur
         self.scopes = [{}]
         self.memory_offset = 0
+        self.free_temps = []    # Zwolnione komórki tymczasowe bieżącego zakresu
 
-    def enter_scope(self):
-        self.scopes.append({})
+    def enter_scope(self, scope=None):
+        self.scopes.append({} if scope is None else scope)
+        self.free_temps = []
 
     def exit_scope(self):
         self.scopes.pop()
+        # Temp wywołującego może przeżyć CALL, więc komórki tymczasowe
+        # nie przechodzą między zakresami
+        self.free_temps = []
+
+    def allocate_temp(self):
+        """Komórka na wartość tymczasową - po użyciu należy ją oddać przez free_temp.
+        Zwolnione komórki są wydawane ponownie w kolejności stosowej."""
+        if self.free_temps:
+            return self.free_temps.pop()
+        address = self.memory_offset
+        self.memory_offset += 1
+        return address
+
+    def free_temp(self, address):
+        self.free_temps.append(address)
 
     def get(self, name):
         # Szukaj od najnowszego zakresu (lokalnego) w górę
@@ -53,14 +75,28 @@ class SymbolTable:
             raise Exception(f"Błąd: Druga deklaracja zmiennej '{name}'")
 
         size = end - start + 1
-        address = self.memory_offset
-        self.memory_offset += size
+        # address >= start, żeby wskaźnik bazowy (address - start) był liczbą naturalną
+        address = max(self.memory_offset, start)
+        self.memory_offset = address + size
 
         symbol = Symbol(name, address, is_array=True,
                         array_start=start, array_end=end)
         current_scope[name] = symbol
         return symbol
 
+    def declare_alias(self, name, symbol):
+        """Deklaruje nazwę dla komórek istniejącego symbolu z innego zakresu.
+        Zmienną można też zmienić przez wskaźnik, więc alias zostaje w pamięci."""
+        current_scope = self.scopes[-1]
+        if name in current_scope:
+            raise Exception(f"Błąd: Duplikat parametru '{name}'")
+
+        alias = Symbol(name, symbol.address, is_array=symbol.is_array,
+                       array_start=symbol.array_start, array_end=symbol.array_end)
+        alias.is_alias = True
+        current_scope[name] = alias
+        return alias
+
     def declare_param(self, name, is_array=False):
         """Deklaruje parametr procedury (zawsze pojedyncza komórka pamięci).
         Jeśli is_array=True, zmienna przechowuje wirtualny adres bazowy tablicy."""
@@ -0,0 +1,97 @@
+"""Maszyna wirtualna z vm/mw.cc przepisana na Pythona - do testów, bez budowania
+vm/ (flex, bison, cln). Koszty instrukcji i wejścia/wyjścia jak w oryginale."""
+import random
+
+# Rejestry a-h; mw.cc wywołuje srand(time(NULL)) i wpisuje do nich kolejne rand(),
+# więc początkowa zawartość jest losowa przy każdym uruchomieniu
+REGISTERS = 'abcdefgh'
+RAND_MAX = 2**31 - 1
+
+COSTS = {'LOAD': 50, 'STORE': 50, 'RLOAD': 50, 'RSTORE': 50,
+         'ADD': 5, 'SUB': 5, 'SWP': 5}
+
+
+class MachineError(Exception):
+    pass
+
+
+def parse(text):
+    # Program w formacie .mr -> lista (kod, argument); rejestry jako numery
+    program = []
+    for line in text.splitlines():
+        line = line.split('#', 1)[0].split()
+        if not line:
+            continue
+        op, arg = line[0], line[1] if len(line) > 1 else None
+        if arg is not None:
+            arg = REGISTERS.index(arg) if arg in REGISTERS else int(arg)
+        program.append((op, arg))
+    return program
+
+
+def run(program, inputs=(), max_steps=10_000_000, seed=None):
+    """Wykonuje program; zwraca (wypisane wartości, koszt). seed ustala
+    początkowe rejestry (domyślnie losowe, jak w mw.cc)."""
+    memory = {}
+    rng = random.Random(seed)
+    r = [rng.randint(0, RAND_MAX) for _ in REGISTERS]
+    inputs = list(inputs)
+    output = []
+    lr = cost = steps = 0
+    while True:
+        if not 0 <= lr < len(program):
+            raise MachineError(f"Wywołanie nieistniejącej instrukcji nr {lr}")
+        op, x = program[lr]
+        if op == 'HALT':
+            return output, cost
+        steps += 1
+        if steps > max_steps:
+            raise MachineError("Przekroczony limit kroków")
+        lr += 1
+        if op == 'READ':
+            if not inputs:
+                raise MachineError("Brak danych wejściowych")
+            r[0] = inputs.pop(0)
+            cost += 100
+            continue
+        if op == 'WRITE':
+            output.append(r[0])
+            cost += 100
+            continue
+        cost += COSTS.get(op, 1)
+        if op == 'LOAD':
+            r[0] = memory.get(x, 0)
+        elif op == 'STORE':
+            memory[x] = r[0]
+        elif op == 'RLOAD':
+            r[0] = memory.get(r[x], 0)
+        elif op == 'RSTORE':
+            memory[r[x]] = r[0]
+        elif op == 'ADD':
+            r[0] += r[x]
+        elif op == 'SUB':
+            r[0] -= min(r[0], r[x])
+        elif op == 'SWP':
+            r[0], r[x] = r[x], r[0]
+        elif op == 'RST':
+            r[x] = 0
+        elif op == 'INC':
+            r[x] += 1
+        elif op == 'DEC':
+            r[x] = max(r[x] - 1, 0)
+        elif op == 'SHL':
+            r[x] <<= 1
+        elif op == 'SHR':
+            r[x] >>= 1
+        elif op == 'JUMP':
+            lr = x
+        elif op == 'JPOS':
+            lr = x if r[0] > 0 else lr
+        elif op == 'JZERO':
+            lr = x if r[0] == 0 else lr
+        elif op == 'CALL':
+            r[0], lr = lr, x
+        elif op == 'RTRN':
+            lr = r[0]
+        else:
+            raise MachineError(f"Nieznana instrukcja {op}")
@@ -0,0 +1,89 @@
+"""Wspólne narzędzia testów: kompilacja źródła całym potokiem main.compile_file
+i uruchomienie wyniku na maszynie z machine.py."""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+
+SRC = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+import machine
+from codegen import CodeGenerator
+from instructions import serialize
+from main import compile_file
+from parser import KompilatorParser
+from stream_lexer import StreamLexer
+
+_parser = None
+
+
+class CompileError(Exception):
+    pass
+
+
+def parser():
+    # Jeden parser na cały przebieg testów (budowa tablic jest kosztowna)
+    global _parser
+    if _parser is None:
+        with contextlib.redirect_stderr(io.StringIO()):
+            _parser = KompilatorParser()
+    return _parser
+
+
+def parse(source):
+    # Drzewo AST źródła, bez optymalizacji
+    with contextlib.redirect_stdout(io.StringIO()) as messages:
+        ast = parser().parse(StreamLexer().tokenize(source))
+    if not ast:
+        raise CompileError(messages.getvalue())
+    return ast
+
+
+def generate(ast, **options):
+    # Kod maszyny dla drzewa (po wybranych przez test przebiegach)
+    generator = CodeGenerator(**options)
+    generator.generate(ast)
+    return serialize(generator.code)
+
+
+def compile_source(source, **options):
+    """Kompiluje źródło jak kompilator z linii poleceń; zwraca tekst programu .mr.
+    Opcje idą do compile_file (workers, cache_dir)."""
+    with tempfile.TemporaryDirectory() as directory:
+        input_file = os.path.join(directory, 'program.imp')
+        output_file = os.path.join(directory, 'program.mr')
+        with open(input_file, 'w') as f:
+            f.write(source)
+        with contextlib.redirect_stdout(io.StringIO()) as messages:
+            ok = compile_file(input_file, output_file, parser=parser(), **options)
+        if not ok:
+            raise CompileError(messages.getvalue())
+        with open(output_file) as f:
+            return f.read()
+
+
+def execute(code, inputs=()):
+    # (wypisane wartości, koszt) programu .mr. Dwa uruchomienia z różnymi
+    # rejestrami startowymi - odczyt rejestru przed zapisem zmienia wynik
+    program = machine.parse(code)
+    result = machine.run(program, inputs)
+    if machine.run(program, inputs) != result:
+        raise AssertionError("Wynik zależy od początkowej zawartości rejestrów")
+    return result
+
+
+def instructions(code):
+    # Same kody instrukcji programu .mr
+    return [op for op, _ in machine.parse(code)]
+
+
+class CompilerTestCase(unittest.TestCase):
+
+    def assertOutput(self, source, inputs, expected, **options):
+        output, cost = execute(compile_source(source, **options), inputs)
+        self.assertEqual(output, expected)
+        return cost
@@ -0,0 +1,62 @@
+import unittest
+from support import CompilerTestCase, compile_source, execute, instructions
+from symbol_table import SymbolTable
+
+CONSTANT_INDICES = '''PROGRAM IS
+  n, t[10:20]
+IN
+  READ n;
+  t[10] := n;
+  t[15] := n + 1;
+  t[20] := t[10] + t[15];
+  WRITE t[20];
+  WRITE t[15];
+END
+'''
+
+# Sito Eratostenesa - indeksy zmienne, tablica nie zaczyna się od zera
+SIEVE = '''PROGRAM IS
+  n, j, t[2:100]
+IN
+  READ n;
+  FOR i FROM 2 TO n DO
+    t[i] := 1;
+  ENDFOR
+  FOR i FROM 2 TO n DO
+    IF t[i] = 1 THEN
+      WRITE i;
+      j := i + i;
+      WHILE j <= n DO
+        t[j] := 0;
+        j := j + i;
+      ENDWHILE
+    ENDIF
+  ENDFOR
+END
+'''
+
+
+class ArrayAddressTest(CompilerTestCase):
+
+    def test_offset_is_folded_into_symbol(self):
+        symbols = SymbolTable()
+        symbols.enter_scope()
+        symbols.declare_variable('x')
+        symbols.declare_array('t', 10, 20)
+        t = symbols.get('t')
+        self.assertEqual(t.offset, t.address - 10)
+        self.assertIsNone(symbols.get('x').offset)
+
+    def test_constant_indices_use_direct_cells(self):
+        code = compile_source(CONSTANT_INDICES)
+        self.assertEqual(execute(code, [4])[0], [9, 5])
+        ops = instructions(code)
+        self.assertNotIn('RLOAD', ops)
+        self.assertNotIn('RSTORE', ops)
+
+    def test_variable_indices(self):
+        self.assertOutput(SIEVE, [30], [2, 3, 5, 7, 11, 13, 17, 19, 23, 29])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from support import SRC, CompilerTestCase, execute
+from batch import compile_batch, output_name, read_manifest
+
+GOOD = '''PROGRAM IS
+  x
+IN
+  READ x;
+  x := x * {k};
+  WRITE x;
+END
+'''
+
+BAD = '''PROGRAM IS
+  x
+IN
+  y := 1;
+END
+'''
+
+
+class BatchTest(CompilerTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.files = []
+        for k in range(1, 5):
+            self.files.append(self.write(f'p{k}.imp', GOOD.format(k=k)))
+        self.bad = self.write('zly.imp', BAD)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def run_cli(self, *args):
+        return subprocess.run([sys.executable, os.path.join(SRC, 'main.py'), *args],
+                              capture_output=True, text=True)
+
+    def test_manifest(self):
+        manifest = self.write('lista.txt', '# programy\n\na.imp\nb.imp  wynik.mr  # komentarz\n')
+        self.assertEqual(read_manifest(manifest),
+                         [('a.imp', 'a.mr'), ('b.imp', 'wynik.mr')])
+        self.assertEqual(output_name('katalog/plik.imp'), 'katalog/plik.mr')
+
+    def test_each_file_gets_own_result(self):
+        pairs = [(path, output_name(path)) for path in self.files + [self.bad]]
+        with contextlib.redirect_stdout(io.StringIO()) as report:
+            ok = compile_batch(pairs, workers=2)
+        self.assertFalse(ok)
+        for k, path in enumerate(self.files, 1):
+            with open(output_name(path)) as f:
+                self.assertEqual(execute(f.read(), [5])[0], [5 * k])
+        self.assertFalse(os.path.exists(output_name(self.bad)))
+        lines = report.getvalue().splitlines()
+        self.assertEqual(lines[-1], 'Skompilowano 4 z 5 plików')
+        self.assertIn(f'[BŁĄD] {self.bad}', lines)
+        self.assertIn("Niezadeklarowana zmienna 'y'", report.getvalue())
+
+    def test_exit_codes(self):
+        self.assertEqual(self.run_cli('--batch', '-j', '2', *self.files).returncode, 0)
+        self.assertEqual(self.run_cli('--batch', self.files[0], self.bad).returncode, 1)
+        manifest = self.write('lista.txt', '\n'.join(self.files))
+        self.assertEqual(self.run_cli('--manifest', manifest).returncode, 0)
+        self.assertEqual(self.run_cli('--manifest', manifest + '.brak').returncode, 2)
+        self.assertEqual(self.run_cli('--batch').returncode, 2)
+        self.assertEqual(self.run_cli('--batch', '-j', 'x', *self.files).returncode, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+from support import CompilerTestCase, compile_source, execute, instructions
+
+OPERATORS = {'=': int.__eq__, '!=': int.__ne__, '<': int.__lt__,
+             '>': int.__gt__, '<=': int.__le__, '>=': int.__ge__}
+
+IF_ELSE = '''PROGRAM IS
+  x, y
+IN
+  READ x;
+  READ y;
+  IF {left} {op} {right} THEN
+    WRITE 1;
+  ELSE
+    WRITE 0;
+  ENDIF
+END
+'''
+
+IF_ONLY = '''PROGRAM IS
+  x, y
+IN
+  READ x;
+  READ y;
+  IF x {op} y THEN
+    WRITE 1;
+  ENDIF
+  WRITE 2;
+END
+'''
+
+WHILE_LOOP = '''PROGRAM IS
+  x, y, c
+IN
+  READ x;
+  READ y;
+  c := 0;
+  WHILE x {op} y DO
+    x := x + 1;
+    y := y - 1;
+    c := c + 1;
+  ENDWHILE
+  WRITE c;
+END
+'''
+
+VALUES = [0, 1, 2, 7]
+
+
+def while_count(op, x, y):
+    count = 0
+    while OPERATORS[op](x, y):
+        x, y, count = x + 1, max(y - 1, 0), count + 1
+    return count
+
+
+class BranchLayoutTest(CompilerTestCase):
+
+    def test_conditions(self):
+        for op, python in OPERATORS.items():
+            for left, right in (('x', 'y'), ('x', '0'), ('0', 'y'), ('x', '2')):
+                code = compile_source(IF_ELSE.format(left=left, op=op, right=right))
+                for x in VALUES:
+                    for y in VALUES:
+                        a = x if left == 'x' else int(left)
+                        b = y if right == 'y' else int(right)
+                        self.assertEqual(execute(code, [x, y])[0], [int(python(a, b))],
+                                         (left, op, right, x, y))
+
+    def test_if_without_else(self):
+        for op, python in OPERATORS.items():
+            code = compile_source(IF_ONLY.format(op=op))
+            for x in VALUES:
+                for y in VALUES:
+                    expected = [1, 2] if python(x, y) else [2]
+                    self.assertEqual(execute(code, [x, y])[0], expected, (op, x, y))
+
+    def test_while_loops(self):
+        # Dla '!=' tylko wejścia, przy których pętla się kończy
+        cases = {'<': ((0, 7), (2, 2), (7, 0), (0, 1)), '<=': ((0, 7), (2, 2), (7, 0)),
+                 '=': ((2, 2), (0, 1), (0, 0)), '!=': ((0, 6), (2, 2), (1, 3))}
+        for op, pairs in cases.items():
+            code = compile_source(WHILE_LOOP.format(op=op))
+            for x, y in pairs:
+                self.assertEqual(execute(code, [x, y])[0], [while_count(op, x, y)],
+                                 (op, x, y))
+
+    def test_rotated_loop_has_one_unconditional_jump(self):
+        # Jedyny JUMP to wejście na test na dole pętli
+        ops = instructions(compile_source(WHILE_LOOP.format(op='<')))
+        self.assertEqual(ops.count('JUMP'), 1)
+
+    def test_comparison_with_zero_is_one_jump(self):
+        ops = instructions(compile_source(IF_ELSE.format(left='x', op='=', right='0')))
+        self.assertNotIn('SUB', ops)
+        self.assertEqual(sum(op in ('JPOS', 'JZERO') for op in ops), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+from support import CompilerTestCase, compile_source, execute
+from codegen import plan_number, synthesize
+from instructions import cost
+
+VALUES = [0, 1, 2, 3, 5, 7, 8, 15, 16, 17, 100, 255, 256, 1000, 1023, 1025,
+          123456789, 2 ** 40 + 3, 2 ** 61 - 1]
+
+
+def apply(start, steps):
+    # Wartość r_a po krokach INC/DEC/SHL
+    value = start
+    for instr in steps:
+        if instr.op == 'INC':
+            value += 1
+        elif instr.op == 'DEC':
+            value = max(value - 1, 0)
+        else:
+            value *= 2
+    return value
+
+
+class ConstantMaterializationTest(CompilerTestCase):
+
+    def test_plan_reaches_value(self):
+        for start in (0, 1, 40):
+            for value in VALUES:
+                planned, memo = plan_number(start, value)
+                steps = synthesize(start, value, memo)
+                self.assertEqual(apply(start, steps), value)
+                self.assertEqual(cost(steps), planned)
+
+    def test_plan_is_not_worse_than_binary(self):
+        # Metoda binarna od zera: INC, potem SHL i ewentualnie INC na każdy bit
+        for value in VALUES[1:]:
+            binary = 1 + (value.bit_length() - 1) + bin(value).count('1') - 1
+            self.assertLessEqual(plan_number(0, value)[0], binary)
+        self.assertEqual(plan_number(0, 2 ** 20 - 1)[0], 22)
+
+    def test_written_constants(self):
+        source = 'PROGRAM IS\nIN\n' + ''.join(f'  WRITE {v};\n' for v in VALUES) + 'END\n'
+        self.assertOutput(source, [], VALUES)
+
+    def test_next_constant_starts_from_known_register(self):
+        _, one = execute(compile_source('PROGRAM IS\nIN\n  WRITE 123456789;\nEND\n'))
+        _, two = execute(compile_source(
+            'PROGRAM IS\nIN\n  WRITE 123456789;\n  WRITE 123456790;\nEND\n'))
+        self.assertEqual(two - one, 100 + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+from support import CompilerTestCase, parse
+from ast_nodes import Assign, If, Number, While, Write
+from constfold import ConstantFolder
+
+
+def fold(source):
+    return ConstantFolder().fold(parse(source)).main.commands
+
+
+class ConstantFoldingTest(CompilerTestCase):
+
+    def test_propagates_through_straight_line_code(self):
+        commands = fold('''PROGRAM IS
+  x, y, z
+IN
+  x := 6;
+  y := x * 7;
+  z := y - 2;
+  WRITE z;
+END
+''')
+        self.assertIsInstance(commands[1].expression, Number)
+        self.assertEqual(commands[2].expression.value, 40)
+        self.assertEqual(commands[3].value.value, 40)
+
+    def test_machine_semantics(self):
+        # Odejmowanie nasyca się na zerze, dzielenie i reszta przez 0 dają 0
+        self.assertOutput('''PROGRAM IS
+  a, b, c, d, z
+IN
+  z := 0;
+  a := 3 - 5;
+  b := 7 / z;
+  c := 7 % z;
+  d := 17 % 5;
+  WRITE a; WRITE b; WRITE c; WRITE d;
+END
+''', [], [0, 0, 0, 2])
+
+    def test_known_branches_and_empty_loops_are_removed(self):
+        commands = fold('''PROGRAM IS
+  x, y
+IN
+  x := 1;
+  IF x = 1 THEN
+    y := 2;
+  ELSE
+    y := 3;
+  ENDIF
+  WHILE y > 5 DO
+    x := x + 1;
+  ENDWHILE
+  WRITE y;
+END
+''')
+        self.assertFalse([cmd for cmd in commands if isinstance(cmd, (If, While))])
+        self.assertEqual(commands[-1].value.value, 2)
+
+    def test_values_changed_in_loops_and_calls_are_not_propagated(self):
+        self.assertOutput('''PROCEDURE zmien(O r) IS
+IN
+  r := 10;
+END
+
+PROGRAM IS
+  x, y, n
+IN
+  READ n;
+  x := 1;
+  y := 1;
+  WHILE n > 0 DO
+    x := x + 1;
+    n := n - 1;
+  ENDWHILE
+  zmien(y);
+  WRITE x;
+  WRITE y;
+END
+''', [4], [5, 10])
+
+    def test_unknown_value_after_branches(self):
+        commands = fold('''PROGRAM IS
+  x, n
+IN
+  READ n;
+  IF n > 0 THEN
+    x := 1;
+  ELSE
+    x := 2;
+  ENDIF
+  WRITE x;
+END
+''')
+        write = commands[-1]
+        self.assertIsInstance(write, Write)
+        self.assertNotIsInstance(write.value, Number)
+
+
+if __name__ == '__main__':
+    unittest.main()
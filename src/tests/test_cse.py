@@ -0,0 +1,119 @@
+import unittest
+from support import CompilerTestCase, compile_source, execute, generate, parse
+from cse import CommonSubexpressions
+
+REPEATED = '''PROGRAM IS
+  x, y, a, b
+IN
+  READ x;
+  READ y;
+  a := x * y;
+  b := x {op} y;
+  WRITE a;
+  WRITE b;
+END
+'''
+
+# Zmiana operandu, elementu tablicy albo wyrażenie tylko w jednej gałęzi
+KILLED = '''PROGRAM IS
+  x, y, i, a, b, c, d, t[0:3]
+IN
+  READ x;
+  READ y;
+  READ i;
+  t[i] := y;
+  a := x * y;
+  x := x + 1;
+  b := x * y;
+  c := t[i] * x;
+  t[i] := 5;
+  d := t[i] * x;
+  WRITE a; WRITE b; WRITE c; WRITE d;
+  IF y > 2 THEN
+    a := y / x;
+  ELSE
+    a := 1;
+  ENDIF
+  b := y / x;
+  WRITE a; WRITE b;
+END
+'''
+
+# Wyjściowy parametr r może być tą samą zmienną co x
+ALIASED = '''PROCEDURE p(I x, I y, O r) IS
+  a, b
+IN
+  a := x * y;
+  r := 1;
+  b := x * y;
+  r := a + b;
+END
+
+PROGRAM IS
+  u, v
+IN
+  READ u;
+  READ v;
+  p(u, v, u);
+  WRITE u;
+END
+'''
+
+# Parametr n nie jest wynoszony przed pętlę (pętla zapisuje parametr r), więc
+# krok j := j + n przesuwa wskaźnik t[j] i jednocześnie pasuje do x := j + n
+INDUCTION_STEP = '''PROCEDURE p(T t, I n, O r) IS
+  j, x
+IN
+  j := 1;
+  WHILE j < 9 DO
+    t[j] := j;
+    x := j + n;
+    j := j + n;
+    r := x;
+  ENDWHILE
+  WRITE 1; WRITE 2; WRITE 3; WRITE 4; WRITE 5; WRITE 6; WRITE 7; WRITE 8; WRITE 9; WRITE 10;
+END
+
+PROGRAM IS
+  a[0:10], b[0:10], n, m, r, s
+IN
+  READ n;
+  READ m;
+  p(a, n, r);
+  p(b, m, s);
+  p(a, m, r);
+  p(b, n, s);
+  p(a, n, s);
+  WRITE a[7];
+  WRITE b[7];
+  WRITE r;
+  WRITE s;
+END
+'''
+
+
+class CommonSubexpressionsTest(CompilerTestCase):
+
+    def test_induction_step_is_left_intact(self):
+        self.assertOutput(INDUCTION_STEP, [2, 3], list(range(1, 11)) * 5 + [7, 7, 10, 9])
+
+    def test_repeated_expression_is_computed_once(self):
+        inputs = [2 ** 40 + 3, 2 ** 30 + 7]
+        output, repeated = execute(compile_source(REPEATED.format(op='*')), inputs)
+        _, single = execute(compile_source(REPEATED.format(op='+')), inputs)
+        self.assertEqual(output, [inputs[0] * inputs[1]] * 2)
+        self.assertLess(repeated, single + 100)
+
+    def test_changed_operands_are_recomputed(self):
+        for x, y, i in ((3, 4, 0), (6, 1, 3)):
+            x1 = x + 1
+            self.assertOutput(KILLED, [x, y, i], [
+                x * y, x1 * y, y * x1, 5 * x1, y // x1 if y > 2 else 1, y // x1])
+
+    def test_write_through_aliased_parameter(self):
+        code = generate(CommonSubexpressions().optimize(parse(ALIASED)))
+        self.assertEqual(execute(code, [6, 7])[0], [6 * 7 + 7])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+from support import CompileError, CompilerTestCase, compile_source, instructions, parse
+from deadcode import DeadCodeElimination
+
+DEAD_STORES = '''PROGRAM IS
+  x, y, z
+IN
+  READ x;
+  y := x * x;
+  z := x + 1;
+  y := z + 2;
+  z := y / 3;
+  WRITE y;
+END
+'''
+
+# Wartość z poprzedniego obrotu jest żywa w następnym
+LOOP_CARRIED = '''PROGRAM IS
+  n, p, q, r
+IN
+  READ n;
+  p := 0;
+  q := 1;
+  r := 0;
+  WHILE n > 0 DO
+    r := p;
+    p := q;
+    q := r + q;
+    n := n - 1;
+  ENDWHILE
+  WRITE p;
+END
+'''
+
+UNUSED_PROCEDURE = '''PROCEDURE nieuzywana(I a, O b) IS
+IN
+  b := a * a;
+  b := b * a;
+END
+
+PROCEDURE zapisz(I a, O b) IS
+  t
+IN
+  t := a + 1;
+  b := t;
+  t := 7;
+END
+
+PROGRAM IS
+  x, y
+IN
+  READ x;
+  zapisz(x, y);
+  WRITE y;
+END
+'''
+
+
+class DeadCodeTest(CompilerTestCase):
+
+    def test_dead_stores_are_removed(self):
+        ops = instructions(compile_source(DEAD_STORES))
+        self.assertEqual(ops.count('SHL') + ops.count('SHR'), 0)
+        self.assertOutput(DEAD_STORES, [5], [8])
+
+    def test_loop_carried_values_stay(self):
+        self.assertOutput(LOOP_CARRIED, [10], [55])
+
+    def test_unreachable_procedure_is_removed(self):
+        program = DeadCodeElimination().optimize(parse(UNUSED_PROCEDURE))
+        self.assertEqual([proc.name for proc in program.procedures], ['zapisz'])
+        # Zapis do parametru zostaje, martwy zapis do lokalnej t znika
+        self.assertEqual(len(program.procedures[0].commands), 2)
+        self.assertOutput(UNUSED_PROCEDURE, [4], [5])
+
+    def test_errors_in_removed_code_are_reported(self):
+        with self.assertRaises(CompileError):
+            compile_source(UNUSED_PROCEDURE.replace('b := b * a;', 'b := b * c;'))
+        with self.assertRaises(CompileError):
+            compile_source(UNUSED_PROCEDURE.replace('b := b * a;', 'brak(a, b);'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+from support import CompilerTestCase, compile_source, execute
+
+QUOTIENT_AND_REMAINDER = '''PROGRAM IS
+  x, y, q, r
+IN
+  READ x;
+  READ y;
+  q := x / y;
+  r := x % y;
+  WRITE q;
+  WRITE r;
+END
+'''
+
+QUOTIENT_AND_SUM = QUOTIENT_AND_REMAINDER.replace('x % y', 'x + y')
+
+VALUES = [0, 1, 2, 3, 7, 10, 255, 1000, 2 ** 31 + 5, 2 ** 40 + 3]
+
+# Siedem gorących zmiennych zajmuje rejestry e-h - x i y zostają w pamięci
+SPILLED_OPERANDS = '''PROGRAM IS
+  x, y, q, r, a1, a2, a3, a4, a5, a6, a7
+IN
+  READ a1;
+  a2 := a1; a3 := a1; a4 := a1; a5 := a1; a6 := a1; a7 := a1;
+  FOR k FROM 1 TO 10 DO
+    a1 := a1 + k; a2 := a2 + a1; a3 := a3 + a2; a4 := a4 + a3;
+    a5 := a5 + a4; a6 := a6 + a5; a7 := a7 + a6;
+  ENDFOR
+  READ x;
+  READ y;
+  q := x / y;
+  READ x;
+  r := x % y;
+  WRITE r;
+  WRITE q;
+  WRITE a1; WRITE a2; WRITE a3; WRITE a4; WRITE a5; WRITE a6; WRITE a7;
+END
+'''
+
+
+class DivisionTest(CompilerTestCase):
+
+    def test_quotient_and_remainder(self):
+        code = compile_source(QUOTIENT_AND_REMAINDER)
+        for x in VALUES:
+            for y in VALUES:
+                expected = [x // y, x % y] if y else [0, 0]
+                self.assertEqual(execute(code, [x, y])[0], expected, (x, y))
+
+    def test_remainder_reuses_quotient_run(self):
+        # Reszta z tych samych argumentów nie uruchamia dzielenia drugi raz
+        inputs = [2 ** 40 + 3, 7]
+        _, both = execute(compile_source(QUOTIENT_AND_REMAINDER), inputs)
+        _, one = execute(compile_source(QUOTIENT_AND_SUM), inputs)
+        self.assertLess(both - one, 50)
+        self.assertGreater(one, 1000)
+
+    def test_store_to_operand_in_memory_drops_cached_result(self):
+        # Zapis READ do x w pamięci musi unieważnić iloraz i resztę 17 / 5
+        output, _ = execute(compile_source(SPILLED_OPERANDS), [0, 17, 5, 23])
+        self.assertEqual(output[:2], [3, 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+from support import CompilerTestCase, compile_source, execute
+
+RANGE = '''PROGRAM IS
+  a, b
+IN
+  READ a;
+  READ b;
+  FOR i FROM a {direction} b DO
+    WRITE i;
+  ENDFOR
+END
+'''
+
+SUM = '''PROGRAM IS
+  n, s
+IN
+  READ n;
+  s := 0;
+  FOR i FROM 1 TO n DO
+    s := s + i;
+  ENDFOR
+  WRITE s;
+END
+'''
+
+# Zmiana zmiennej granicy w ciele nie zmienia liczby obrotów
+BOUNDS_ONCE = '''PROGRAM IS
+  n, c
+IN
+  READ n;
+  c := 0;
+  FOR i FROM n DOWNTO 1 DO
+    n := n + 1;
+    c := c + 1;
+  ENDFOR
+  WRITE c;
+  WRITE n;
+END
+'''
+
+
+class ForLoopTest(CompilerTestCase):
+
+    def test_counting_up_and_down(self):
+        up = compile_source(RANGE.format(direction='TO'))
+        down = compile_source(RANGE.format(direction='DOWNTO'))
+        for a, b in ((1, 5), (3, 3), (5, 1), (0, 0), (0, 3), (2 ** 40, 2 ** 40 + 2)):
+            self.assertEqual(execute(up, [a, b])[0], list(range(a, b + 1)), (a, b))
+            self.assertEqual(execute(down, [a, b])[0], list(range(a, b - 1, -1)), (a, b))
+
+    def test_downto_zero(self):
+        self.assertOutput(RANGE.format(direction='DOWNTO'), [3, 0], [3, 2, 1, 0])
+
+    def test_bounds_are_evaluated_once(self):
+        self.assertOutput(BOUNDS_ONCE, [4], [4, 8])
+
+    def test_iteration_overhead(self):
+        # Licznik i iterator w rejestrach - obrót pętli bez dostępu do pamięci
+        code = compile_source(SUM)
+        output, long = execute(code, [101])
+        _, short = execute(code, [1])
+        self.assertEqual(output, [101 * 102 // 2])
+        self.assertLess((long - short) / 100, 50)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+from support import CompilerTestCase, execute, parse
+from codegen import CodeGenerator
+from instructions import serialize
+
+# Tablice lokalne zawsze leżą w pamięci - widać na nich układ ramek
+FRAMES = '''PROCEDURE p1(I x, O y) IS
+  u[0:3]
+IN
+  u[0] := x;
+  u[3] := u[0] + 1;
+  y := u[3];
+END
+
+PROCEDURE p2(I x, O y) IS
+  v[0:3]
+IN
+  v[1] := x;
+  v[2] := v[1] + 2;
+  y := v[2];
+END
+
+PROCEDURE q(I x, O y) IS
+  w[0:3], z
+IN
+  w[0] := x;
+  w[1] := x + 5;
+  p1(x, z);
+  p2(z, z);
+  y := w[0] + w[1];
+  y := y + z;
+END
+
+PROGRAM IS
+  a, b
+IN
+  READ a;
+  p1(a, b);
+  WRITE b;
+  p2(a, b);
+  WRITE b;
+  q(a, b);
+  WRITE b;
+END
+'''
+
+
+def compile_frames():
+    generator = CodeGenerator()
+    generator.generate(parse(FRAMES))
+    return generator, serialize(generator.code)
+
+
+class FrameOverlayTest(CompilerTestCase):
+
+    def test_siblings_share_cells(self):
+        generator, _ = compile_frames()
+        ends = generator.frame_ends
+        self.assertEqual(ends['p1'], ends['p2'])
+
+    def test_caller_frame_lies_above_callees(self):
+        generator, _ = compile_frames()
+        ends = generator.frame_ends
+        self.assertGreaterEqual(ends['q'], max(ends['p1'], ends['p2']) + 4)
+
+    def test_caller_locals_survive_calls(self):
+        _, code = compile_frames()
+        self.assertEqual(execute(code, [10])[0], [11, 12, 10 + 15 + 13])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import unittest
+from support import CompilerTestCase, execute, generate, parse
+from ast_nodes import While
+from constfold import ConstantFolder
+from cse import CommonSubexpressions
+from deadcode import DeadCodeElimination
+from induction import InductionVariables
+from inliner import Inliner
+from licm import LoopInvariantMotion
+from specializer import Specializer
+
+SIEVE = '''PROCEDURE sito(T s, I n) IS
+  j
+IN
+  FOR i FROM 2 TO n DO
+    s[i] := 1;
+  ENDFOR
+  FOR i FROM 2 TO n DO
+    IF s[i] = 1 THEN
+      j := i + i;
+      WHILE j <= n DO
+        s[j] := 0;
+        j := j + i;
+      ENDWHILE
+    ENDIF
+  ENDFOR
+END
+
+PROGRAM IS
+  n, t[0:200]
+IN
+  READ n;
+  sito(t, n);
+  FOR i FROM 2 TO n DO
+    IF t[i] = 1 THEN
+      WRITE i;
+    ENDIF
+  ENDFOR
+END
+'''
+
+# Kroki w gałęzi, dwa kroki na obrót, odczyt przed i po kroku, DOWNTO
+IRREGULAR = '''PROGRAM IS
+  n, j, k, t[0:50]
+IN
+  READ n;
+  FOR i FROM 0 TO 50 DO
+    t[i] := i;
+  ENDFOR
+  j := 0;
+  k := 0;
+  WHILE j < n DO
+    t[j] := t[j] + 100;
+    j := j + 1;
+    t[j] := t[j] + 1000;
+    IF k = 0 THEN
+      j := j + 2;
+      k := 1;
+    ELSE
+      k := 0;
+    ENDIF
+    j := j + k;
+  ENDWHILE
+  FOR i FROM 12 DOWNTO 3 DO
+    t[i] := t[i] + t[i];
+  ENDFOR
+  FOR i FROM 0 TO 15 DO
+    WRITE t[i];
+  ENDFOR
+END
+'''
+
+
+def irregular(n):
+    t = list(range(51))
+    j = k = 0
+    while j < n:
+        t[j] += 100
+        j += 1
+        t[j] += 1000
+        if k == 0:
+            j += 2
+            k = 1
+        else:
+            k = 0
+        j += k
+    for i in range(12, 2, -1):
+        t[i] += t[i]
+    return t[:16]
+
+
+def optimized(source, induction=True):
+    # Przebiegi main.compile_file, opcjonalnie bez zmiennych indukcyjnych
+    ast = ConstantFolder().fold(Inliner().inline(parse(source)))
+    ast = ConstantFolder().fold(Specializer().specialize(ast))
+    ast = LoopInvariantMotion().optimize(DeadCodeElimination().optimize(ast))
+    if induction:
+        ast = InductionVariables().optimize(ast)
+    return CommonSubexpressions().optimize(ast)
+
+
+def primes(n):
+    return [p for p in range(2, n + 1) if all(p % d for d in range(2, p))]
+
+
+class InductionVariablesTest(CompilerTestCase):
+
+    def test_sieve_inner_loop_gets_pointer(self):
+        program = InductionVariables().optimize(parse(SIEVE))
+        inner = program.procedures[0].commands[1].commands[0].commands_then[1]
+        self.assertIsInstance(inner, While)
+        self.assertEqual(list(inner.pointers.values()), [('s', 'j')])
+        self.assertEqual(len(inner.commands[1].bumps), 1)
+
+    def test_pointers_make_sieve_cheaper(self):
+        inputs = [200]
+        output, reduced = execute(generate(optimized(SIEVE)), inputs)
+        plain_output, plain = execute(generate(optimized(SIEVE, induction=False)), inputs)
+        self.assertEqual(output, primes(200))
+        self.assertEqual(plain_output, output)
+        self.assertLess(reduced, plain)
+
+    def test_irregular_steps(self):
+        for n in (0, 1, 9, 14):
+            self.assertOutput(IRREGULAR, [n], irregular(n))
+
+
+if __name__ == '__main__':
+    unittest.main()
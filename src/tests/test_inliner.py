@@ -0,0 +1,107 @@
+import unittest
+from support import CompilerTestCase, compile_source, execute, instructions, parse
+from inliner import Inliner
+
+GCD = '''PROCEDURE gcd(I a, I b, O c) IS
+  x, y
+IN
+  x := a;
+  y := b;
+  WHILE y > 0 DO
+    c := x % y;
+    x := y;
+    y := c;
+  ENDWHILE
+  c := x;
+END
+
+PROGRAM IS
+  x, y, z, w
+IN
+  READ x;
+  READ y;
+  w := 6;
+  gcd(x, y, z);
+  WRITE z;
+  gcd(z, w, x);
+  WRITE x;
+  WRITE y;
+END
+'''
+
+HAND_INLINED = '''PROGRAM IS
+  x, y, z, w, p, q
+IN
+  READ x;
+  READ y;
+  w := 6;
+  p := x;
+  q := y;
+  WHILE q > 0 DO
+    z := p % q;
+    p := q;
+    q := z;
+  ENDWHILE
+  z := p;
+  WRITE z;
+  p := z;
+  q := w;
+  WHILE q > 0 DO
+    x := p % q;
+    p := q;
+    q := x;
+  ENDWHILE
+  x := p;
+  WRITE x;
+  WRITE y;
+END
+'''
+
+# Duża procedura wołana wiele razy zostaje wywołaniem
+BODY = ''.join(f'  s := s + {k};\n  t := t * 2;\n' for k in range(20))
+LARGE = f'''PROCEDURE duza(I s, O t) IS
+IN
+  t := 1;
+{BODY}END
+
+PROGRAM IS
+  a, b, c, d
+IN
+  READ a;
+  duza(a, b);
+  duza(b, c);
+  duza(c, d);
+  duza(d, a);
+  WRITE a;
+END
+'''
+
+
+class InlinerTest(CompilerTestCase):
+
+    def test_small_procedure_is_inlined(self):
+        program = Inliner().inline(parse(GCD))
+        self.assertEqual(program.procedures, [])
+        code = compile_source(GCD)
+        self.assertNotIn('CALL', instructions(code))
+        self.assertEqual(execute(code, [84, 36])[0], [12, 6, 36])
+
+    def test_costs_as_much_as_hand_inlined_code(self):
+        inputs = [2 ** 40, 3 * 2 ** 20]
+        output, inlined = execute(compile_source(GCD), inputs)
+        expected, by_hand = execute(compile_source(HAND_INLINED), inputs)
+        self.assertEqual(output, expected)
+        self.assertLessEqual(inlined, by_hand)
+
+    def test_large_procedure_called_often_is_kept(self):
+        program = Inliner().inline(parse(LARGE))
+        self.assertEqual([proc.name for proc in program.procedures], ['duza'])
+        self.assertIn('CALL', instructions(compile_source(LARGE)))
+
+    def test_undeclared_name_in_inlined_body(self):
+        with self.assertRaises(Exception):
+            Inliner().inline(parse(GCD.replace('c := x;', 'c := z;')))
+
+
+if __name__ == '__main__':
+    unittest.main()
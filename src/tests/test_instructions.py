@@ -0,0 +1,63 @@
+import unittest
+from support import CompilerTestCase, execute, parse
+from codegen import CodeGenerator
+from instructions import Instruction as I, Label, cost, serialize
+from linker import MAIN_UNIT, CodeUnit, link
+
+PROGRAM = '''PROCEDURE dodaj(I a, O b) IS
+IN
+  b := b + a;
+  WHILE b > 100 DO
+    b := b - 100;
+  ENDWHILE
+END
+
+PROGRAM IS
+  x, y, n
+IN
+  READ x;
+  READ n;
+  y := 0;
+  FOR i FROM 1 TO n DO
+    dodaj(x, y);
+  ENDFOR
+  WRITE y;
+END
+'''
+
+
+class InstructionsTest(CompilerTestCase):
+
+    def test_serialize(self):
+        code = [I('READ'), I('SWP', 'e'), I('STORE', 12), I('JUMP', 0), I('HALT')]
+        self.assertEqual(serialize(code), 'READ\nSWP e\nSTORE 12\nJUMP 0\nHALT\n')
+        self.assertEqual(cost(code), 100 + 5 + 50 + 1)
+
+    def test_instructions_compare_by_value(self):
+        self.assertEqual(I('ADD', 'b'), I('ADD', 'b'))
+        self.assertNotEqual(I('ADD', 'b'), I('ADD', 'c'))
+        self.assertEqual(len({I('INC', 'a'), I('INC', 'a'), I('HALT')}), 2)
+        self.assertNotEqual(Label(1), Label(1))
+
+    def test_link_resolves_labels_and_calls(self):
+        loop = Label(1)
+        proc = CodeUnit('p', [I('INC', 'b'), I('JPOS', loop), I('RTRN')], {loop: 0})
+        end = Label(1)
+        main = CodeUnit(MAIN_UNIT, [I('CALL', 'p'), I('JUMP', end), I('HALT')], {end: 2})
+        self.assertEqual(link([proc, main]), [
+            I('JUMP', 4), I('INC', 'b'), I('JPOS', 1), I('RTRN'),
+            I('CALL', 1), I('JUMP', 6), I('HALT')])
+        with self.assertRaises(Exception):
+            link([CodeUnit(MAIN_UNIT, [I('JUMP', Label(2))], {})])
+
+    def test_generated_code_has_no_symbolic_operands(self):
+        generator = CodeGenerator()
+        generator.generate(parse(PROGRAM))
+        self.assertFalse([instr for instr in generator.code
+                          if isinstance(instr.arg, Label) or instr.op == 'CALL'
+                          and not isinstance(instr.arg, int)])
+        self.assertEqual(execute(serialize(generator.code), [70, 5])[0], [50])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import unittest
+from support import CompilerTestCase, compile_source, execute
+
+WHILE_LOOP = '''PROGRAM IS
+  n, a, b, s, t
+IN
+  READ n;
+  READ a;
+  READ b;
+  s := 0;
+  WHILE n > 0 DO
+    t := a {op} b;
+    s := s + t;
+    n := n - 1;
+  ENDWHILE
+  WRITE s;
+END
+'''
+
+FOR_LOOP = '''PROGRAM IS
+  n, a, b, s, t
+IN
+  READ n;
+  READ a;
+  READ b;
+  s := 0;
+  FOR i FROM 1 TO n DO
+    t := a {op} b;
+    s := s + t;
+  ENDFOR
+  WRITE s;
+END
+'''
+
+RARE_BRANCH = '''PROGRAM IS
+  n, a, b, s, t
+IN
+  READ n;
+  READ a;
+  READ b;
+  s := 0;
+  FOR i FROM 1 TO n DO
+    IF i = 0 THEN
+      t := a {op} b;
+      s := s + t;
+    ENDIF
+    s := s + i;
+  ENDFOR
+  WRITE s;
+END
+'''
+
+A, B = 10 ** 9, 3
+
+
+def run(template, op, trips):
+    return execute(compile_source(template.format(op=op)), [trips, A, B])
+
+
+class LoopInvariantMotionTest(CompilerTestCase):
+
+    def test_invariant_division_is_computed_once(self):
+        output, divide = run(WHILE_LOOP, '/', 50)
+        self.assertEqual(output, [50 * (A // B)])
+        _, add = run(WHILE_LOOP, '+', 50)
+        division = run(WHILE_LOOP, '/', 1)[1] - run(WHILE_LOOP, '+', 1)[1]
+        self.assertLess(divide - add, 2 * division)
+
+    def test_while_running_zero_times_skips_hoisted_code(self):
+        output, divide = run(WHILE_LOOP, '/', 0)
+        self.assertEqual(output, [0])
+        self.assertLessEqual(divide, run(WHILE_LOOP, '+', 0)[1])
+
+    def test_for_running_zero_times_skips_hoisted_code(self):
+        output, divide = run(FOR_LOOP, '/', 0)
+        self.assertEqual(output, [0])
+        self.assertLessEqual(divide, run(FOR_LOOP, '+', 0)[1])
+        self.assertEqual(run(FOR_LOOP, '/', 7)[0], [7 * (A // B)])
+
+    def test_branch_not_taken_does_not_pay_for_division(self):
+        output, divide = run(RARE_BRANCH, '/', 20)
+        self.assertEqual(output, [20 * 21 // 2])
+        self.assertEqual(divide, run(RARE_BRANCH, '+', 20)[1])
+
+    def test_guarded_loops_keep_semantics(self):
+        self.assertOutput('''PROGRAM IS
+  n, a, b, s, t[0:3]
+IN
+  READ n;
+  READ a;
+  READ b;
+  t[0] := 2; t[1] := 3; t[2] := 5; t[3] := 7;
+  s := 0;
+  REPEAT
+    s := s + t[b];
+    n := n - 1;
+  UNTIL n = 0;
+  FOR i FROM a DOWNTO b DO
+    s := s + t[b];
+  ENDFOR
+  WRITE s;
+END
+''', [4, 3, 2], [4 * 5 + 2 * 5])
+
+
+if __name__ == '__main__':
+    unittest.main()
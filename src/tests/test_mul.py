@@ -0,0 +1,42 @@
+import unittest
+from support import CompilerTestCase, compile_source, execute, instructions
+
+PRODUCT = '''PROGRAM IS
+  x, y, z
+IN
+  READ x;
+  READ y;
+  z := x * y;
+  WRITE z;
+END
+'''
+
+VALUES = [0, 1, 2, 3, 7, 255, 1000, 2 ** 31 + 5, 2 ** 40 + 3]
+
+
+class MultiplicationTest(CompilerTestCase):
+
+    def test_products(self):
+        code = compile_source(PRODUCT)
+        for x in VALUES:
+            for y in VALUES:
+                self.assertEqual(execute(code, [x, y])[0], [x * y], (x, y))
+
+    def test_loop_runs_over_smaller_factor(self):
+        # Koszt zależy od bitów mniejszego czynnika, nie od kolejności
+        code = compile_source(PRODUCT)
+        _, left = execute(code, [2 ** 40 + 3, 3])
+        _, right = execute(code, [3, 2 ** 40 + 3])
+        _, large = execute(code, [2 ** 40 + 3, 2 ** 40 + 3])
+        self.assertLessEqual(abs(left - right), 3 * 5)
+        self.assertLess(left + 200, large)
+
+    def test_multiplication_does_not_touch_memory(self):
+        def memory(source):
+            ops = instructions(compile_source(source))
+            return sum(op in ('LOAD', 'STORE', 'RLOAD', 'RSTORE') for op in ops)
+        self.assertEqual(memory(PRODUCT), memory(PRODUCT.replace('x * y', 'x + y')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import io
+import marshal
+import os
+import tempfile
+import unittest
+from sly import Parser
+from sly.yacc import SlyLogger
+from support import CompilerTestCase, parser
+import parser_cache
+from parser import KompilatorParser
+
+
+class ParserCacheTest(CompilerTestCase):
+
+    def setUp(self):
+        parser()
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'cache', 'parsetab.marshal')
+        self.key = parser_cache.signature(KompilatorParser._grammar, KompilatorParser.tokens)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_saved_tables_are_loaded(self):
+        table = KompilatorParser._lrtable
+        parser_cache.save(self.key, table, self.path)
+        loaded = parser_cache.load(self.key, self.path)
+        self.assertEqual(loaded.lr_action, table.lr_action)
+        self.assertEqual(loaded.lr_goto, table.lr_goto)
+        self.assertEqual(loaded.defaulted_states, table.defaulted_states)
+
+    def test_key_depends_on_grammar_and_tokens(self):
+        grammar = KompilatorParser._grammar
+        self.assertEqual(parser_cache.signature(grammar, KompilatorParser.tokens), self.key)
+        self.assertNotEqual(
+            parser_cache.signature(grammar, KompilatorParser.tokens | {'NOWY'}), self.key)
+        parser_cache.save(self.key, KompilatorParser._lrtable, self.path)
+        self.assertIsNone(parser_cache.load(self.key + ' ', self.path))
+
+    def test_missing_or_damaged_file(self):
+        self.assertIsNone(parser_cache.load(self.key, self.path))
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, 'wb') as f:
+            f.write(b'\x00uszkodzony')
+        self.assertIsNone(parser_cache.load(self.key, self.path))
+
+    def test_unwritable_location_is_ignored(self):
+        blocker = os.path.join(self.directory.name, 'plik')
+        with open(blocker, 'w'):
+            pass
+        parser_cache.save(self.key, KompilatorParser._lrtable, os.path.join(blocker, 'x'))
+        self.assertEqual(os.listdir(self.directory.name), ['plik'])
+
+    def ambiguous_parser(self, messages):
+        # Gramatyka z jednym konfliktem shift/reduce, tablice w self.path
+        class Meta(parser_cache.CachedParserMeta):
+            cache_file = self.path
+
+        class AmbiguousParser(Parser, metaclass=Meta):
+            tokens = {'NUM', 'PLUS'}
+            log = SlyLogger(messages)
+
+            @_('expr PLUS expr')
+            def expr(self, p):
+                return p.expr0 + p.expr1
+
+            @_('NUM')
+            def expr(self, p):
+                return p.NUM
+
+        return AmbiguousParser
+
+    def test_conflicts_are_reported_from_cache(self):
+        built, cached = io.StringIO(), io.StringIO()
+        first = self.ambiguous_parser(built)
+        self.assertTrue(os.path.exists(self.path))
+        second = self.ambiguous_parser(cached)
+        self.assertIsInstance(second._lrtable, parser_cache.CachedTables)
+        self.assertIn('1 shift/reduce conflict', built.getvalue())
+        self.assertEqual(cached.getvalue(), built.getvalue())
+        self.assertEqual(second._lrtable.lr_action, first._lrtable.lr_action)
+
+    def test_tables_without_conflict_counts_are_rebuilt(self):
+        parser_cache.save(self.key, KompilatorParser._lrtable, self.path)
+        with open(self.path, 'rb') as f:
+            cached = marshal.load(f)
+        del cached['sr']
+        with open(self.path, 'wb') as f:
+            marshal.dump(cached, f)
+        self.assertIsNone(parser_cache.load(self.key, self.path))
+
+
+if __name__ == '__main__':
+    unittest.main()
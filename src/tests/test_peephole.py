@@ -0,0 +1,61 @@
+import unittest
+import support  # noqa: F401 - katalog src na ścieżce importu
+from instructions import Instruction as I, Label
+from peephole import PeepholeOptimizer
+
+
+def optimize(code, labels=None, rules=None):
+    optimizer = PeepholeOptimizer() if rules is None else PeepholeOptimizer(rules)
+    return optimizer.optimize(code, labels or {})
+
+
+class PeepholeTest(unittest.TestCase):
+
+    def test_store_then_load_of_same_cell(self):
+        code, _ = optimize([I('STORE', 5), I('LOAD', 5), I('WRITE'), I('HALT')])
+        self.assertEqual(code, [I('STORE', 5), I('WRITE'), I('HALT')])
+
+    def test_label_inside_window_blocks_rule(self):
+        # Do LOAD można doskoczyć z innego miejsca - r_a nie musi trzymać komórki 5
+        entry = Label(1)
+        code = [I('STORE', 5), I('LOAD', 5), I('WRITE'), I('JUMP', entry), I('HALT')]
+        result, labels = optimize(code, {entry: 1})
+        self.assertEqual(result[:2], [I('STORE', 5), I('LOAD', 5)])
+        self.assertEqual(labels[entry], 1)
+
+    def test_jump_to_next_instruction_moves_label(self):
+        target = Label(1)
+        code = [I('RST', 'a'), I('JUMP', target), I('WRITE'), I('HALT')]
+        result, labels = optimize(code, {target: 2})
+        self.assertEqual(result, [I('RST', 'a'), I('WRITE'), I('HALT')])
+        self.assertEqual(labels[target], 1)
+
+    def test_branch_over_jump_is_inverted(self):
+        skip, far = Label(1), Label(2)
+        code = [I('JPOS', skip), I('JUMP', far), I('WRITE'), I('HALT')]
+        result, labels = optimize(code, {skip: 2, far: 3})
+        self.assertEqual(result, [I('JZERO', far), I('WRITE'), I('HALT')])
+        self.assertEqual(labels[far], 2)
+
+    def test_unreachable_code_after_jump(self):
+        end = Label(1)
+        code = [I('JUMP', end), I('INC', 'a'), I('WRITE'), I('HALT')]
+        result, _ = optimize(code, {end: 3})
+        self.assertEqual(result, [I('HALT')])
+
+    def test_accumulator_rules(self):
+        code, _ = optimize([I('INC', 'b'), I('DEC', 'b'), I('SWP', 'c'), I('SWP', 'c'),
+                            I('ADD', 'b'), I('LOAD', 3), I('WRITE'), I('HALT')])
+        self.assertEqual(code, [I('LOAD', 3), I('WRITE'), I('HALT')])
+
+    def test_rule_must_not_make_code_worse(self):
+        def worse(window, next_labels):
+            first, = window
+            if first.op == 'INC':
+                return [I('ADD', 'b')]
+        with self.assertRaises(Exception):
+            optimize([I('INC', 'a'), I('HALT')], rules=[('worse', 1, worse)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import unittest
+from support import CompilerTestCase, compile_source, execute, instructions
+
+MEMORY = {'LOAD', 'STORE', 'RLOAD', 'RSTORE'}
+
+STEP = '''PROCEDURE krok(I x, O y) IS
+  t, u
+IN
+  t := x + 1;
+  u := t * 2;
+  t := u + x;
+  u := t + 3;
+  t := u * 2;
+  u := t - x;
+  t := u + 1;
+  u := t * 3;
+  t := u - 1;
+  u := t + x;
+  t := u + 2;
+  u := t * 2;
+  y := u;
+END
+
+PROGRAM IS
+  a, b, c, d, e
+IN
+  READ a;
+  b := a + 7;
+  c := 0;
+  FOR k FROM 1 TO 3 DO
+    krok(a, d);
+    c := c + d;
+    krok(b, e);
+    c := c + e;
+    krok(c, d);
+    c := d + k;
+  ENDFOR
+  krok(c, d);
+  krok(d, e);
+  krok(e, c);
+  WRITE c;
+  WRITE a;
+  WRITE b;
+END
+'''
+
+
+def step(x):
+    t = x + 1
+    u = t * 2
+    t = u + x
+    u = t + 3
+    t = u * 2
+    u = max(t - x, 0)
+    t = u + 1
+    u = t * 3
+    t = u - 1
+    u = t + x
+    t = u + 2
+    return t * 2
+
+
+class RegisterAllocationTest(CompilerTestCase):
+
+    def test_loop_scalars_stay_in_registers(self):
+        code = compile_source('''PROGRAM IS
+  s, n
+IN
+  READ n;
+  s := 0;
+  FOR i FROM 1 TO n DO
+    s := s + i;
+  ENDFOR
+  WRITE s;
+END
+''')
+        self.assertFalse(MEMORY & set(instructions(code)))
+        self.assertEqual(execute(code, [10])[0], [55])
+
+    def test_spilled_scalars(self):
+        # Więcej gorących zmiennych niż rejestrów e-h - część zostaje w pamięci
+        expected = [1] * 7
+        for k in range(1, 11):
+            expected[0] += k
+            for i in range(1, 7):
+                expected[i] += expected[i - 1]
+        self.assertOutput('''PROGRAM IS
+  a1, a2, a3, a4, a5, a6, a7
+IN
+  READ a1;
+  a2 := a1; a3 := a1; a4 := a1; a5 := a1; a6 := a1; a7 := a1;
+  FOR k FROM 1 TO 10 DO
+    a1 := a1 + k; a2 := a2 + a1; a3 := a3 + a2; a4 := a4 + a3;
+    a5 := a5 + a4; a6 := a6 + a5; a7 := a7 + a6;
+  ENDFOR
+  WRITE a1; WRITE a2; WRITE a3; WRITE a4; WRITE a5; WRITE a6; WRITE a7;
+END
+''', [1], expected)
+
+    def test_registers_survive_calls(self):
+        a = 5
+        b = a + 7
+        c = 0
+        for k in range(1, 4):
+            c = step(c + step(a) + step(b)) + k
+        c = step(step(step(c)))
+        code = compile_source(STEP)
+        self.assertIn('CALL', instructions(code))
+        self.assertEqual(execute(code, [a])[0], [c, a, b])
+
+    def test_uninitialized_register_is_detected(self):
+        # Rejestry startują losowo, więc odczyt h przed zapisem zmienia wynik
+        with self.assertRaises(AssertionError):
+            execute('RST a\nADD h\nWRITE\nHALT\n')
+        self.assertEqual(execute('RST a\nINC a\nWRITE\nHALT\n'), ([1], 102))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+from support import CompilerTestCase, execute, generate, parse
+from ast_nodes import Number, Variable
+from constfold import ConstantFolder
+from deadcode import DeadCodeElimination
+from inliner import Inliner
+from specializer import Specializer
+
+# Procedura za duża do wstawienia, wołana zawsze z tą samą tablicą Main
+BODY = ''.join(f'  s := s + t[{k}];\n  s := s * k;\n' for k in range(10))
+FIXED_ARRAY = f'''PROCEDURE suma(T t, I k, O s) IS
+IN
+  s := 0;
+{BODY}END
+
+PROGRAM IS
+  tab[0:9], a, b, c, k
+IN
+  FOR i FROM 0 TO 9 DO
+    tab[i] := i;
+  ENDFOR
+  READ a;
+  READ b;
+  k := 2;
+  suma(tab, a, c);
+  WRITE c;
+  suma(tab, b, c);
+  WRITE c;
+  suma(tab, k, c);
+  WRITE c;
+  suma(tab, k, a);
+  WRITE a;
+END
+'''
+
+
+def expected(k):
+    s = 0
+    for value in range(10):
+        s = (s + value) * k
+    return s
+
+
+def optimized(source, specialize=True):
+    ast = ConstantFolder().fold(Inliner().inline(parse(source)))
+    if specialize:
+        ast = ConstantFolder().fold(Specializer().specialize(ast))
+    return DeadCodeElimination().optimize(ast)
+
+
+class SpecializerTest(CompilerTestCase):
+
+    def test_clones_bind_array_and_constants(self):
+        program = optimized(FIXED_ARRAY)
+        names = [proc.name for proc in program.procedures]
+        self.assertNotIn('suma', names)
+        bindings = [proc.bindings for proc in program.procedures]
+        self.assertTrue(all(b['t'].name == 'tab' for b in bindings))
+        self.assertTrue(all(isinstance(b['t'], Variable) for b in bindings))
+        self.assertIn(2, [b['k'].value for b in bindings if isinstance(b.get('k'), Number)])
+
+    def test_specialized_program_is_cheaper(self):
+        inputs = [3, 5]
+        outputs = [expected(3), expected(5), expected(2), expected(2)]
+        clones = execute(generate(optimized(FIXED_ARRAY)), inputs)
+        pointers = execute(generate(optimized(FIXED_ARRAY, specialize=False)), inputs)
+        self.assertEqual(clones[0], outputs)
+        self.assertEqual(pointers[0], outputs)
+        self.assertLess(clones[1], pointers[1])
+        self.assertOutput(FIXED_ARRAY, inputs, outputs)
+
+
+if __name__ == '__main__':
+    unittest.main()
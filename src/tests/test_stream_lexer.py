@@ -0,0 +1,83 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from support import SRC, CompilerTestCase
+from lexer import KompilatorLexer
+from stream_lexer import StreamLexer
+
+EXAMPLES = [os.path.join(os.path.dirname(SRC), name) for name in ('sito.imp', 'test_mini.imp')]
+
+ALL_TOKENS = '''# komentarz := ; [ ]
+PROCEDURE p(T t, I a, O b) IS
+  x, y[0:10]
+IN
+  x := a + 12 - b * 3 / 4 % 5;
+  IF x = 1 THEN b := 2; ELSE b := 3; ENDIF
+  IF x != 1 THEN b := 2; ENDIF
+  WHILE x < 1 DO x := x + 1; ENDWHILE
+  WHILE x > 1 DO x := x - 1; ENDWHILE
+  REPEAT x := x + 1; UNTIL x >= 10;
+  FOR i FROM x DOWNTO 0 DO READ x; ENDFOR
+  FOR i FROM 0 TO x DO WRITE y[i]; ENDFOR
+  IF x <= 3 THEN x := 0; ENDIF
+
+
+END
+PROGRAM IS _abc1, PROGRAMX IN p(y, x, _abc1); END
+'''
+
+
+def tokens(stream, source):
+    with contextlib.redirect_stdout(io.StringIO()) as messages:
+        if stream:
+            result = [(t.type, t.value, t.lineno, t.index) for t in StreamLexer().tokenize(source)]
+        else:
+            result = [(t.type, t.value, t.lineno, t.index) for t in KompilatorLexer().tokenize(source)]
+    return result, messages.getvalue()
+
+
+class StreamLexerTest(CompilerTestCase):
+
+    def assertSameAsSly(self, source, index=True):
+        (stream, stream_messages), (sly, sly_messages) = tokens(True, source), tokens(False, source)
+        if not index:
+            stream, sly = [t[:3] for t in stream], [t[:3] for t in sly]
+        self.assertEqual(stream, sly)
+        self.assertEqual(stream_messages, sly_messages)
+
+    def test_same_tokens_as_sly(self):
+        self.assertSameAsSly(ALL_TOKENS)
+        for path in EXAMPLES:
+            with open(path) as f:
+                self.assertSameAsSly(f.read())
+
+    def test_same_errors_as_sly(self):
+        source = 'PROGRAM IS\n  x\nIN\n  x := 1 $ 2;\n  x := ą;\nEND\n'
+        # Po znaku spoza ASCII index liczy bajty, a SLY znaki
+        self.assertSameAsSly(source, index=False)
+        _, messages = tokens(True, source)
+        self.assertEqual(messages.splitlines(), [
+            "Błąd leksykalny: Nieznany znak '$' w linii 4",
+            "Błąd leksykalny: Nieznany znak 'ą' w linii 5"])
+
+    def test_columns(self):
+        columns = [(t.value, t.column) for t in StreamLexer().tokenize('IN\n  x := 12;\n')]
+        self.assertEqual(columns, [('IN', 1), ('x', 3), (':=', 5), (12, 8), (';', 10)])
+
+    def test_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            empty = os.path.join(directory, 'pusty.imp')
+            open(empty, 'w').close()
+            self.assertEqual(list(StreamLexer().tokenize_file(empty)), [])
+            with self.assertRaises(FileNotFoundError):
+                StreamLexer().tokenize_file(os.path.join(directory, 'brak.imp'))
+        with open(EXAMPLES[0]) as f:
+            expected = [(t.type, t.value, t.lineno) for t in KompilatorLexer().tokenize(f.read())]
+        self.assertEqual([(t.type, t.value, t.lineno)
+                          for t in StreamLexer().tokenize_file(EXAMPLES[0])], expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+from support import CompilerTestCase, compile_source, execute, instructions
+from codegen import multiplier_digits
+
+TEMPLATE = '''PROGRAM IS
+  x, y, z
+IN
+  READ x;
+  READ y;
+  z := x {op} {operand};
+  WRITE z;
+END
+'''
+
+CONSTANTS = [1, 2, 3, 7, 8, 10, 12, 16, 32, 100, 255, 1024, 1000003]
+VALUES = [0, 1, 5, 31, 32, 1000, 2 ** 40 + 3]
+JUMPS = ('JUMP', 'JPOS', 'JZERO')
+
+
+def program(op, operand):
+    return compile_source(TEMPLATE.format(op=op, operand=operand))
+
+
+class StrengthReductionTest(CompilerTestCase):
+
+    def test_digits_evaluate_to_constant(self):
+        for constant in range(1, 300):
+            digits, _ = multiplier_digits(constant)
+            value = 0
+            for digit in digits:
+                value = 2 * value + digit
+                self.assertGreater(value, 0)
+            self.assertEqual(value, constant)
+
+    def test_constant_operands(self):
+        for op, python in (('*', int.__mul__), ('/', int.__floordiv__), ('%', int.__mod__)):
+            for constant in CONSTANTS:
+                code = program(op, constant)
+                for x in VALUES:
+                    self.assertEqual(execute(code, [x, 0])[0], [python(x, constant)],
+                                     (x, op, constant))
+
+    def test_powers_of_two_are_straight_line(self):
+        for op, constant in (('*', 8), ('/', 16), ('%', 32)):
+            ops = instructions(program(op, constant))
+            self.assertFalse([o for o in ops if o in JUMPS], (op, constant))
+
+    def test_chain_is_cheaper_than_generic_multiplication(self):
+        x = 2 ** 40 + 3
+        _, chain = execute(program('*', 10), [x, 10])
+        _, generic = execute(program('*', 'y'), [x, 10])
+        self.assertLess(chain, generic)
+
+
+if __name__ == '__main__':
+    unittest.main()
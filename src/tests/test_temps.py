@@ -0,0 +1,66 @@
+import unittest
+import machine
+from support import CompilerTestCase, compile_source, execute
+from symbol_table import SymbolTable
+
+NEST = '''  FOR i FROM 1 TO n DO
+    FOR j FROM 1 TO n DO
+      FOR l FROM 1 TO n DO
+        FOR m FROM 1 TO n DO
+          s := s + i;
+          t := t + j;
+          u := u + l;
+          v := v + m;
+        ENDFOR
+      ENDFOR
+    ENDFOR
+  ENDFOR
+'''
+
+
+def nests(count):
+    # Kolejne gniazda pętli - liczniki obrotów nie mieszczą się w rejestrach
+    return f'''PROGRAM IS
+  n, s, t, u, v
+IN
+  READ n;
+  s := 0; t := 0; u := 0; v := 0;
+{NEST * count}  WRITE s; WRITE t; WRITE u; WRITE v;
+END
+'''
+
+
+def cells(code):
+    return {arg for op, arg in machine.parse(code) if op in ('LOAD', 'STORE')}
+
+
+class TemporarySlotsTest(CompilerTestCase):
+
+    def test_freed_cells_are_reused_in_stack_order(self):
+        symbols = SymbolTable()
+        symbols.enter_scope()
+        first = symbols.allocate_temp()
+        second = symbols.allocate_temp()
+        symbols.free_temp(first)
+        symbols.free_temp(second)
+        self.assertEqual(symbols.allocate_temp(), second)
+        self.assertEqual(symbols.allocate_temp(), first)
+        self.assertEqual(symbols.memory_offset, 2)
+
+    def test_temps_do_not_cross_scopes(self):
+        symbols = SymbolTable()
+        symbols.enter_scope()
+        symbols.free_temp(symbols.allocate_temp())
+        symbols.exit_scope()
+        symbols.enter_scope()
+        self.assertEqual(symbols.allocate_temp(), 1)
+
+    def test_memory_does_not_grow_with_sequential_loops(self):
+        one = compile_source(nests(1))
+        six = compile_source(nests(6))
+        self.assertEqual(len(cells(six)), len(cells(one)))
+        self.assertEqual(execute(six, [2])[0], [6 * 24] * 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
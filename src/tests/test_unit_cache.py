@@ -0,0 +1,144 @@
+import os
+import tempfile
+import unittest
+from support import CompilerTestCase, compile_source, execute, parse
+from codegen import CodeGenerator
+from constfold import ConstantFolder
+from cse import CommonSubexpressions
+from deadcode import DeadCodeElimination
+from induction import InductionVariables
+from inliner import Inliner
+from instructions import serialize
+from licm import LoopInvariantMotion
+from specializer import Specializer
+from unit_cache import UnitCache, decode, encode
+from test_workers import PROGRAM, expected
+
+# Trzy procedury z niezmiennikiem pętli, każda wołana z Main trzy razy z innymi
+# zmiennymi - specializer.py robi z nich po trzy kopie, licm.py wynosi n * n.
+# Procedury są za duże na wstawienie (inliner.py)
+PADDING = ''.join(f'  s := s + {k};\n' for k in range(30))
+
+
+def hoisting_program(extra_invariant=False, extra_call=False):
+    procedures = ''
+    for name in 'fgh':
+        extra = '    w := u * n;\n    t := t + w;\n' if extra_invariant and name == 'f' else ''
+        procedures += f'''PROCEDURE {name}(I n, O s) IS
+  t, u, v, w
+IN
+  t := 0;
+  u := n + 1;
+  FOR i FROM 1 TO n DO
+    v := n * n;
+    t := t + v;
+{extra}  ENDFOR
+  s := t;
+{PADDING}END
+
+'''
+    calls = ''.join(f'  {name}(a, d); WRITE d; {name}(b, e); WRITE e; {name}(c, d); WRITE d;\n'
+                    for name in 'fgh')
+    if extra_call:
+        calls += '  f(e, a); WRITE a;\n'
+    return procedures + f'''PROGRAM IS
+  a, b, c, d, e
+IN
+  READ a; READ b; READ c;
+{calls}END
+'''
+
+
+def optimize(ast):
+    # Optymalizacje AST w kolejności z main.compile_file
+    ast = Inliner().inline(ast)
+    ast = ConstantFolder().fold(ast)
+    ast = Specializer().specialize(ast)
+    ast = ConstantFolder().fold(ast)
+    ast = DeadCodeElimination().optimize(ast)
+    ast = LoopInvariantMotion().optimize(ast)
+    ast = InductionVariables().optimize(ast)
+    return CommonSubexpressions().optimize(ast)
+
+
+class UnitCacheTest(CompilerTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def generate(self, source):
+        cache = UnitCache(self.directory.name)
+        generator = CodeGenerator(cache=cache)
+        generator.generate(parse(source))
+        return serialize(generator.code), cache
+
+    def generate_fresh(self, source):
+        generator = CodeGenerator()
+        generator.generate(parse(source))
+        return serialize(generator.code)
+
+    def test_encoded_unit_round_trip(self):
+        generator = CodeGenerator()
+        generator.generate(parse(PROGRAM))
+        unit = generator.generate_unit(parse(PROGRAM).procedures[0])
+        copy = decode(encode(unit))
+        self.assertEqual([repr(i) for i in copy.code], [repr(i) for i in unit.code])
+        self.assertEqual(sorted(copy.labels.values()), sorted(unit.labels.values()))
+        self.assertEqual([vars(sym) for sym in copy.args], [vars(sym) for sym in unit.args])
+        self.assertEqual((copy.clobbers, copy.frame_end), (unit.clobbers, unit.frame_end))
+
+    def test_second_compilation_hits(self):
+        first, cache = self.generate(PROGRAM)
+        units = len(os.listdir(self.directory.name))
+        self.assertEqual(units, 9)
+        self.assertEqual((cache.hits, cache.misses), (0, units))
+        second, cache = self.generate(PROGRAM)
+        self.assertEqual((cache.hits, cache.misses), (units, 0))
+        self.assertEqual(second, first)
+        self.assertEqual(execute(second, [4])[0], expected(4))
+
+    def test_changed_procedure_is_regenerated(self):
+        self.generate(PROGRAM)
+        changed = PROGRAM.replace('b := t * 6;', 'b := t * 7;')
+        code, cache = self.generate(changed)
+        self.assertEqual(cache.misses, 1)
+        self.assertEqual(code, self.generate_fresh(changed))
+
+    def test_new_names_do_not_shift_other_procedures(self):
+        # Świeże nazwy (inv@k, f@k) są numerowane w obrębie procedury: dodatkowy
+        # niezmiennik albo kopia f zmienia tylko jednostki f i Main
+        def compile_optimized(source):
+            cache = UnitCache(self.directory.name)
+            generator = CodeGenerator(cache=cache)
+            generator.generate(optimize(parse(source)))
+            return serialize(generator.code), cache
+
+        _, cache = compile_optimized(hoisting_program())
+        self.assertEqual(cache.misses, 10)
+        code, cache = compile_optimized(hoisting_program(extra_invariant=True))
+        self.assertEqual((cache.hits, cache.misses), (6, 4))
+        self.assertEqual(execute(code, [2, 3, 4])[0], [455, 498, 579] + [443, 462, 499] * 2)
+        code, cache = compile_optimized(hoisting_program(extra_call=True))
+        self.assertEqual((cache.hits, cache.misses), (9, 2))
+        self.assertEqual(execute(code, [2, 3, 4])[0][:9], [443, 462, 499] * 3)
+
+    def test_damaged_unit_is_regenerated(self):
+        first, _ = self.generate(PROGRAM)
+        for name in os.listdir(self.directory.name):
+            with open(os.path.join(self.directory.name, name), 'wb') as f:
+                f.write(b'\x00')
+        code, cache = self.generate(PROGRAM)
+        self.assertEqual(cache.hits, 0)
+        self.assertEqual(code, first)
+
+    def test_full_pipeline_with_cache(self):
+        plain = compile_source(PROGRAM)
+        self.assertEqual(compile_source(PROGRAM, cache_dir=self.directory.name), plain)
+        self.assertEqual(compile_source(PROGRAM, cache_dir=self.directory.name), plain)
+
+
+if __name__ == '__main__':
+    unittest.main()
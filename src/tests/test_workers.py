@@ -0,0 +1,69 @@
+import unittest
+from support import CompilerTestCase, compile_source, execute, generate, parse
+
+# Procedury niezależne (jedna fala) i wołające wcześniejsze (kolejne fale)
+LEAVES = ''.join(f'''PROCEDURE p{k}(I a, O b) IS
+  t
+IN
+  t := a + {k};
+  b := t * {k + 1};
+END
+
+''' for k in range(6))
+
+PROGRAM = LEAVES + '''PROCEDURE q(I a, O b) IS
+  c, d
+IN
+  p1(a, c);
+  p2(c, d);
+  b := c + d;
+END
+
+PROCEDURE r(I a, O b) IS
+  c
+IN
+  q(a, c);
+  p5(c, b);
+END
+
+PROGRAM IS
+  x, y
+IN
+  READ x;
+  p0(x, y); WRITE y;
+  p3(x, y); WRITE y;
+  p4(y, x); WRITE x;
+  r(x, y); WRITE y;
+END
+'''
+
+
+def expected(x):
+    def p(k, a):
+        return (a + k) * (k + 1)
+
+    def q(a):
+        c = p(1, a)
+        return c + p(2, c)
+    output = [p(0, x), p(3, x)]
+    x = p(4, output[-1])
+    output.append(x)
+    output.append(p(5, q(x)))
+    return output
+
+
+class ParallelGenerationTest(CompilerTestCase):
+
+    def test_workers_produce_identical_code(self):
+        serial = generate(parse(PROGRAM))
+        parallel = generate(parse(PROGRAM), workers=3)
+        self.assertEqual(parallel, serial)
+        self.assertEqual(execute(parallel, [4])[0], expected(4))
+
+    def test_full_pipeline_with_workers(self):
+        self.assertEqual(compile_source(PROGRAM, workers=3), compile_source(PROGRAM))
+        self.assertOutput(PROGRAM, [2], expected(2), workers=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import hashlib
+import marshal
+import os
+import cache_io
+from instructions import Instruction, Label
+from linker import CodeUnit
+from symbol_table import Symbol
+
+
+def fingerprint(value):
+    """Postać kanoniczna wartości (drzewa AST, symboli, interfejsów jednostek)
+    z samych krotek i napisów - równe struktury dają równy odcisk."""
+    if isinstance(value, (list, tuple)):
+        return ('list',) + tuple(fingerprint(item) for item in value)
+    if isinstance(value, dict):
+        return ('dict',) + tuple(sorted((repr(key), fingerprint(item))
+                                        for key, item in value.items()))
+    if isinstance(value, (set, frozenset)):
+        return ('set',) + tuple(sorted(repr(item) for item in value))
+    if hasattr(value, '__dict__'):
+        return (type(value).__name__,) + tuple(
+            (name, fingerprint(item)) for name, item in sorted(vars(value).items()))
+    return value
+
+
+def encode(unit):
+    """Jednostka jako same listy, liczby i napisy (format marshal). Etykieta
+    w operandzie to para ('label', numer) - operandy to poza tym napisy i liczby."""
+    numbers = {label: i for i, label in enumerate(unit.labels)}
+    args = [('label', numbers[instr.arg]) if isinstance(instr.arg, Label) else instr.arg
+            for instr in unit.code]
+    return {
+        'name': unit.name,
+        'ops': [instr.op for instr in unit.code],
+        'args': args,
+        'labels': list(unit.labels.values()),
+        'params': None if unit.args is None else [
+            None if sym is None else vars(sym) for sym in unit.args],
+        'clobbers': set(unit.clobbers),
+        'frame_end': unit.frame_end,
+    }
+
+
+def decode(data):
+    labels = [Label(i) for i in range(len(data['labels']))]
+    code = [Instruction(op, labels[arg[1]] if isinstance(arg, tuple) else arg)
+            for op, arg in zip(data['ops'], data['args'])]
+    params = None
+    if data['params'] is not None:
+        params = []
+        for fields in data['params']:
+            sym = None
+            if fields is not None:
+                sym = Symbol.__new__(Symbol)
+                sym.__dict__.update(fields)
+            params.append(sym)
+    return CodeUnit(data['name'], code, dict(zip(labels, data['labels'])),
+                    params, data['clobbers'], data['frame_end'])
+
+
+def compiler_version():
+    # Skrót źródeł kompilatora - każda jego zmiana unieważnia całą pamięć
+    directory = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(directory)):
+        if name.endswith('.py'):
+            with open(os.path.join(directory, name), 'rb') as f:
+                digest.update(name.encode())
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+class UnitCache:
+    """Pamięć podręczna jednostek kodu (linker.CodeUnit) na dysku, adresowana
+    treścią: kluczem jest skrót drzewa procedury po optymalizacjach i faktów
+    o układzie pamięci, od których zależy jej kod (interfejsy wołanych
+    procedur, początek ramek, zmienne Main). Po małej zmianie programu
+    generowane są od nowa tylko jednostki, których klucz się zmienił."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.version = compiler_version()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, generator_class, node, context):
+        parts = (self.version, generator_class.__name__, fingerprint(node), fingerprint(context))
+        return hashlib.sha256(repr(parts).encode()).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.unit")
+
+    def load(self, key):
+        # Jednostka albo None, gdy jej nie ma lub plik jest uszkodzony
+        try:
+            with open(self.path(key), 'rb') as f:
+                unit = decode(marshal.load(f))
+        except (OSError, EOFError, ValueError, TypeError, KeyError, IndexError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return unit
+
+    def store(self, key, unit):
+        cache_io.dump(encode(unit), self.path(key))